@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DetectionBatchScheduler:
+    """
+    Dynamic micro-batching scheduler for detection requests.
+
+    Concurrent requests are collected for up to ``window_ms`` milliseconds or until
+    ``max_batch_size`` requests are waiting, then run as one batched forward pass
+    through ``batch_fn``. Each caller awaits its own future and receives its own
+    response dictionary. Batches run through ``runner`` (the server passes
+    ``InferenceExecutor.run_batch`` so they share its threads and latency stats).
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+                 max_batch_size: int = 8, window_ms: float = 20.0, stats_window: int = 1000,
+                 runner: Optional[Callable[[Callable, List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]]] = None):
+        """
+        Initialize the scheduler
+
+        Args:
+            batch_fn: Function taking a list of request dicts and returning a list of responses
+            max_batch_size: Maximum number of requests per forward pass
+            window_ms: Maximum time to wait for more requests after the first one arrives
+            stats_window: Number of recent samples kept for percentile statistics
+            runner: Coroutine function (batch_fn, requests) -> responses running a batch off
+                the event loop (defaults to a private single thread)
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = max(0.0, window_ms) / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Batches run off the event loop, one at a time unless a shared runner is given
+        self._executor = None
+        if runner is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="detection-batch")
+            runner = self._run_on_executor
+        self._runner = runner
+
+        # Statistics
+        self._total_requests = 0
+        self._total_batches = 0
+        self._batch_size_counts: Dict[int, int] = {}
+        self._queue_waits = deque(maxlen=stats_window)
+        self._batch_latencies = deque(maxlen=stats_window)
+
+    def start(self):
+        """Start the background batching loop (must be called from a running event loop)"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Batch scheduler started (max_batch_size={self.max_batch_size}, "
+                        f"window={self.window * 1000:.0f}ms)")
+
+    async def stop(self):
+        """Stop the batching loop and fail any requests still waiting"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Batch scheduler stopped"))
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    async def _run_on_executor(self, fn: Callable, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Default runner: run a batch on the private thread"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, requests)
+
+    async def submit(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue a detection request and wait for its result
+
+        Args:
+            request: Request dictionary accepted by batch_fn
+
+        Returns:
+            Response dictionary for this request
+        """
+        if self._queue is None:
+            raise RuntimeError("Batch scheduler is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((request, future, time.perf_counter()))
+        return await future
+
+    async def _collect_batch(self) -> List[tuple]:
+        """Wait for the first request, then gather more until the window closes or the batch is full"""
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.window
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        """Main batching loop"""
+        while True:
+            batch = await self._collect_batch()
+
+            # Drop requests whose callers have gone away
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                self._queue_waits.append(started - enqueued)
+
+            requests = [item[0] for item in batch]
+            try:
+                responses = await self._runner(self.batch_fn, requests)
+            except Exception as e:
+                logger.error(f"Batched detection failed: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self._record_batch(len(batch), time.perf_counter() - started)
+
+            for (_, future, _), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+
+    def _record_batch(self, size: int, latency: float):
+        """Update batch statistics"""
+        self._total_batches += 1
+        self._total_requests += size
+        self._batch_size_counts[size] = self._batch_size_counts.get(size, 0) + 1
+        self._batch_latencies.append(latency)
+
+    @staticmethod
+    def _percentile(samples, pct: float) -> Optional[float]:
+        """Return the given percentile of samples in milliseconds"""
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return round(ordered[index] * 1000, 2)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batch-size and queue-wait statistics"""
+        return {
+            "running": self._worker is not None and not self._worker.done(),
+            "max_batch_size": self.max_batch_size,
+            "window_ms": self.window * 1000,
+            "pending_requests": self._queue.qsize() if self._queue is not None else 0,
+            "total_requests": self._total_requests,
+            "total_batches": self._total_batches,
+            "avg_batch_size": round(self._total_requests / self._total_batches, 2) if self._total_batches else 0.0,
+            "batch_size_histogram": dict(sorted(self._batch_size_counts.items())),
+            "queue_wait_ms": {
+                "p50": self._percentile(self._queue_waits, 50),
+                "p95": self._percentile(self._queue_waits, 95),
+                "p99": self._percentile(self._queue_waits, 99)
+            },
+            "batch_latency_ms": {
+                "p50": self._percentile(self._batch_latencies, 50),
+                "p95": self._percentile(self._batch_latencies, 95),
+                "p99": self._percentile(self._batch_latencies, 99)
+            }
+        }
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Accuracy/latency comparison of model precisions for DynamicGroundingDINO
+
+Runs the same images and queries through each precision (fp32, bf16, int8) on
+CPU, reports latency per image and how closely detections agree with the fp32
+baseline, so a deployment can decide whether MODEL_PRECISION=int8 is worth it.
+
+Example:
+    python benchmark_precision.py --images street.jpg https://example.com/cat.jpg \\
+        --queries "person,car,cat" --precisions fp32,int8 --runs 5
+"""
+
+import argparse
+import gc
+import json
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+from model import DynamicGroundingDINO, MODEL_PRECISIONS
+
+
+def box_iou(a: List[float], b: List[float]) -> float:
+    """Intersection over union of two [x_min, y_min, x_max, y_max] boxes"""
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    intersection = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def to_detections(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Convert raw detection results into plain label/score/box dictionaries"""
+    return [
+        {
+            "label": label,
+            "score": float(score),
+            "box": box.tolist() if hasattr(box, "tolist") else list(box)
+        }
+        for box, score, label in zip(results["boxes"], results["scores"], results["labels"])
+    ]
+
+
+def compare(baseline: List[Dict[str, Any]], candidate: List[Dict[str, Any]],
+            iou_threshold: float) -> Dict[str, Any]:
+    """Greedily match candidate detections to the baseline (same label, IoU above threshold)"""
+    unmatched = list(range(len(candidate)))
+    score_deltas = []
+    ious = []
+
+    for base in sorted(baseline, key=lambda d: -d["score"]):
+        best, best_iou = None, iou_threshold
+        for j in unmatched:
+            if candidate[j]["label"] != base["label"]:
+                continue
+            iou = box_iou(base["box"], candidate[j]["box"])
+            if iou >= best_iou:
+                best, best_iou = j, iou
+        if best is not None:
+            unmatched.remove(best)
+            score_deltas.append(abs(candidate[best]["score"] - base["score"]))
+            ious.append(best_iou)
+
+    matched = len(ious)
+    return {
+        "matched": matched,
+        "baseline": len(baseline),
+        "candidate": len(candidate),
+        "recall": matched / len(baseline) if baseline else 1.0,
+        "precision": matched / len(candidate) if candidate else 1.0,
+        "mean_iou": statistics.mean(ious) if ious else None,
+        "mean_score_delta": statistics.mean(score_deltas) if score_deltas else None
+    }
+
+
+def run_precision(precision: str, args) -> Dict[str, Any]:
+    """Load the model at one precision and time every image"""
+    print(f"\n=== {precision} ===")
+    started = time.perf_counter()
+    # Caches are disabled so every run measures a full forward pass
+    model = DynamicGroundingDINO(model_id=args.model_id, device="cpu", text_cache_size=0,
+                                 vision_cache_mb=0, precision=precision)
+    model.result_cache.ttl = 0
+    load_seconds = time.perf_counter() - started
+
+    images = []
+    for source in args.images:
+        images.append(model._load_image_source(source))
+
+    latencies = []
+    detections = []
+    for image in images:
+        for _ in range(args.warmup):
+            model.detect_objects(image, args.queries, args.box_threshold, args.text_threshold)
+
+        timings = []
+        for _ in range(args.runs):
+            run_started = time.perf_counter()
+            _, results = model.detect_objects(image, args.queries, args.box_threshold, args.text_threshold)
+            timings.append(time.perf_counter() - run_started)
+        latencies.append(timings)
+        detections.append(to_detections(results))
+
+    effective = model.precision
+    del model
+    gc.collect()
+
+    all_timings = [t for timings in latencies for t in timings]
+    return {
+        "requested_precision": precision,
+        "effective_precision": effective,
+        "load_seconds": round(load_seconds, 2),
+        "latency_ms": {
+            "mean": round(statistics.mean(all_timings) * 1000, 1),
+            "median": round(statistics.median(all_timings) * 1000, 1),
+            "min": round(min(all_timings) * 1000, 1)
+        },
+        "detections": detections
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare accuracy and latency of model precisions on CPU")
+    parser.add_argument("--images", nargs="+", required=True, help="Image paths or URLs")
+    parser.add_argument("--queries", required=True, help="Comma-separated text queries")
+    parser.add_argument("--precisions", default="fp32,int8",
+                        help=f"Comma-separated precisions to compare, first is the baseline "
+                             f"(choices: {', '.join(MODEL_PRECISIONS)})")
+    parser.add_argument("--model-id", default="rziga/mm_grounding_dino_large_all", help="HuggingFace model id")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per image")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed warmup runs per image")
+    parser.add_argument("--box-threshold", type=float, default=0.35)
+    parser.add_argument("--text-threshold", type=float, default=0.35)
+    parser.add_argument("--iou-threshold", type=float, default=0.5,
+                        help="Minimum IoU for a detection to count as matching the baseline")
+    parser.add_argument("--output", help="Write the full report as JSON to this path")
+    args = parser.parse_args()
+
+    args.queries = [q.strip() for q in args.queries.split(",") if q.strip()]
+    precisions = [p.strip().lower() for p in args.precisions.split(",") if p.strip()]
+    invalid = [p for p in precisions if p not in MODEL_PRECISIONS]
+    if invalid or not precisions:
+        print(f"❌ Error: unsupported precision(s): {', '.join(invalid) or 'none given'}")
+        sys.exit(1)
+
+    reports = [run_precision(precision, args) for precision in precisions]
+
+    baseline = reports[0]
+    for report in reports:
+        comparisons = [
+            compare(base, candidate, args.iou_threshold)
+            for base, candidate in zip(baseline["detections"], report["detections"])
+        ]
+        matched = sum(c["matched"] for c in comparisons)
+        baseline_total = sum(c["baseline"] for c in comparisons)
+        candidate_total = sum(c["candidate"] for c in comparisons)
+        deltas = [c["mean_score_delta"] for c in comparisons if c["mean_score_delta"] is not None]
+        report["agreement"] = {
+            "recall": round(matched / baseline_total, 4) if baseline_total else 1.0,
+            "precision": round(matched / candidate_total, 4) if candidate_total else 1.0,
+            "mean_score_delta": round(statistics.mean(deltas), 4) if deltas else None,
+            "per_image": comparisons
+        }
+        report["speedup"] = round(baseline["latency_ms"]["mean"] / report["latency_ms"]["mean"], 2)
+
+    print("\n" + "=" * 78)
+    print(f"{'precision':<12}{'effective':<12}{'mean ms':>10}{'median ms':>11}{'speedup':>9}"
+          f"{'recall':>8}{'prec.':>8}{'Δscore':>8}")
+    print("-" * 78)
+    for report in reports:
+        agreement = report["agreement"]
+        delta = agreement["mean_score_delta"]
+        print(f"{report['requested_precision']:<12}{report['effective_precision']:<12}"
+              f"{report['latency_ms']['mean']:>10}{report['latency_ms']['median']:>11}"
+              f"{report['speedup']:>8}x{agreement['recall']:>8}{agreement['precision']:>8}"
+              f"{(f'{delta:.3f}' if delta is not None else '-'):>8}")
+    print("=" * 78)
+    print(f"Agreement is measured against {baseline['requested_precision']} "
+          f"(same label, IoU >= {args.iou_threshold})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"images": args.images, "queries": args.queries, "reports": reports}, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+import os
+import copy
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache with hit/miss counters.
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key (marking it recently used) or default"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries beyond max_size"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size and hit/miss statistics"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
+
+
+class TranslationCache:
+    """
+    Two-tier translation cache keyed by the raw label.
+
+    Tier 1 is an in-memory LRU per process; tier 2 is an SQLite database shared by
+    all gunicorn workers and the queue consumer, so a Thai label only goes through
+    the remote aift services once. The original translation latency is stored with
+    each entry so hits can report how much time they saved.
+
+    Lookups never wait on each other: the memory tier has its own short lock and
+    each thread reads and writes the disk tier through its own SQLite connection.
+    """
+
+    def __init__(self, max_size: int = 1024, db_path: Optional[str] = None):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of labels kept in memory
+            db_path: SQLite database path shared between processes (None disables the disk tier)
+        """
+        self.memory = LRUCache(max_size)
+        self.db_path = db_path or None
+        self._local = threading.local()
+        # Guards the statistics only
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    def _connection(self):
+        """Return this thread's SQLite connection, reconnecting after a fork"""
+        if self.db_path is None:
+            return None
+
+        pid = os.getpid()
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != pid:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "label TEXT PRIMARY KEY, translated TEXT NOT NULL, "
+                "latency REAL NOT NULL DEFAULT 0, created_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._local.conn, self._local.pid = conn, pid
+        return conn
+
+    def _count(self, field: str, saved_seconds: float = 0.0):
+        """Increment a hit/miss counter and the saved translation time"""
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+            self.saved_seconds += saved_seconds
+
+    def get(self, label: str, record: bool = True) -> Optional[str]:
+        """Return the cached translation for a raw label, or None (record=False skips the statistics)"""
+        entry = self.memory.get(label)
+        if entry is not None:
+            if record:
+                self._count("memory_hits", entry[1])
+            return entry[0]
+
+        row = None
+        try:
+            conn = self._connection()
+            if conn is not None:
+                row = conn.execute(
+                    "SELECT translated, latency FROM translations WHERE label = ?", (label,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Translation cache read failed: {e}")
+
+        if row is None:
+            if record:
+                self._count("misses")
+            return None
+        if record:
+            self._count("disk_hits", row[1])
+
+        self.memory.put(label, (row[0], row[1]))
+        return row[0]
+
+    def put(self, label: str, translated: str, latency: float = 0.0):
+        """Store a translation in both tiers"""
+        self.memory.put(label, (translated, latency))
+
+        try:
+            conn = self._connection()
+            if conn is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO translations (label, translated, latency, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (label, translated, latency, time.time())
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Translation cache write failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rate and saved-latency statistics"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "memory_size": len(self.memory),
+                "max_memory_size": self.memory.max_size,
+                "disk_path": self.db_path,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0,
+                "saved_seconds": round(self.saved_seconds, 3)
+            }
+
+
+class ResultCache:
+    """
+    Two-tier cache of detection results keyed by image content, labels and thresholds.
+
+    Tier 1 is an in-memory LRU per process; tier 2 is an SQLite database shared by
+    all gunicorn workers and the queue consumer. Entries expire after ``ttl`` seconds
+    and the disk tier keeps at most ``max_entries`` rows, evicting the least
+    recently used ones.
+    """
+
+    def __init__(self, max_size: int = 256, db_path: Optional[str] = None,
+                 ttl: float = 300.0, max_entries: int = 10000):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of results kept in memory
+            db_path: SQLite database path shared between processes (None disables the disk tier)
+            ttl: Seconds a cached result stays valid (0 disables the cache)
+            max_entries: Maximum number of rows kept in the disk tier
+        """
+        self.memory = LRUCache(max_size)
+        self.db_path = db_path or None
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._writes_since_evict = 0
+
+        # Statistics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @staticmethod
+    def make_key(image_digest: str, labels: List[str], box_threshold: float,
+                 text_threshold: float, model_id: str = "") -> str:
+        """Build a cache key from an image digest, processed labels and thresholds"""
+        payload = json.dumps(
+            [model_id, image_digest, list(labels), round(float(box_threshold), 6), round(float(text_threshold), 6)],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _connection(self):
+        """Return this process's SQLite connection, reconnecting after a fork"""
+        if self.db_path is None:
+            return None
+
+        pid = os.getpid()
+        if self._conn is None or self._conn_pid != pid:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)")
+            conn.commit()
+            self._conn, self._conn_pid = conn, pid
+        return self._conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached result for a key, or None if missing or expired"""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        entry = self.memory.get(key)
+        if entry is not None and now - entry[1] < self.ttl:
+            with self._lock:
+                self.memory_hits += 1
+            return copy.deepcopy(entry[0])
+
+        row = None
+        with self._lock:
+            try:
+                conn = self._connection()
+                if conn is not None:
+                    row = conn.execute(
+                        "SELECT payload, created_at FROM results WHERE key = ? AND created_at > ?",
+                        (key, now - self.ttl)
+                    ).fetchone()
+                    if row is not None:
+                        conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+                        conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Result cache read failed: {e}")
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+
+        result = json.loads(row[0])
+        self.memory.put(key, (result, row[1]))
+        return copy.deepcopy(result)
+
+    def put(self, key: str, results: Dict[str, Any]):
+        """Store detection results (boxes, scores, labels and image size) in both tiers"""
+        if not self.enabled:
+            return
+
+        result = {
+            "boxes": [box.tolist() if hasattr(box, "tolist") else list(box) for box in results["boxes"]],
+            "scores": [float(score) for score in results["scores"]],
+            "labels": list(results["labels"])
+        }
+        # Lets a hit be answered without decoding the image
+        if "image_size" in results:
+            result["image_size"] = list(results["image_size"])
+        now = time.time()
+        self.memory.put(key, (result, now))
+
+        with self._lock:
+            try:
+                conn = self._connection()
+                if conn is not None:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO results (key, payload, created_at, accessed_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (key, json.dumps(result, ensure_ascii=False), now, now)
+                    )
+                    self._writes_since_evict += 1
+                    if self._writes_since_evict >= 100:
+                        self._evict(conn, now)
+                    conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Result cache write failed: {e}")
+
+    def _evict(self, conn, now: float):
+        """Drop expired rows and trim the disk tier to max_entries (least recently used first)"""
+        self._writes_since_evict = 0
+        conn.execute("DELETE FROM results WHERE created_at <= ?", (now - self.ttl,))
+        conn.execute(
+            "DELETE FROM results WHERE key IN ("
+            "SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rate statistics"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "ttl_seconds": self.ttl,
+                "memory_size": len(self.memory),
+                "max_memory_size": self.memory.max_size,
+                "disk_path": self.db_path,
+                "max_disk_entries": self.max_entries,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0
+            }
@@ -0,0 +1,136 @@
+import time
+import bisect
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker with a per-call latency budget for blocking remote calls.
+
+    Calls run on a private thread pool and are abandoned after ``timeout`` seconds.
+    After ``failure_threshold`` consecutive failures or timeouts the breaker opens and
+    rejects calls immediately; once ``reset_timeout`` has passed a single half-open
+    probe is let through, which closes the breaker on success or reopens it on failure.
+    """
+
+    LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name: str, timeout: float = 5.0, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, max_workers: int = 16):
+        self.name = name
+        self.timeout = timeout
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-call")
+        self._lock = threading.Lock()
+
+        self.state = "closed"
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+        # Statistics
+        self._calls = 0
+        self._failures = 0
+        self._timeouts = 0
+        self._rejected = 0
+        self._histograms: Dict[str, List[int]] = {}
+
+    def _before_call(self) -> bool:
+        """Check whether a call may proceed; returns True if it is the half-open probe"""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self._rejected += 1
+                    raise CircuitOpenError(f"{self.name} circuit is open")
+                self.state = "half_open"
+
+            if self.state == "half_open":
+                if self._probe_in_flight:
+                    self._rejected += 1
+                    raise CircuitOpenError(f"{self.name} circuit is half-open, probe in flight")
+                self._probe_in_flight = True
+                return True
+
+            return False
+
+    def _record(self, operation: str, latency: float, success: bool, probe: bool):
+        """Update breaker state and the latency histogram"""
+        with self._lock:
+            self._calls += 1
+            histogram = self._histograms.setdefault(operation, [0] * (len(self.LATENCY_BUCKETS) + 1))
+            histogram[bisect.bisect_left(self.LATENCY_BUCKETS, latency)] += 1
+
+            if probe:
+                self._probe_in_flight = False
+
+            if success:
+                self._consecutive_failures = 0
+                self.state = "closed"
+                return
+
+            self._failures += 1
+            self._consecutive_failures += 1
+            if probe or self._consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"{self.name} circuit opened after {self._consecutive_failures} consecutive failures")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+    def call(self, operation: str, fn, *args, **kwargs):
+        """
+        Run fn through the breaker
+
+        Args:
+            operation: Name used for the latency histogram
+            fn: Blocking function to call
+
+        Raises:
+            CircuitOpenError: If the breaker rejects the call
+            TimeoutError: If the call exceeds the timeout
+        """
+        probe = self._before_call()
+        started = time.perf_counter()
+        future = self._executor.submit(fn, *args, **kwargs)
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            self._record(operation, time.perf_counter() - started, False, probe)
+            raise TimeoutError(f"{self.name} {operation} timed out after {self.timeout}s")
+        except Exception:
+            self._record(operation, time.perf_counter() - started, False, probe)
+            raise
+
+        self._record(operation, time.perf_counter() - started, True, probe)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get breaker state and latency histograms"""
+        with self._lock:
+            labels = [f"le_{bucket}" for bucket in self.LATENCY_BUCKETS] + ["inf"]
+            return {
+                "state": self.state,
+                "timeout_seconds": self.timeout,
+                "consecutive_failures": self._consecutive_failures,
+                "calls": self._calls,
+                "failures": self._failures,
+                "timeouts": self._timeouts,
+                "rejected": self._rejected,
+                "latency_histograms": {
+                    operation: dict(zip(labels, counts))
+                    for operation, counts in self._histograms.items()
+                }
+            }
@@ -0,0 +1,201 @@
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import torch
+from transformers.modeling_outputs import BaseModelOutput
+
+from caches import LRUCache
+
+
+class TextFeatureCache(LRUCache):
+    """
+    LRU cache of text-encoder outputs keyed by the processed label list.
+
+    The labels of the batch being run are bound per thread with ``bind`` so the
+    text backbone wrapper can look up each row without re-deriving the labels.
+    """
+
+    def __init__(self, max_size: int = 256):
+        super().__init__(max_size)
+        self._local = threading.local()
+
+    @contextmanager
+    def bind(self, keys: List[Tuple[str, ...]], lengths: List[int]):
+        """Bind cache keys and unpadded token lengths for the rows of the next forward pass"""
+        self._local.batch = (keys, lengths)
+        try:
+            yield
+        finally:
+            self._local.batch = None
+
+    def current_batch(self) -> Optional[Tuple[List[Tuple[str, ...]], List[int]]]:
+        """Return the (keys, lengths) bound on this thread, if any"""
+        return getattr(self._local, "batch", None)
+
+
+class CachedTextBackbone(torch.nn.Module):
+    """
+    Drop-in wrapper around the Grounding DINO text backbone that serves cached
+    text features for label lists seen before and only encodes the missing rows.
+    """
+
+    def __init__(self, backbone: torch.nn.Module, cache: TextFeatureCache):
+        super().__init__()
+        self.backbone = backbone
+        self.cache = cache
+
+    def forward(self, input_ids, attention_mask=None, token_type_ids=None,
+                position_ids=None, return_dict=None, **kwargs):
+        batch = self.cache.current_batch()
+        if batch is None or len(batch[0]) != input_ids.shape[0]:
+            return self.backbone(input_ids=input_ids, attention_mask=attention_mask,
+                                 token_type_ids=token_type_ids, position_ids=position_ids,
+                                 return_dict=return_dict, **kwargs)
+
+        keys, lengths = batch
+        rows = [self.cache.get(key) for key in keys]
+        missing = [i for i, row in enumerate(rows) if row is None]
+
+        if missing:
+            index = torch.tensor(missing, device=input_ids.device)
+
+            def select(t):
+                return t.index_select(0, index) if t is not None else None
+
+            outputs = self.backbone(input_ids=select(input_ids), attention_mask=select(attention_mask),
+                                    token_type_ids=select(token_type_ids), position_ids=select(position_ids),
+                                    return_dict=True, **kwargs)
+            encoded = outputs.last_hidden_state
+            for j, i in enumerate(missing):
+                rows[i] = encoded[j, :lengths[i]].detach()
+                self.cache.put(keys[i], rows[i])
+
+            # Nothing cached in this batch - return the backbone output untouched
+            if len(missing) == len(keys):
+                return outputs if return_dict is not False else (encoded,)
+
+        # Reassemble the padded batch from per-row features
+        seq_len = input_ids.shape[1]
+        hidden_size = rows[0].shape[-1]
+        last_hidden_state = rows[0].new_zeros((len(rows), seq_len, hidden_size))
+        for i, row in enumerate(rows):
+            last_hidden_state[i, :row.shape[0]] = row
+
+        if return_dict is False:
+            return (last_hidden_state,)
+        return BaseModelOutput(last_hidden_state=last_hidden_state)
+
+
+class VisionFeatureCache(LRUCache):
+    """
+    LRU cache of image-backbone feature maps bounded by total tensor memory.
+
+    Keys combine the image content digest with the padded input shape, so a row is
+    only reused when the preprocessed pixel tensor is identical. The digests of the
+    batch being run are bound per thread with ``bind``.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024):
+        super().__init__(max_size=max_bytes)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._sizes: Dict[Any, int] = {}
+        self._local = threading.local()
+
+    def put(self, key, value: List[Tuple[torch.Tensor, torch.Tensor]]):
+        """Store per-level (feature_map, mask) pairs, evicting least recently used entries beyond max_bytes"""
+        size = sum(t.element_size() * t.nelement() for pair in value for t in pair)
+        if self.max_bytes <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self.total_bytes -= self._sizes.pop(key)
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._sizes[key] = size
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                old_key, _ = self._data.popitem(last=False)
+                self.total_bytes -= self._sizes.pop(old_key)
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+
+    @contextmanager
+    def bind(self, digests: List[str]):
+        """Bind image digests for the rows of the next forward pass"""
+        self._local.batch = digests
+        try:
+            yield
+        finally:
+            self._local.batch = None
+
+    def current_batch(self) -> Optional[List[str]]:
+        """Return the image digests bound on this thread, if any"""
+        return getattr(self._local, "batch", None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size and hit/miss statistics"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "memory_mb": round(self.total_bytes / (1024 * 1024), 1),
+                "max_memory_mb": round(self.max_bytes / (1024 * 1024), 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
+
+
+class CachedVisionBackbone(torch.nn.Module):
+    """
+    Drop-in wrapper around the Grounding DINO image backbone (conv encoder) that
+    serves cached feature maps for images seen before and only runs the missing rows.
+    Position embeddings, the fusion encoder and the decoder still run on every call.
+    """
+
+    def __init__(self, encoder: torch.nn.Module, cache: VisionFeatureCache):
+        super().__init__()
+        self.encoder = encoder
+        self.cache = cache
+
+    def forward(self, pixel_values, pixel_mask):
+        digests = self.cache.current_batch()
+        if digests is None or len(digests) != pixel_values.shape[0]:
+            return self.encoder(pixel_values, pixel_mask)
+
+        shape = tuple(pixel_values.shape[-2:])
+        keys = [(digest, shape, str(pixel_values.dtype)) for digest in digests]
+        rows = [self.cache.get(key) for key in keys]
+        missing = [i for i, row in enumerate(rows) if row is None]
+
+        if missing:
+            # Rows repeating an image (e.g. label chunks of one query) share one encoder pass
+            first_rows = {}
+            for i in missing:
+                first_rows.setdefault(keys[i], i)
+            unique = list(first_rows.values())
+
+            index = torch.tensor(unique, device=pixel_values.device)
+            features = self.encoder(pixel_values.index_select(0, index), pixel_mask.index_select(0, index))
+            for j, i in enumerate(unique):
+                rows[i] = [(feature_map[j].detach(), mask[j]) for feature_map, mask in features]
+                self.cache.put(keys[i], rows[i])
+            for i in missing:
+                rows[i] = rows[first_rows[keys[i]]]
+
+            # Nothing cached or repeated in this batch - return the encoder output untouched
+            if len(unique) == len(keys):
+                return features
+
+        # Reassemble each feature level from per-row tensors
+        return [
+            (torch.stack([row[level][0] for row in rows]), torch.stack([row[level][1] for row in rows]))
+            for level in range(len(rows[0]))
+        ]
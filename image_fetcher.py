@@ -0,0 +1,338 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Image fetch configuration
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", os.path.join("cache", "images"))
+IMAGE_CACHE_MAX_MB = int(os.getenv("IMAGE_CACHE_MAX_MB", "1024"))
+# Freshness for responses without Cache-Control max-age or Expires (0 = always revalidate)
+IMAGE_CACHE_FRESH_SECONDS = float(os.getenv("IMAGE_CACHE_FRESH_SECONDS", "0"))
+IMAGE_FETCH_MAX_MB = float(os.getenv("IMAGE_FETCH_MAX_MB", "25"))
+IMAGE_FETCH_TIMEOUT = float(os.getenv("IMAGE_FETCH_TIMEOUT", "30"))
+IMAGE_FETCH_POOL_SIZE = int(os.getenv("IMAGE_FETCH_POOL_SIZE", "16"))
+
+
+class ImageTooLargeError(ValueError):
+    """Raised when a remote image exceeds the configured size limit"""
+    pass
+
+
+class ImageFetcher:
+    """
+    Pooled HTTP image fetcher with a content-addressed on-disk cache.
+
+    A single requests.Session keeps TCP/TLS connections alive across requests.
+    Downloaded bodies are stored under their SHA-256 digest, and a small metadata
+    file per URL records the digest plus ETag/Last-Modified validators. Only
+    responses with a validator and without ``Cache-Control: no-store`` are cached.
+    Entries are served without a request while they are fresh according to the
+    response's ``Cache-Control: max-age`` or ``Expires`` (``no-cache`` means never;
+    ``fresh_seconds`` applies when the server says nothing, 0 by default), and
+    revalidated with a conditional GET otherwise, so fixed-URL snapshots are never
+    served stale. The cache is bounded by ``max_cache_bytes``
+    with least-recently-used eviction and is safe to share between processes.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = IMAGE_CACHE_DIR,
+                 max_cache_bytes: int = IMAGE_CACHE_MAX_MB * 1024 * 1024,
+                 fresh_seconds: float = IMAGE_CACHE_FRESH_SECONDS,
+                 max_image_bytes: int = int(IMAGE_FETCH_MAX_MB * 1024 * 1024),
+                 timeout: float = IMAGE_FETCH_TIMEOUT,
+                 pool_size: int = IMAGE_FETCH_POOL_SIZE):
+        """
+        Initialize the fetcher
+
+        Args:
+            cache_dir: Directory for cached images (None disables the disk cache)
+            max_cache_bytes: Maximum total size of cached image bodies
+            fresh_seconds: Freshness lifetime for responses without caching headers
+            max_image_bytes: Maximum size of a single downloaded image
+            timeout: Connect/read timeout in seconds
+            pool_size: Maximum pooled connections per host
+        """
+        self.cache_dir = cache_dir or None
+        self.max_cache_bytes = max_cache_bytes
+        self.fresh_seconds = fresh_seconds
+        self.max_image_bytes = max_image_bytes
+        self.timeout = timeout
+        self.pool_size = pool_size
+
+        self._session = None
+        self._session_pid = None
+        self._session_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        # Statistics
+        self.fresh_hits = 0
+        self.revalidated_hits = 0
+        self.downloads = 0
+        self.bytes_downloaded = 0
+        self.errors = 0
+
+    def _get_session(self) -> requests.Session:
+        """Return this process's pooled session, recreating it after a fork"""
+        pid = os.getpid()
+        with self._session_lock:
+            if self._session is None or self._session_pid != pid:
+                session = requests.Session()
+                retries = Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504),
+                                allowed_methods=("GET",))
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size,
+                                      max_retries=retries)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update({"User-Agent": "DynamicGroundingDINO/2.1"})
+                self._session, self._session_pid = session, pid
+            return self._session
+
+    def _count(self, field: str, amount: int = 1):
+        with self._stats_lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    # --- HTTP caching semantics -------------------------------------------
+
+    @staticmethod
+    def _cache_control(headers) -> Dict[str, Optional[str]]:
+        """Parse Cache-Control into lowercase directive -> value"""
+        directives = {}
+        for part in headers.get("Cache-Control", "").split(","):
+            name, _, value = part.strip().partition("=")
+            if name:
+                directives[name.lower()] = value.strip('"') or None
+        return directives
+
+    def _is_storable(self, headers) -> bool:
+        """Only responses that can be revalidated and allow storage are cached"""
+        if "no-store" in self._cache_control(headers):
+            return False
+        return bool(headers.get("ETag") or headers.get("Last-Modified"))
+
+    def _freshness_lifetime(self, headers) -> float:
+        """Seconds a response may be served without revalidation"""
+        directives = self._cache_control(headers)
+        if "no-cache" in directives:
+            return 0.0
+        max_age = directives.get("max-age")
+        if max_age is not None:
+            try:
+                return max(0.0, float(max_age))
+            except ValueError:
+                return 0.0
+        if headers.get("Expires"):
+            try:
+                expires = parsedate_to_datetime(headers["Expires"])
+                date = parsedate_to_datetime(headers["Date"]) if headers.get("Date") else None
+                now = date.timestamp() if date is not None else time.time()
+                return max(0.0, expires.timestamp() - now)
+            except (TypeError, ValueError, IndexError):
+                # Invalid Expires values (e.g. "0") mean already expired
+                return 0.0
+        return self.fresh_seconds
+
+    # --- disk cache -------------------------------------------------------
+
+    def _meta_path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, "meta", hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "blobs", digest)
+
+    @staticmethod
+    def _atomic_write(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _read_cached(self, url: str):
+        """Return (metadata, body) for a cached URL, or (None, None)"""
+        if self.cache_dir is None:
+            return None, None
+        try:
+            with open(self._meta_path(url)) as f:
+                metadata = json.load(f)
+            blob_path = self._blob_path(metadata["sha256"])
+            with open(blob_path, "rb") as f:
+                body = f.read()
+            os.utime(blob_path)
+            return metadata, body
+        except (FileNotFoundError, ValueError, KeyError):
+            return None, None
+
+    def _store(self, url: str, body: bytes, headers: Dict[str, str]) -> str:
+        """Store a downloaded body and its validators; returns the content digest"""
+        digest = hashlib.sha256(body).hexdigest()
+        if self.cache_dir is None:
+            return digest
+        if not self._is_storable(headers):
+            self._forget(url)
+            return digest
+
+        try:
+            blob_path = self._blob_path(digest)
+            if not os.path.exists(blob_path):
+                self._atomic_write(blob_path, body)
+            else:
+                os.utime(blob_path)
+            self._write_metadata(url, digest, headers.get("ETag"), headers.get("Last-Modified"),
+                                 self._freshness_lifetime(headers))
+            self._evict()
+        except OSError as e:
+            logger.warning(f"Failed to cache image from {url}: {e}")
+        return digest
+
+    def _write_metadata(self, url: str, digest: str, etag: Optional[str], last_modified: Optional[str],
+                        max_age: float = 0.0):
+        metadata = {
+            "url": url,
+            "sha256": digest,
+            "etag": etag,
+            "last_modified": last_modified,
+            "max_age": max_age,
+            "fetched_at": time.time()
+        }
+        self._atomic_write(self._meta_path(url), json.dumps(metadata).encode("utf-8"))
+
+    def _forget(self, url: str):
+        """Drop the metadata of a URL whose latest response must not be cached"""
+        try:
+            os.remove(self._meta_path(url))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Delete least recently used blobs until the cache fits in max_cache_bytes"""
+        blob_dir = os.path.join(self.cache_dir, "blobs")
+        try:
+            blobs = []
+            total = 0
+            with os.scandir(blob_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".tmp"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    blobs.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        except FileNotFoundError:
+            return
+
+        if total <= self.max_cache_bytes:
+            return
+
+        # Metadata pointing at an evicted blob is treated as a miss on the next read
+        for _, size, path in sorted(blobs):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.max_cache_bytes:
+                break
+
+    # --- fetching ---------------------------------------------------------
+
+    def _download(self, response: requests.Response) -> bytes:
+        """Read a streamed response body, enforcing max_image_bytes while streaming"""
+        content_length = response.headers.get("Content-Length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_image_bytes:
+            raise ImageTooLargeError(
+                f"Image is {int(content_length)} bytes, limit is {self.max_image_bytes} bytes"
+            )
+
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            size += len(chunk)
+            if size > self.max_image_bytes:
+                raise ImageTooLargeError(f"Image exceeds the {self.max_image_bytes} byte limit")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def fetch(self, url: str) -> bytes:
+        """
+        Fetch image bytes for a URL, using the cache when possible
+
+        Args:
+            url: HTTP(S) URL of the image
+
+        Returns:
+            Raw image bytes
+
+        Raises:
+            ImageTooLargeError: If the image exceeds max_image_bytes
+            requests.RequestException: On network or HTTP errors
+        """
+        metadata, cached_body = self._read_cached(url)
+        if metadata is not None and time.time() - metadata.get("fetched_at", 0) < metadata.get("max_age", 0):
+            self._count("fresh_hits")
+            return cached_body
+
+        headers = {}
+        if metadata is not None:
+            if metadata.get("etag"):
+                headers["If-None-Match"] = metadata["etag"]
+            if metadata.get("last_modified"):
+                headers["If-Modified-Since"] = metadata["last_modified"]
+
+        try:
+            with self._get_session().get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                if response.status_code == 304 and metadata is not None:
+                    self._count("revalidated_hits")
+                    try:
+                        if "no-store" in self._cache_control(response.headers):
+                            self._forget(url)
+                        else:
+                            self._write_metadata(
+                                url, metadata["sha256"],
+                                response.headers.get("ETag", metadata.get("etag")),
+                                response.headers.get("Last-Modified", metadata.get("last_modified")),
+                                self._freshness_lifetime(response.headers)
+                            )
+                    except OSError:
+                        pass
+                    return cached_body
+
+                response.raise_for_status()
+                body = self._download(response)
+        except Exception:
+            self._count("errors")
+            raise
+
+        self._count("downloads")
+        self._count("bytes_downloaded", len(body))
+        self._store(url, body, response.headers)
+        return body
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache and download statistics"""
+        with self._stats_lock:
+            hits = self.fresh_hits + self.revalidated_hits
+            total = hits + self.downloads
+            return {
+                "cache_dir": self.cache_dir,
+                "fresh_hits": self.fresh_hits,
+                "revalidated_hits": self.revalidated_hits,
+                "downloads": self.downloads,
+                "bytes_downloaded": self.bytes_downloaded,
+                "errors": self.errors,
+                "hit_rate": round(hits / total, 4) if total else 0.0
+            }
+
+
+# Shared fetcher used by the API workers and the queue consumer
+image_fetcher = ImageFetcher()
@@ -0,0 +1,144 @@
+import asyncio
+import functools
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceQueueFullError(Exception):
+    """Raised when the inference executor cannot admit more work"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """
+    Dedicated thread pool for blocking model calls with bounded admission.
+
+    Blocking inference (detection, video processing) runs on these threads so the
+    asyncio event loop stays free for light endpoints. At most ``max_pending``
+    requests may be admitted (running or waiting) at a time; beyond that callers
+    get an InferenceQueueFullError carrying a Retry-After estimate. Batched jobs
+    record each request's share of the batch duration, so the estimate stays per
+    admitted request.
+    """
+
+    def __init__(self, max_workers: int = 1, max_pending: int = 32, stats_window: int = 200):
+        """
+        Initialize the executor
+
+        Args:
+            max_workers: Number of threads running blocking inference
+            max_pending: Maximum admitted requests (running plus queued)
+            stats_window: Number of recent job durations kept for Retry-After estimates
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(1, max_pending)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._durations = deque(maxlen=stats_window)
+
+        # Statistics
+        self._admitted = 0
+        self._rejected = 0
+        self._completed = 0
+
+    def _try_acquire(self) -> bool:
+        """Reserve an admission slot"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                return False
+            self._pending += 1
+            self._admitted += 1
+            return True
+
+    def _release(self):
+        """Release an admission slot"""
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    def estimate_retry_after(self) -> int:
+        """Estimate seconds until a slot frees up, from recent job durations"""
+        with self._lock:
+            durations = list(self._durations)
+            pending = self._pending
+        avg = sum(durations) / len(durations) if durations else 1.0
+        return max(1, int(math.ceil(avg * pending / self.max_workers)))
+
+    @asynccontextmanager
+    async def admission(self):
+        """
+        Hold an admission slot for the duration of a request
+
+        Raises:
+            InferenceQueueFullError: If max_pending requests are already admitted
+        """
+        if not self._try_acquire():
+            raise InferenceQueueFullError(
+                f"Inference queue is full ({self.max_pending} pending requests)",
+                retry_after=self.estimate_retry_after()
+            )
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _timed(self, fn: Callable, *args, jobs: int = 1, **kwargs) -> Any:
+        """Run fn and record its duration, split evenly over the jobs it served"""
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            duration = (time.perf_counter() - started) / max(1, jobs)
+            with self._lock:
+                self._durations.extend([duration] * max(1, jobs))
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking function on the inference threads (caller handles admission)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(self._timed, fn, *args, **kwargs)
+        )
+
+    async def run_batch(self, fn: Callable[[List[Any]], Any], items: List[Any]) -> Any:
+        """Run a blocking function over a batch of already admitted requests on the inference threads"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(self._timed, fn, items, jobs=len(items))
+        )
+
+    async def submit(self, fn: Callable, *args, **kwargs) -> Any:
+        """Admit and run a blocking function on the inference threads"""
+        async with self.admission():
+            return await self.run(fn, *args, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get admission and latency statistics"""
+        with self._lock:
+            durations = list(self._durations)
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "completed": self._completed,
+                "avg_job_seconds": round(sum(durations) / len(durations), 3) if durations else None
+            }
+
+    def shutdown(self):
+        """Stop accepting work and release the threads"""
+        self.executor.shutdown(wait=False)
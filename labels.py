@@ -0,0 +1,107 @@
+import re
+from typing import Dict, List, Optional
+
+
+def detect_script(text: str) -> Optional[str]:
+    """
+    Classify a label by Unicode script without running langdetect.
+
+    Returns:
+        'en' for ASCII/Latin-only text, 'th' for Thai-only text,
+        or None for mixed/other scripts that need full language detection
+    """
+    if text.isascii():
+        return 'en'
+
+    has_thai = has_latin = has_other = False
+    for char in text:
+        if '\u0e00' <= char <= '\u0e7f':
+            has_thai = True
+        elif char.isalpha():
+            if char < '\u0250':
+                has_latin = True
+            else:
+                has_other = True
+
+    if has_thai and not (has_latin or has_other):
+        return 'th'
+    if not (has_thai or has_other):
+        return 'en'
+    return None
+
+
+def clean_and_format_label(label: str) -> str:
+    label = label.strip()
+    label = re.sub(r'\s+', ' ', label)
+    return label.title().replace(" ", "-").replace(".", "")
+
+
+def normalize_label_thresholds(thresholds: Optional[Dict[str, float]]) -> Dict[str, float]:
+    """Key a per-label threshold map by clean_and_format_label, the form detections carry"""
+    return {clean_and_format_label(str(label)): float(value) for label, value in (thresholds or {}).items()}
+
+
+def label_prompt(labels: List[str]) -> str:
+    """Prompt the Grounding DINO processor tokenizes for candidate labels (lowercased, each followed by a dot)"""
+    return ". ".join(label.strip().lower() for label in labels) + "."
+
+
+def search_box_threshold(box_threshold: float, label_thresholds: Optional[Dict[str, float]]) -> float:
+    """Box threshold for the single inference pass: the lowest of the default and per-query thresholds"""
+    if not label_thresholds:
+        return box_threshold
+    return min(box_threshold, *label_thresholds.values())
+
+
+def resolve_label_thresholds(queries: List[str], query_labels: List[str], box_threshold: float,
+                             label_thresholds: Optional[Dict[str, float]],
+                             default_thresholds: Optional[Dict[str, float]] = None) -> Optional[Dict[str, float]]:
+    """
+    Map per-query thresholds onto the processed labels the detections carry
+
+    Keys (already normalized by normalize_label_thresholds) may be the original
+    queries (e.g. Thai) or the processed labels. Queries without an entry keep
+    box_threshold (or a higher default threshold), since the inference pass ran
+    at the lowest threshold.
+    """
+    if not label_thresholds:
+        return None
+
+    default_thresholds = default_thresholds or {}
+    resolved = {}
+    for query, label in zip(queries, query_labels):
+        threshold = label_thresholds.get(clean_and_format_label(query), label_thresholds.get(label))
+        if threshold is None:
+            threshold = max(box_threshold, default_thresholds.get(label, 0.0))
+        resolved[label] = threshold
+    return resolved
+
+
+def pack_labels(labels: List[str], token_counts: List[int], budget: int) -> List[List[str]]:
+    """
+    Greedily pack labels, in order, into groups whose token counts fit a budget
+
+    Repeated labels are packed once: groups run as separate prompts whose results are
+    concatenated, so a label in two groups would be detected twice. A label over the
+    budget on its own still gets a group.
+
+    Args:
+        labels: Labels in query order
+        token_counts: Tokens each label costs, including its separator
+        budget: Tokens available per group
+
+    Returns:
+        List of label groups (a single group when everything fits)
+    """
+    chunks, current, used, seen = [], [], 0, set()
+    for label, count in zip(labels, token_counts):
+        if label in seen:
+            continue
+        seen.add(label)
+        if current and used + count > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(label)
+        used += count
+    chunks.append(current)
+    return chunks
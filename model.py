@@ -5,81 +5,59 @@ import torch
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 import numpy as np
-from PIL import Image
+from PIL import Image, ImageDraw, ImageFont
 from transformers import AutoProcessor, AutoModelForZeroShotObjectDetection
 from transformers.image_utils import load_image
 from rapidfuzz import fuzz, process
-from langdetect import detect
-from aift import setting
-from aift.nlp import text_cleansing, text_sum
-from aift.nlp.translation import th2en
+from caches import LRUCache, ResultCache
+from feature_cache import CachedTextBackbone, CachedVisionBackbone, TextFeatureCache, VisionFeatureCache
+from image_fetcher import image_fetcher
+from labels import (clean_and_format_label, label_prompt, normalize_label_thresholds, pack_labels,
+                    resolve_label_thresholds, search_box_threshold)
+from onnx_backend import OnnxDetectionBackend
+from postprocessing import merge_detections, refine_detections
+from profile_store import DetectorProfile, profile_store
+from tiling import run_in_batches, tile_grid
+from translation import lookup_cached_translations, process_and_translate_list
+from visualization_store import VisualizationStore
 import os
 from urllib.parse import urlparse
 import io
 import base64
+import threading
+import time
+import json
+import functools
+import hashlib
+from contextlib import contextmanager, nullcontext
 from typing import List, Dict, Any, Union, Tuple, Optional
 
 # ============================================
 # === UTILS ===
 # ============================================
-setting.set_api_key('KIeFbAUzBG4A3Zrvo9gp1fV6bTwICIAG')
 
-def process_and_translate_list(items_to_check):
-    """
-    Detects language of items in a list and translates Thai items to English using aift.
+_WHITESPACE_RE = re.compile(r'\s+')
 
-    Args:
-        items_to_check (list): A list of strings to process.
 
-    Returns:
-        list: A new list with Thai items translated to English.
+def match_labels_fuzzy(detected_labels, reference_labels, threshold=70):
     """
-    processed_items = []
-    for item in items_to_check:
-        if len(item) > 10000:
-            item = text_sum.summarize(item)
-        try:
-            detected_language = detect(item)
-            if detected_language == 'th':
-                try:
-                    # Assuming API key is set globally or handled by setting.set_api_key
-                    cleaned_text = text_cleansing.clean(item)['cleansing_text']
-                    translated_item = th2en.translate(cleaned_text)['translated_text']
-                    processed_items.append(translated_item)
-                except Exception as e:
-                    # print(f"Error during aift translation of '{item}': {e}") # Removed print
-                    processed_items.append(item) # Append original item on translation error
-            else:
-                processed_items.append(item)
-        except Exception as e:
-            # print(f"Error during language detection for '{item}': {e}") # Removed print
-            processed_items.append(item) # Append original item in case of detection error
+    Map each detected label to its closest reference label.
 
-    return processed_items
+    Unique detected labels are normalized once and scored against all reference
+    labels in a single rapidfuzz cdist matrix; the per-call memo then maps every
+    detection (including repeats) to its best match.
+    """
+    if len(detected_labels) == 0 or len(reference_labels) == 0:
+        return list(detected_labels)
 
-def clean_and_format_label(label: str) -> str:
-    label = label.strip()
-    label = re.sub(r'\s+', ' ', label)
-    return label.title().replace(" ", "-").replace(".", "")
+    unique_labels = list(dict.fromkeys(detected_labels))
+    normalized = [_WHITESPACE_RE.sub(' ', label.strip()).title() for label in unique_labels]
 
+    scores = process.cdist(normalized, reference_labels, scorer=fuzz.token_sort_ratio)
+    best_indices = scores.argmax(axis=1)
 
-def match_labels_fuzzy(detected_labels, reference_labels, threshold=70):
-    final_labels = []
-    for detected in detected_labels:
-        detected_clean = detected.strip()
-        detected_clean = re.sub(r'\s+', ' ', detected_clean)
-        detected_clean = detected_clean.title()
-
-        best_match, score, _ = process.extractOne(
-            detected_clean,
-            reference_labels,
-            scorer=fuzz.token_sort_ratio
-        )
-        
-        final_labels.append(best_match)
-
-    print(final_labels)
-    return final_labels
+    matches = {label: reference_labels[index] for label, index in zip(unique_labels, best_indices)}
+    return [matches[label] for label in detected_labels]
 
 
 def generate_colors(labels):
@@ -89,20 +67,103 @@ def generate_colors(labels):
     return colors
 
 
+
+# Maximum image dimension for CPU processing
+CPU_MAX_IMAGE_SIZE = 1024
+
+# "fp32" (default), "bf16" (bfloat16 autocast) or "int8" (dynamic int8 Linear layers + bf16 autocast)
+MODEL_PRECISIONS = ("fp32", "bf16", "int8")
+MODEL_PRECISION = os.getenv("MODEL_PRECISION", "fp32").lower()
+
+# "torch" (default) or "onnx" (exported once and run through ONNX Runtime)
+INFERENCE_BACKENDS = ("torch", "onnx")
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch").lower()
+
+# Optional torch.compile of the PyTorch forward pass
+TORCH_COMPILE = os.getenv("TORCH_COMPILE", "false").lower() == "true"
+TORCH_COMPILE_MODE = os.getenv("TORCH_COMPILE_MODE", "default")
+
+# Optional detection filtering applied after post-processing, off by default (request parameters override these).
+# Tiled and chunked passes merge their own duplicates, so these only trim the final detections.
+DETECTION_NMS_IOU = float(os.getenv("DETECTION_NMS_IOU", "0"))   # <= 0 disables NMS, e.g. 0.5 to enable
+MAX_DETECTIONS = int(os.getenv("MAX_DETECTIONS", "0"))            # <= 0 keeps all, e.g. 100
+MIN_BOX_AREA = float(os.getenv("MIN_BOX_AREA", "0"))
+# Default minimum score per (English) label, e.g. {"person": 0.5, "spark": 0.2}
+LABEL_THRESHOLDS = normalize_label_thresholds(json.loads(os.getenv("LABEL_THRESHOLDS", "{}") or "{}"))
+
+# Tiled high-resolution detection: overlapping tiles plus one downscaled global view,
+# run as one batched forward pass and merged per label
+TILE_SIZE = int(os.getenv("TILE_SIZE", "800"))
+TILE_OVERLAP = int(os.getenv("TILE_OVERLAP", "160"))
+# Views per forward pass; 0 runs all of them in one pass, halving on out-of-memory errors
+TILE_BATCH_SIZE = int(os.getenv("TILE_BATCH_SIZE", "0"))
+TILE_MERGE_METHOD = os.getenv("TILE_MERGE_METHOD", "wbf").lower()
+TILE_MERGE_IOU = float(os.getenv("TILE_MERGE_IOU", "0.5"))
+# Largest image dimension processed in tiled mode; bounds the tile count (16 tiles at the defaults)
+TILED_MAX_IMAGE_SIZE = int(os.getenv("TILED_MAX_IMAGE_SIZE", "2400"))
+
+# Long label lists are split into chunks that fit the text encoder's token limit and run
+# as extra rows of the same forward pass (0 uses the model's max_text_len)
+QUERY_CHUNK_MAX_TOKENS = int(os.getenv("QUERY_CHUNK_MAX_TOKENS", "0"))
+
+# Startup warmup: synthetic images (WxH) and label-set sizes covering the common shape buckets
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+WARMUP_IMAGE_SIZES = os.getenv("WARMUP_IMAGE_SIZES", "1024x768,768x1024")
+WARMUP_LABEL_COUNTS = os.getenv("WARMUP_LABEL_COUNTS", "1,8")
+WARMUP_BATCH_SIZES = os.getenv("WARMUP_BATCH_SIZES", "1")
+WARMUP_LABELS = [
+    "person", "car", "dog", "cat", "chair", "bottle", "bicycle", "bus",
+    "traffic light", "backpack", "cell phone", "laptop", "cup", "truck", "bird", "umbrella"
+]
+
+
+def cpu_supports_bf16() -> bool:
+    """Check whether the CPU has native bfloat16 instructions (AVX512-BF16 or AMX)"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+VISUALIZATION_FORMATS = ("png", "jpeg", "webp")
+# "pil" draws directly on the image; "matplotlib" keeps the legacy figure renderer
+VISUALIZATION_RENDERER = os.getenv("VISUALIZATION_RENDERER", "pil").lower()
+# "inline" embeds base64 in the response; "deferred" (opt-in) returns a visualization id rendered on first GET
+VISUALIZATION_MODE = os.getenv("VISUALIZATION_MODE", "inline").lower()
+
+
+
+
 class DynamicGroundingDINO:
     """
     Grounding DINO model for zero-shot object detection with text queries.
     Updated with Thai language support and fuzzy matching.
     """
 
-    def __init__(self, model_id: str = "rziga/mm_grounding_dino_large_all", device: str = "auto"):
+    def __init__(self, model_id: str = "rziga/mm_grounding_dino_large_all", device: str = "auto",
+                 text_cache_size: int = int(os.getenv("TEXT_FEATURE_CACHE_SIZE", "256")),
+                 vision_cache_mb: int = int(os.getenv("VISION_FEATURE_CACHE_MB", "512")),
+                 precision: str = MODEL_PRECISION,
+                 backend: str = INFERENCE_BACKEND,
+                 compile_model: bool = TORCH_COMPILE):
         """
         Initialize the Grounding DINO model
 
         Args:
             model_id: Model identifier from HuggingFace
             device: Device to run on ("cuda", "cpu", or "auto")
+            text_cache_size: Maximum number of cached text-encoder outputs (0 disables the cache)
+            vision_cache_mb: Memory budget for cached image-backbone features (0 disables the cache)
+            precision: "fp32", "bf16" or "int8" (reduced precisions apply on CPU only)
+            backend: "torch" or "onnx" (ONNX Runtime with a cached export)
+            compile_model: Run the PyTorch forward pass through torch.compile
         """
+        self._stage_timings = threading.local()
+        self.model_id = model_id
+        self._compiled_model = None
+        self.warmup_stats: Optional[Dict[str, Any]] = None
+
         if device == "auto":
             self.device = "cuda" if torch.cuda.is_available() else "cpu"
         else:
@@ -145,19 +206,295 @@ class DynamicGroundingDINO:
                 self.model = self.model.to(self.device)
                 # Set model to eval mode for CPU inference
                 self.model.eval()
+
+            self.max_text_tokens = QUERY_CHUNK_MAX_TOKENS or getattr(self.model.config, "max_text_len", 256)
+
+            if backend not in INFERENCE_BACKENDS:
+                raise ValueError(f"Unsupported backend '{backend}'. Use one of: {', '.join(INFERENCE_BACKENDS)}")
+            self.onnx_backend = None
+            if backend == "onnx":
+                self._init_onnx_backend()
+
+            if self.onnx_backend is not None and (precision or "fp32").lower() != "fp32":
+                print(f"Precision '{precision}' applies to the PyTorch backend only - ONNX runs fp32")
+                precision = "fp32"
+            self._apply_precision(precision)
                 
+            self.visualization_store = VisualizationStore(
+                directory=os.getenv("VISUALIZATION_STORE_DIR", os.path.join("cache", "visualizations")),
+                max_bytes=int(os.getenv("VISUALIZATION_STORE_MAX_MB", "512")) * 1024 * 1024
+            )
+
+            self.result_cache = ResultCache(
+                max_size=int(os.getenv("RESULT_CACHE_SIZE", "256")),
+                db_path=os.getenv("RESULT_CACHE_PATH", os.path.join("cache", "results.db")),
+                ttl=float(os.getenv("RESULT_CACHE_TTL_SECONDS", "300")),
+                max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+            )
+
+            self.text_feature_cache = TextFeatureCache(max_size=text_cache_size)
+            self._install_text_feature_cache()
+
+            # Registered detector profiles: chunking and token ids keyed by label tuples
+            self.profile_store = profile_store
+            self._profile_chunks = LRUCache(max_size=1024)
+            self._profile_tokens = LRUCache(max_size=1024)
+
+            self.vision_feature_cache = VisionFeatureCache(max_bytes=vision_cache_mb * 1024 * 1024)
+            self._install_vision_feature_cache()
+
+            if compile_model:
+                self._apply_torch_compile()
+
             print("Model loaded successfully!")
             
         except Exception as e:
             print(f"Error loading model: {e}")
             raise e
 
-    def load_image(self, image_source: Union[str, Image.Image]) -> Image.Image:
+    def _apply_torch_compile(self):
+        """Compile the PyTorch model; compilation itself happens lazily on the first (warmup) calls"""
+        if self.onnx_backend is not None:
+            print("torch.compile applies to the PyTorch backend only - skipped for ONNX")
+            return
+        if not hasattr(torch, "compile"):
+            print("torch.compile requires PyTorch 2.0 or newer - running eagerly")
+            return
+
+        try:
+            # dynamic=True avoids recompiling for every image size and label count
+            self._compiled_model = torch.compile(self.model, mode=TORCH_COMPILE_MODE, dynamic=True)
+            print(f"torch.compile enabled (mode={TORCH_COMPILE_MODE})")
+        except Exception as e:
+            print(f"torch.compile failed, running eagerly: {e}")
+
+    @property
+    def is_compiled(self) -> bool:
+        return self._compiled_model is not None
+
+    @property
+    def is_warmed_up(self) -> bool:
+        return self.warmup_stats is not None
+
+    def warmup(self, image_sizes: Union[str, List[Tuple[int, int]]] = WARMUP_IMAGE_SIZES,
+               label_counts: Union[str, List[int]] = WARMUP_LABEL_COUNTS,
+               batch_sizes: Union[str, List[int]] = WARMUP_BATCH_SIZES) -> Dict[str, Any]:
+        """
+        Run synthetic requests through the common shape buckets
+
+        This absorbs lazy initialization, allocator growth and torch.compile
+        compilation before real traffic arrives. The result, text and vision
+        caches are bypassed so nothing synthetic is cached.
+
+        Args:
+            image_sizes: Image sizes as [(width, height)] or a "WxH,WxH" string
+            label_counts: Numbers of labels per request as a list or "1,8" string
+            batch_sizes: Batch sizes as a list or "1,4" string
+
+        Returns:
+            Dictionary with per-bucket and total warmup times in milliseconds
+        """
+        if isinstance(image_sizes, str):
+            image_sizes = [tuple(int(v) for v in size.lower().split("x")) for size in image_sizes.split(",") if size.strip()]
+        if isinstance(label_counts, str):
+            label_counts = [int(v) for v in label_counts.split(",") if v.strip()]
+        if isinstance(batch_sizes, str):
+            batch_sizes = [int(v) for v in batch_sizes.split(",") if v.strip()]
+
+        print(f"Warming up on {len(image_sizes)} image sizes x {len(label_counts)} label counts "
+              f"x {len(batch_sizes)} batch sizes...")
+        started = time.perf_counter()
+        buckets = []
+        for width, height in image_sizes:
+            # Synthetic images go through the same CPU downscale as real ones
+            image = self._decode_image(Image.new("RGB", (width, height), (124, 116, 104)))
+            for count in label_counts:
+                labels = [WARMUP_LABELS[i % len(WARMUP_LABELS)] for i in range(max(1, count))]
+                for batch_size in batch_sizes:
+                    bucket_started = time.perf_counter()
+                    images = [image] * max(1, batch_size)
+                    text_labels = [labels] * len(images)
+                    inputs = self._prepare_inputs(images, text_labels)
+                    outputs = self._run_inference(inputs)
+                    self._post_process(outputs, images, text_labels,
+                                       [0.35] * len(images), [0.35] * len(images))
+                    buckets.append({
+                        "image_size": f"{width}x{height}",
+                        "labels": len(labels),
+                        "batch_size": len(images),
+                        "ms": round((time.perf_counter() - bucket_started) * 1000, 1)
+                    })
+
+        self.warmup_stats = {
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+            "compiled": self.is_compiled,
+            "buckets": buckets
+        }
+        print(f"Warmup finished in {self.warmup_stats['total_ms'] / 1000:.1f}s")
+        return self.warmup_stats
+
+    def _init_onnx_backend(self):
+        """
+        Export (once) and load the ONNX Runtime backend, falling back to PyTorch on failure
+
+        The export is traced on one image with a two-label prompt; before it is used it
+        must match PyTorch on a batch of two images with different phrase structures.
+        """
+        try:
+            onnx_backend = OnnxDetectionBackend(self.model_id, device=self.device)
+            sample_inputs = self._prepare_inputs([Image.new("RGB", (640, 480))], [["person", "car"]])
+            onnx_backend.prepare(self.model, sample_inputs)
+
+            parity_images = [Image.linear_gradient("L").convert("RGB").resize((800, 600)),
+                             Image.radial_gradient("L").convert("RGB").resize((512, 640))]
+            parity_inputs = self._prepare_inputs(
+                parity_images, [["traffic light", "dog", "red shoe"], ["bicycle wheel"]]
+            )
+            onnx_backend.check_parity(self.model.eval(), parity_inputs)
+            self.onnx_backend = onnx_backend
+            print("Using ONNX Runtime inference backend")
+        except Exception as e:
+            print(f"ONNX backend unavailable, falling back to PyTorch: {e}")
+
+    @property
+    def backend(self) -> str:
+        """Name of the active inference backend"""
+        return "onnx" if self.onnx_backend is not None else "torch"
+
+    def get_onnx_backend_stats(self) -> Optional[Dict[str, Any]]:
+        """Get ONNX Runtime session details, or None when the PyTorch backend is active"""
+        return self.onnx_backend.get_stats() if self.onnx_backend is not None else None
+
+    def _apply_precision(self, precision: str):
+        """
+        Configure reduced-precision CPU inference
+
+        "int8" replaces the Linear layers with dynamically quantized int8 versions;
+        "int8" and "bf16" both run the forward pass under bfloat16 autocast when the
+        CPU supports it natively.
+
+        Args:
+            precision: "fp32", "bf16" or "int8"
+        """
+        precision = (precision or "fp32").lower()
+        if precision not in MODEL_PRECISIONS:
+            raise ValueError(f"Unsupported precision '{precision}'. Use one of: {', '.join(MODEL_PRECISIONS)}")
+
+        self.precision = "fp32"
+        self.autocast_dtype = None
+        if precision == "fp32":
+            return
+
+        if self.device != "cpu":
+            print(f"Precision '{precision}' is only supported on CPU - running fp32 on {self.device}")
+            return
+
+        if precision == "int8":
+            torch.ao.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+            )
+            self.precision = "int8"
+            print("Applied dynamic int8 quantization to Linear layers")
+
+        if cpu_supports_bf16():
+            self.autocast_dtype = torch.bfloat16
+            self.precision = precision
+            print("bfloat16 autocast enabled")
+        else:
+            print("CPU has no native bfloat16 support - bfloat16 autocast disabled")
+
+    def _install_text_feature_cache(self):
+        """Wrap the text backbone so repeated label lists reuse cached text features"""
+        if self.text_feature_cache.max_size <= 0:
+            print("Text feature cache disabled")
+            return
+
+        base_model = getattr(self.model, "model", None)
+        backbone = getattr(base_model, "text_backbone", None)
+        if backbone is None:
+            print("Text backbone not found - text feature cache disabled")
+            self.text_feature_cache.max_size = 0
+            return
+
+        if not isinstance(backbone, CachedTextBackbone):
+            base_model.text_backbone = CachedTextBackbone(backbone, self.text_feature_cache)
+        print(f"Text feature cache enabled (max {self.text_feature_cache.max_size} label sets)")
+
+    def _install_vision_feature_cache(self):
+        """Wrap the image backbone so follow-up queries on a seen image reuse its feature maps"""
+        if self.vision_feature_cache.max_bytes <= 0:
+            print("Vision feature cache disabled")
+            return
+
+        backbone = getattr(getattr(self.model, "model", None), "backbone", None)
+        encoder = getattr(backbone, "conv_encoder", None)
+        if encoder is None:
+            print("Image backbone not found - vision feature cache disabled")
+            self.vision_feature_cache.max_bytes = 0
+            return
+
+        if not isinstance(encoder, CachedVisionBackbone):
+            backbone.conv_encoder = CachedVisionBackbone(encoder, self.vision_feature_cache)
+        print(f"Vision feature cache enabled (max {self.vision_feature_cache.max_bytes // (1024 * 1024)} MB)")
+
+    def get_text_feature_cache_stats(self) -> Dict[str, Any]:
+        """Get text feature cache statistics"""
+        return self.text_feature_cache.get_stats()
+
+    def get_vision_feature_cache_stats(self) -> Dict[str, Any]:
+        """Get vision feature cache statistics"""
+        return self.vision_feature_cache.get_stats()
+
+    def get_result_cache_stats(self) -> Dict[str, Any]:
+        """Get detection result cache statistics"""
+        return self.result_cache.get_stats()
+
+    @staticmethod
+    def _image_digest(image: Image.Image) -> str:
+        """Hash the decoded pixels of an image together with its size and mode"""
+        digest = hashlib.sha256(f"{image.mode}:{image.width}x{image.height}:".encode("ascii"))
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    def _image_digests(self, images: List[Image.Image],
+                       source_digests: Optional[List[Optional[str]]] = None) -> Optional[List[str]]:
+        """
+        Hash images for the vision feature cache and for result cache keys of sources
+        without a byte digest, or None when neither needs them
+        """
+        needs_result_keys = self.result_cache.enabled and (
+            source_digests is None or any(digest is None for digest in source_digests)
+        )
+        if not needs_result_keys and self.vision_feature_cache.max_bytes <= 0:
+            return None
+        return [self._image_digest(image) for image in images]
+
+    @staticmethod
+    def _source_digest(image_source: Union[str, Image.Image, bytes]) -> Optional[str]:
+        """Hash the encoded bytes of an uploaded or fetched image, or None for other sources"""
+        if isinstance(image_source, bytes):
+            return hashlib.sha256(image_source).hexdigest()
+        return None
+
+    @property
+    def model_key(self) -> str:
+        """Identity of the model configuration that produced a result or feature"""
+        return f"{self.model_id}@{self.backend}-{self.precision}"
+
+    def _result_cache_key(self, image_digest: Optional[str], labels: List[str],
+                          box_threshold: float, text_threshold: float) -> Optional[str]:
+        """Build the result cache key for an image digest, or None when the cache is off"""
+        if image_digest is None or not self.result_cache.enabled:
+            return None
+        return self.result_cache.make_key(image_digest, labels, box_threshold, text_threshold, self.model_key)
+
+    def load_image(self, image_source: Union[str, Image.Image], max_size: Optional[int] = None) -> Image.Image:
         """
         Load image from various sources
 
         Args:
             image_source: Can be URL, local file path, or PIL Image
+            max_size: Maximum image dimension (defaults to CPU_MAX_IMAGE_SIZE on CPU, no limit on GPU)
 
         Returns:
             PIL Image in RGB format
@@ -166,9 +503,9 @@ class DynamicGroundingDINO:
             if self._is_url(image_source):
                 # Load from URL
                 try:
-                    response = requests.get(image_source, stream=True, timeout=30)
-                    response.raise_for_status()
-                    image = Image.open(response.raw)
+                    # Pooled, cached fetch shared with the queue consumer
+                    with self._timed_stage("fetch"):
+                        image = Image.open(io.BytesIO(image_fetcher.fetch(image_source)))
                     print(f"Loaded image from URL: {image_source}")
                 except Exception as e:
                     raise ValueError(f"Failed to load image from URL: {e}")
@@ -202,39 +539,86 @@ class DynamicGroundingDINO:
         else:
             raise ValueError("image_source must be URL, file path, or PIL Image")
 
-        # Convert to RGB if needed
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
+        return self._decode_image(image, max_size)
+
+    def _decode_image(self, image: Image.Image, max_size: Optional[int] = None) -> Image.Image:
+        """
+        Decode an opened image to RGB, downscaling it for CPU processing
+
+        JPEGs are decoded with PIL draft mode, which lets libjpeg apply DCT scaling
+        (1/2, 1/4 or 1/8) so large photos are decoded close to the target size
+        instead of at full resolution; a final LANCZOS resize then hits the exact size.
+
+        Args:
+            image: Opened (possibly not yet loaded) PIL Image
+            max_size: Maximum image dimension (defaults to CPU_MAX_IMAGE_SIZE on CPU, no limit on GPU)
+
+        Returns:
+            PIL Image in RGB format
+        """
+        if max_size is None:
+            max_size = CPU_MAX_IMAGE_SIZE if self.device == "cpu" else None
+
+        with self._timed_stage("decode"):
+            if max_size and image.format == "JPEG" and max(image.size) > max_size:
+                ratio = max_size / max(image.size)
+                # draft picks the largest DCT scale that keeps the image at least this size
+                image.draft('RGB', tuple(max(1, int(dim * ratio)) for dim in image.size))
+
+            # Convert to RGB if needed
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            else:
+                image.load()
 
         # Resize image if too large for CPU processing
-        if self.device == "cpu":
-            max_size = 1024  # Maximum dimension for CPU processing
-            if max(image.size) > max_size:
+        if max_size and max(image.size) > max_size:
+            with self._timed_stage("resize"):
                 ratio = max_size / max(image.size)
                 new_size = tuple(int(dim * ratio) for dim in image.size)
                 image = image.resize(new_size, Image.Resampling.LANCZOS)
-                print(f"Resized image for CPU processing: {image.size}")
+            print(f"Resized image for processing: {image.size}")
 
         return image
 
-    def load_image_from_bytes(self, image_bytes: bytes) -> Image.Image:
+    def load_image_from_bytes(self, image_bytes: bytes, max_size: Optional[int] = None) -> Image.Image:
         """
         Load image from bytes data
 
         Args:
             image_bytes: Image data in bytes format
+            max_size: Maximum image dimension (defaults to CPU_MAX_IMAGE_SIZE on CPU, no limit on GPU)
 
         Returns:
             PIL Image in RGB format
         """
         try:
             image = Image.open(io.BytesIO(image_bytes))
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            return image
+            return self._decode_image(image, max_size)
         except Exception as e:
             raise ValueError(f"Failed to load image from bytes: {e}")
 
+    @contextmanager
+    def _timed_stage(self, stage: str):
+        """Accumulate the wall time of a pipeline stage into this thread's timings"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings = getattr(self._stage_timings, "current", None)
+            if timings is not None:
+                timings[stage] = timings.get(stage, 0.0) + (time.perf_counter() - started) * 1000
+
+    def _start_timings(self):
+        """Start collecting stage timings on this thread"""
+        self._stage_timings.current = {}
+
+    def _collect_timings(self) -> Dict[str, float]:
+        """Stop collecting and return the stage timings in milliseconds"""
+        timings = getattr(self._stage_timings, "current", None) or {}
+        self._stage_timings.current = None
+        return {stage: round(ms, 2) for stage, ms in timings.items()}
+
     def _is_url(self, string: str) -> bool:
         """Check if string is a valid URL"""
         try:
@@ -243,10 +627,432 @@ class DynamicGroundingDINO:
         except:
             return False
 
+    def _load_image_source(self, image_source: Union[str, Image.Image, bytes],
+                           max_size: Optional[int] = None) -> Image.Image:
+        """Load an image from any supported source (URL, file path, PIL Image, or bytes)"""
+        if isinstance(image_source, bytes):
+            return self.load_image_from_bytes(image_source, max_size)
+        return self.load_image(image_source, max_size)
+
+    def _fetch_image_source(self, image_source: Union[str, Image.Image, bytes]) -> Union[str, Image.Image, bytes]:
+        """Fetch a URL source to its encoded bytes, leaving other sources unchanged"""
+        if isinstance(image_source, str) and self._is_url(image_source):
+            try:
+                with self._timed_stage("fetch"):
+                    image_bytes = image_fetcher.fetch(image_source)
+                print(f"Loaded image from URL: {image_source}")
+                return image_bytes
+            except Exception as e:
+                raise ValueError(f"Failed to load image from URL: {e}")
+        return image_source
+
+    def _cached_text_labels(self, text_queries: Union[str, List[str], DetectorProfile]) -> Optional[Tuple[List[str], List[str]]]:
+        """
+        Format text queries into model labels without a translation call
+
+        Returns:
+            Tuple of (original queries as list, processed labels), or None if a query
+            has no cached translation yet
+        """
+        if isinstance(text_queries, DetectorProfile):
+            return list(text_queries.queries), list(text_queries.labels)
+
+        if isinstance(text_queries, str):
+            text_queries = [text_queries]
+
+        translated_text_labels = lookup_cached_translations(text_queries)
+        if translated_text_labels is None:
+            return None
+        return text_queries, [clean_and_format_label(label) for label in translated_text_labels]
+
+    def _prepare_text_labels(self, text_queries: Union[str, List[str], DetectorProfile]) -> Tuple[List[str], List[str]]:
+        """
+        Translate and format text queries into model labels
+
+        Args:
+            text_queries: Text descriptions to search for, or a registered profile
+
+        Returns:
+            Tuple of (original queries as list, processed labels)
+        """
+        # Profiles were translated and formatted when they were registered
+        if isinstance(text_queries, DetectorProfile):
+            return list(text_queries.queries), list(text_queries.labels)
+
+        # Prepare text queries - ensure proper format
+        if isinstance(text_queries, str):
+            text_queries = [text_queries]
+
+        # Process and translate text labels
+        translated_text_labels = process_and_translate_list(text_queries)
+
+        # Clean labels
+        processed_text_labels = [clean_and_format_label(label) for label in translated_text_labels]
+        print(f"Processed labels: {processed_text_labels}")
+
+        return text_queries, processed_text_labels
+
+    def _prepare_inputs(self, images: List[Image.Image], text_labels: List[List[str]]) -> Dict[str, Any]:
+        """
+        Run the processor over a batch of images and label lists and move the tensors to the device
+
+        Args:
+            images: List of PIL Images
+            text_labels: One list of processed labels per image
+
+        Returns:
+            Dictionary of model inputs
+        """
+        try:
+            text_inputs = self._stored_text_inputs(text_labels)
+            if text_inputs is not None:
+                # Every row is a registered profile chunk - only the images need processing
+                inputs = self.processor.image_processor(images=images, return_tensors="pt")
+                inputs.update(text_inputs)
+            else:
+                # Pad text to the longest query set so images with different label lists share one batch
+                inputs = self.processor(images=images, text=text_labels, padding=True, return_tensors="pt")
+
+            # Move inputs to device safely with proper dtype handling
+            processed_inputs = {}
+            for k, v in inputs.items():
+                if isinstance(v, torch.Tensor):
+                    # Ensure proper dtype for CPU
+                    if self.device == "cpu" and v.dtype == torch.float16:
+                        v = v.to(torch.float32)
+                    processed_inputs[k] = v.to(self.device)
+                else:
+                    processed_inputs[k] = v
+
+            return processed_inputs
+
+        except Exception as e:
+            print(f"Error during preprocessing: {e}")
+            raise ValueError(f"Failed to preprocess inputs: {e}")
+
+    def _stored_text_inputs(self, text_labels: List[List[str]]) -> Optional[Dict[str, torch.Tensor]]:
+        """Build padded text inputs from registered profile token ids, or None if any row is unknown"""
+        token_ids = [self._profile_tokens.get(tuple(labels)) for labels in text_labels]
+        if not token_ids or any(ids is None for ids in token_ids):
+            return None
+
+        length = max(len(ids) for ids in token_ids)
+        pad_id = self.processor.tokenizer.pad_token_id or 0
+        input_ids = torch.full((len(token_ids), length), pad_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(token_ids), length), dtype=torch.long)
+        for i, ids in enumerate(token_ids):
+            input_ids[i, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+            attention_mask[i, :len(ids)] = 1
+        return {
+            "input_ids": input_ids,
+            "token_type_ids": torch.zeros_like(input_ids),
+            "attention_mask": attention_mask
+        }
+
+    def _chunk_labels(self, labels: List[str]) -> List[List[str]]:
+        """
+        Split a label list into groups that fit the text encoder's token budget
+
+        Labels are packed greedily in order, keeping one copy of repeated labels (see
+        pack_labels); each costs its own tokens plus the "." separator the processor
+        inserts, and every group also pays for [CLS] and [SEP].
+
+        Args:
+            labels: Processed labels for one image
+
+        Returns:
+            List of label groups (a single group when everything fits)
+        """
+        budget = self.max_text_tokens - 2
+        if len(labels) <= 1:
+            return [labels]
+
+        chunks = self._profile_chunks.get(tuple(labels))
+        if chunks is not None:
+            return [list(chunk) for chunk in chunks]
+
+        token_ids = self.processor.tokenizer(labels, add_special_tokens=False)["input_ids"]
+        counts = [len(ids) + 1 for ids in token_ids]
+        if sum(counts) <= budget:
+            return [labels]
+        return pack_labels(labels, counts, budget)
+
+    def _infer(self, images: List[Image.Image], text_labels: List[List[str]],
+               box_thresholds: List[float], text_thresholds: List[float],
+               image_digests: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Preprocess, run one forward pass and post-process a batch, chunking long label lists
+
+        Each image's labels are split into token-budgeted chunks and the image is
+        repeated once per chunk, so every chunk of every image shares one batched
+        forward pass (the vision backbone runs once per distinct image when the
+        feature cache is on). Chunks hold disjoint labels (repeats are packed once), so
+        their results are simply concatenated per image without cross-chunk NMS.
+
+        Args:
+            images: Images in batch order
+            text_labels: Processed labels per image
+            box_thresholds: Box threshold per image
+            text_thresholds: Text threshold per image
+            image_digests: Image content digests per image, used as vision feature cache keys
+
+        Returns:
+            List of detection results in batch order
+        """
+        rows = [(i, chunk) for i, labels in enumerate(text_labels) for chunk in self._chunk_labels(labels)]
+        if len(rows) > len(images):
+            print(f"Split labels into {len(rows)} token-budgeted chunks for {len(images)} image(s)")
+
+        row_images = [images[i] for i, _ in rows]
+        row_labels = [chunk for _, chunk in rows]
+        with self._timed_stage("preprocess"):
+            inputs = self._prepare_inputs(row_images, row_labels)
+        with self._timed_stage("inference"):
+            outputs = self._run_inference(
+                inputs, row_labels, [image_digests[i] for i, _ in rows] if image_digests else None
+            )
+        with self._timed_stage("postprocess"):
+            row_results = self._post_process(
+                outputs, row_images, row_labels,
+                [box_thresholds[i] for i, _ in rows], [text_thresholds[i] for i, _ in rows]
+            )
+
+        if len(rows) == len(images):
+            return row_results
+
+        with self._timed_stage("merge"):
+            results = []
+            for i in range(len(images)):
+                parts = [result for (j, _), result in zip(rows, row_results) if j == i]
+                if len(parts) == 1:
+                    results.append(parts[0])
+                    continue
+                results.append({
+                    "boxes": torch.cat([part["boxes"].float().reshape(-1, 4) for part in parts]),
+                    "scores": torch.cat([part["scores"].float().reshape(-1) for part in parts]),
+                    "labels": [label for part in parts for label in part["labels"]]
+                })
+        return results
+
+    def _run_inference(self, inputs: Dict[str, Any], text_labels: Optional[List[List[str]]] = None,
+                       image_digests: Optional[List[str]] = None):
+        """
+        Run the model forward pass with error handling and CPU optimizations
+
+        Args:
+            inputs: Model inputs from _prepare_inputs
+            text_labels: Processed labels per batch row, used as text feature cache keys
+            image_digests: Image content digests per batch row, used as vision feature cache keys
+
+        Returns:
+            Raw model outputs
+        """
+        try:
+            # The exported graph has no cache hooks; it always runs the full forward pass
+            if self.onnx_backend is not None:
+                return self.onnx_backend.run(inputs)
+
+            # Set model to eval mode
+            self.model.eval()
+
+            cache_keys = [tuple(labels) for labels in text_labels] if text_labels else None
+            lengths = inputs["attention_mask"].sum(dim=1).tolist() if "attention_mask" in inputs else None
+            if cache_keys is None or lengths is None:
+                cache_binding = nullcontext()
+            else:
+                cache_binding = self.text_feature_cache.bind(cache_keys, lengths)
+            if image_digests is None or self.vision_feature_cache.max_bytes <= 0:
+                vision_binding = nullcontext()
+            else:
+                vision_binding = self.vision_feature_cache.bind(image_digests)
+
+            with torch.no_grad(), cache_binding, vision_binding:
+                if self.autocast_dtype is None:
+                    return self._forward(inputs)
+
+                try:
+                    with torch.autocast("cpu", dtype=self.autocast_dtype):
+                        outputs = self._forward(inputs)
+                except RuntimeError as e:
+                    # Some kernels (e.g. quantized Linear) reject bfloat16 inputs
+                    print(f"bfloat16 autocast failed, falling back to float32: {e}")
+                    self.autocast_dtype = None
+                    self.text_feature_cache.clear()
+                    self.vision_feature_cache.clear()
+                    return self._forward(inputs)
+
+                # Post-processing and box coordinates need full precision
+                for key in ("logits", "pred_boxes"):
+                    if isinstance(outputs.get(key), torch.Tensor):
+                        outputs[key] = outputs[key].float()
+                return outputs
+
+        except RuntimeError as e:
+            if "could not create a primitive" in str(e):
+                print(f"Primitive creation error - likely CPU/memory issue: {e}")
+                print("This might be due to insufficient memory or CPU optimization issues")
+                print("Try using a smaller image or different model")
+                raise ValueError(f"Model inference failed due to resource constraints: {e}")
+            else:
+                print(f"Runtime error during model inference: {e}")
+                raise ValueError(f"Model inference failed: {e}")
+        except Exception as e:
+            print(f"Error during model inference: {e}")
+            raise ValueError(f"Model inference failed: {e}")
+
+    def _forward(self, inputs: Dict[str, Any]):
+        """Call the (compiled, if enabled) model, using torch.inference_mode on CPU when available"""
+        if self._compiled_model is not None:
+            try:
+                return self._call_model(self._compiled_model, inputs)
+            except Exception as e:
+                print(f"Compiled forward pass failed, falling back to eager mode: {e}")
+                self._compiled_model = None
+        return self._call_model(self.model, inputs)
+
+    def _call_model(self, model, inputs: Dict[str, Any]):
+        if hasattr(torch, 'inference_mode') and self.device == "cpu":
+            with torch.inference_mode():
+                return model(**inputs)
+        return model(**inputs)
+
+    def _post_process(self, outputs, images: List[Image.Image], text_labels: List[List[str]],
+                      box_thresholds: List[float], text_thresholds: List[float]) -> List[Dict[str, Any]]:
+        """
+        Post-process batched model outputs into one result dictionary per image
+
+        Images sharing the same threshold pair are post-processed together, so the
+        common case (one pair for the whole batch) costs a single call.
+
+        Args:
+            outputs: Raw model outputs for the whole batch
+            images: Images in batch order
+            text_labels: Processed labels per image
+            box_thresholds: Box threshold per image
+            text_thresholds: Text threshold per image
+
+        Returns:
+            List of detection results in batch order
+        """
+        try:
+            target_sizes = [(image.height, image.width) for image in images]
+            results: List[Optional[Dict[str, Any]]] = [None] * len(images)
+
+            for pair in set(zip(box_thresholds, text_thresholds)):
+                box_threshold, text_threshold = pair
+                group_results = self.processor.post_process_grounded_object_detection(
+                    outputs,
+                    threshold=box_threshold,
+                    text_threshold=text_threshold,
+                    text_labels=text_labels,
+                    target_sizes=target_sizes
+                )
+                for i, thresholds in enumerate(zip(box_thresholds, text_thresholds)):
+                    if thresholds == pair:
+                        results[i] = group_results[i]
+
+            # Fuzzy match the labels
+            for result, labels in zip(results, text_labels):
+                if len(result["labels"]) > 0:
+                    result["labels"] = match_labels_fuzzy(result["labels"], labels)
+
+            return results
+
+        except Exception as e:
+            print(f"Error during post-processing: {e}")
+            raise ValueError(f"Post-processing failed: {e}")
+
+    def _detect_cached(self, image_sources: List[Union[str, Image.Image, bytes]],
+                       text_queries_list: List[Union[str, List[str], DetectorProfile]],
+                       box_thresholds: List[float], text_thresholds: List[float],
+                       load_images: List[bool]) -> List[Tuple[Optional[Image.Image], Dict[str, Any]]]:
+        """
+        Detect objects in several images, serving repeats from the result cache first
+
+        URL sources are fetched once and keyed by their encoded bytes, and queries with
+        cached translations are formatted without a translation call, so a repeat is
+        answered before its image is decoded or hashed. The remaining requests are
+        translated, decoded and keyed by pixel digest when they have no bytes, and the
+        misses share one forward pass.
+
+        Returns:
+            List of (PIL Image or None, detection results) tuples in input order
+        """
+        count = len(image_sources)
+        sources = [self._fetch_image_source(source) for source in image_sources]
+
+        with self._timed_stage("cache"):
+            text_labels = [self._cached_text_labels(queries) for queries in text_queries_list]
+            source_digests = [self._source_digest(source) for source in sources]
+            cache_keys: List[Optional[str]] = [
+                self._result_cache_key(source_digests[i], text_labels[i][1], box_thresholds[i], text_thresholds[i])
+                if text_labels[i] else None
+                for i in range(count)
+            ]
+            results: List[Optional[Dict[str, Any]]] = [
+                self.result_cache.get(key) if key else None for key in cache_keys
+            ]
+
+        # Cached results carry the image size, so only misses and visualizations need pixels
+        images = [
+            self._load_image_source(sources[i])
+            if results[i] is None or load_images[i] or "image_size" not in results[i] else None
+            for i in range(count)
+        ]
+        misses = [i for i in range(count) if results[i] is None]
+
+        if any(text_labels[i] is None for i in misses):
+            with self._timed_stage("text"):
+                for i in misses:
+                    if text_labels[i] is None:
+                        text_labels[i] = self._prepare_text_labels(text_queries_list[i])
+
+        # Freshly translated queries and in-memory images get their keys now
+        image_digests: Dict[int, str] = {}
+        with self._timed_stage("cache"):
+            digests = self._image_digests([images[i] for i in misses], [source_digests[i] for i in misses])
+            if digests:
+                image_digests = dict(zip(misses, digests))
+            for i in misses:
+                if cache_keys[i] is None:
+                    cache_keys[i] = self._result_cache_key(
+                        source_digests[i] or image_digests.get(i),
+                        text_labels[i][1], box_thresholds[i], text_thresholds[i]
+                    )
+                    if cache_keys[i]:
+                        results[i] = self.result_cache.get(cache_keys[i])
+        misses = [i for i in misses if results[i] is None]
+
+        if count - len(misses):
+            print(f"Served {count - len(misses)} of {count} detections from the result cache")
+
+        if misses:
+            if count > 1:
+                print(f"Running batched detection on {len(misses)} images")
+
+            miss_results = self._infer(
+                [images[i] for i in misses], [text_labels[i][1] for i in misses],
+                [box_thresholds[i] for i in misses], [text_thresholds[i] for i in misses],
+                [image_digests[i] for i in misses] if image_digests else None
+            )
+
+            for i, result in zip(misses, miss_results):
+                result["image_size"] = images[i].size
+                results[i] = result
+                if cache_keys[i]:
+                    self.result_cache.put(cache_keys[i], result)
+
+        # Processed labels in query order, used to resolve per-query thresholds
+        for i in range(count):
+            results[i]["query_labels"] = text_labels[i][1]
+
+        return list(zip(images, results))
+
     def detect_objects(self, image_source: Union[str, Image.Image, bytes], 
                       text_queries: Union[str, List[str]], 
                       box_threshold: float = 0.35, 
-                      text_threshold: float = 0.35) -> Tuple[Image.Image, Dict[str, Any]]:
+                      text_threshold: float = 0.35,
+                      load_image: bool = True) -> Tuple[Optional[Image.Image], Dict[str, Any]]:
         """
         Detect objects in image based on text queries using the new implementation
 
@@ -255,103 +1061,258 @@ class DynamicGroundingDINO:
             text_queries: List of text descriptions to search for
             box_threshold: Confidence threshold for bounding boxes
             text_threshold: Confidence threshold for text matching
+            load_image: Decode the image even when the result is cached (needed for visualization)
 
         Returns:
-            Tuple of (PIL Image, detection results)
+            Tuple of (PIL Image, or None for a cached result when load_image is False, detection results)
         """
         try:
-            # Load image
-            if isinstance(image_source, bytes):
-                image = self.load_image_from_bytes(image_source)
-            else:
-                image = self.load_image(image_source)
+            print(f"Searching for: {', '.join(self._query_list(text_queries))}")
+            print(f"Thresholds - Box: {box_threshold}, Text: {text_threshold}")
 
-            # Prepare text queries - ensure proper format
-            if isinstance(text_queries, str):
-                text_queries = [text_queries]
-            
-            # Process and translate text labels
-            translated_text_labels = process_and_translate_list(text_queries)
-            
-            # Clean labels
-            processed_text_labels = [clean_and_format_label(label) for label in translated_text_labels]
-            print(f"Processed labels: {processed_text_labels}")
+            return self._detect_cached(
+                [image_source], [text_queries], [box_threshold], [text_threshold], [load_image]
+            )[0]
 
-            print(f"Searching for: {', '.join(text_queries)}")
-            print(f"Thresholds - Box: {box_threshold}, Text: {text_threshold}")
+        except Exception as e:
+            print(f"Detection error: {e}")
+            raise e
 
-            # Process inputs with proper error handling
-            try:
-                inputs = self.processor(images=image, text=[processed_text_labels], return_tensors="pt")
-                
-                # Move inputs to device safely with proper dtype handling
-                processed_inputs = {}
-                for k, v in inputs.items():
-                    if isinstance(v, torch.Tensor):
-                        # Ensure proper dtype for CPU
-                        if self.device == "cpu" and v.dtype == torch.float16:
-                            v = v.to(torch.float32)
-                        processed_inputs[k] = v.to(self.device)
-                    else:
-                        processed_inputs[k] = v
-                
-                inputs = processed_inputs
-                
-            except Exception as e:
-                print(f"Error during preprocessing: {e}")
-                raise ValueError(f"Failed to preprocess inputs: {e}")
+    def detect_objects_batch(self, image_sources: List[Union[str, Image.Image, bytes]],
+                             text_queries_list: List[Union[str, List[str]]],
+                             box_thresholds: Union[float, List[float]] = 0.35,
+                             text_thresholds: Union[float, List[float]] = 0.35,
+                             load_images: Union[bool, List[bool]] = True) -> List[Tuple[Optional[Image.Image], Dict[str, Any]]]:
+        """
+        Detect objects in several images with a single forward pass
 
-            # Run inference with error handling and CPU optimizations
-            try:
-                # Set model to eval mode
-                self.model.eval()
-                
-                with torch.no_grad():
-                    # Use torch.inference_mode for better CPU performance if available
-                    if hasattr(torch, 'inference_mode') and self.device == "cpu":
-                        with torch.inference_mode():
-                            outputs = self.model(**inputs)
-                    else:
-                        outputs = self.model(**inputs)
-                        
-            except RuntimeError as e:
-                if "could not create a primitive" in str(e):
-                    print(f"Primitive creation error - likely CPU/memory issue: {e}")
-                    print("This might be due to insufficient memory or CPU optimization issues")
-                    print("Try using a smaller image or different model")
-                    raise ValueError(f"Model inference failed due to resource constraints: {e}")
+        Images are padded and stacked by the processor, each with its own query list,
+        and the post-processed results are split back per image.
+
+        Args:
+            image_sources: Image sources (URL, file path, PIL Image, or bytes)
+            text_queries_list: Text queries for each image
+            box_thresholds: Box threshold for all images or one per image
+            text_thresholds: Text threshold for all images or one per image
+            load_images: Decode images even when their result is cached, for all images or one per image
+
+        Returns:
+            List of (PIL Image or None, detection results) tuples in input order
+        """
+        if len(image_sources) != len(text_queries_list):
+            raise ValueError("image_sources and text_queries_list must have the same length")
+        if not image_sources:
+            return []
+
+        if not isinstance(box_thresholds, list):
+            box_thresholds = [box_thresholds] * len(image_sources)
+        if not isinstance(text_thresholds, list):
+            text_thresholds = [text_thresholds] * len(image_sources)
+        if not isinstance(load_images, list):
+            load_images = [load_images] * len(image_sources)
+
+        try:
+            return self._detect_cached(image_sources, text_queries_list, box_thresholds, text_thresholds, load_images)
+
+        except Exception as e:
+            print(f"Batch detection error: {e}")
+            raise e
+
+    def detect_objects_tiled(self, image_source: Union[str, Image.Image, bytes],
+                             text_queries: Union[str, List[str]],
+                             box_threshold: float = 0.35,
+                             text_threshold: float = 0.35,
+                             tile_size: int = TILE_SIZE,
+                             overlap: int = TILE_OVERLAP,
+                             merge_method: str = TILE_MERGE_METHOD,
+                             merge_iou: float = TILE_MERGE_IOU) -> Tuple[Image.Image, Dict[str, Any]]:
+        """
+        Detect small objects in large images by running overlapping tiles
+
+        The image is kept at up to TILED_MAX_IMAGE_SIZE instead of the CPU downscale,
+        split into overlapping tiles plus one downscaled view of the whole image (for
+        objects larger than a tile), run as a single batched forward pass, and the boxes
+        are merged per label with NMS or weighted boxes fusion. If that pass runs out of
+        memory the views are split into halving batches for the rest of the request;
+        TILE_BATCH_SIZE caps the views per pass up front.
+
+        Args:
+            image_source: Image source (URL, file path, PIL Image, or bytes)
+            text_queries: List of text descriptions to search for
+            box_threshold: Confidence threshold for bounding boxes
+            text_threshold: Confidence threshold for text matching
+            tile_size: Tile edge length in pixels
+            overlap: Overlap between neighbouring tiles in pixels
+            merge_method: "nms" or "wbf"
+            merge_iou: IoU above which boxes of the same label are merged
+
+        Returns:
+            Tuple of (PIL Image, detection results) with boxes in image coordinates
+        """
+        try:
+            image = self._load_image_source(image_source, max_size=TILED_MAX_IMAGE_SIZE)
+
+            with self._timed_stage("text"):
+                text_queries, processed_text_labels = self._prepare_text_labels(text_queries)
+
+            with self._timed_stage("cache"):
+                image_digests = self._image_digests([image])
+                cache_key = None
+                if image_digests and self.result_cache.enabled:
+                    cache_key = self.result_cache.make_key(
+                        image_digests[0], processed_text_labels, box_threshold, text_threshold,
+                        f"{self.model_key}/tiled-{tile_size}-{overlap}-{merge_method}-{merge_iou}"
+                    )
+                cached = self.result_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                print("Returning cached tiled detection results")
+                cached["query_labels"] = processed_text_labels
+                return image, cached
+
+            grid = tile_grid(image.width, image.height, tile_size, overlap)
+            views = [image.crop(box) for box in grid]
+            # (left, top, scale) mapping each view back to image coordinates
+            placements = [(left, top, 1.0) for left, top, _, _ in grid]
+            if len(grid) > 1:
+                scale = min(1.0, tile_size / max(image.size))
+                global_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+                views.append(image.resize(global_size, Image.Resampling.BILINEAR) if scale < 1.0 else image)
+                placements.append((0, 0, scale))
+
+            print(f"Tiled detection: {image.size[0]}x{image.size[1]} image, {len(grid)} tiles of "
+                  f"{tile_size}px (overlap {overlap}px) + global view")
+
+            view_results = run_in_batches(
+                lambda chunk: self._infer(
+                    chunk, [processed_text_labels] * len(chunk),
+                    [box_threshold] * len(chunk), [text_threshold] * len(chunk)
+                ),
+                views, TILE_BATCH_SIZE,
+                on_out_of_memory=torch.cuda.empty_cache if self.device == "cuda" else None
+            )
+
+            all_boxes, all_scores, all_labels = [], [], []
+            for (left, top, scale), result in zip(placements, view_results):
+                if len(result["labels"]) == 0:
+                    continue
+                boxes = result["boxes"].float()
+                offset = torch.tensor([left, top, left, top], dtype=boxes.dtype, device=boxes.device)
+                all_boxes.append(boxes / scale + offset)
+                all_scores.append(result["scores"].float().to(boxes.device))
+                all_labels.extend(result["labels"])
+
+            with self._timed_stage("merge"):
+                if all_labels:
+                    boxes, scores, labels = merge_detections(
+                        torch.cat(all_boxes), torch.cat(all_scores), all_labels, merge_iou, merge_method
+                    )
                 else:
-                    print(f"Runtime error during model inference: {e}")
-                    raise ValueError(f"Model inference failed: {e}")
-            except Exception as e:
-                print(f"Error during model inference: {e}")
-                raise ValueError(f"Model inference failed: {e}")
+                    boxes, scores, labels = torch.zeros((0, 4)), torch.zeros(0), []
 
-            # Post-process results
-            try:
-                results = self.processor.post_process_grounded_object_detection(
-                    outputs,
-                    threshold=box_threshold,
-                    text_threshold=text_threshold,
-                    text_labels=processed_text_labels,
-                    target_sizes=[(image.height, image.width)]
-                )
-                
-                # Fuzzy match the labels
-                if len(results[0]["labels"]) > 0:
-                    final_labels = match_labels_fuzzy(results[0]["labels"], processed_text_labels)
-                    results[0]["labels"] = final_labels
-                    
-            except Exception as e:
-                print(f"Error during post-processing: {e}")
-                raise ValueError(f"Post-processing failed: {e}")
+            merged = {"boxes": boxes, "scores": scores, "labels": labels}
+            print(f"Merged {len(all_labels)} tile detections into {len(labels)}")
+
+            if cache_key:
+                self.result_cache.put(cache_key, merged)
+            merged["query_labels"] = processed_text_labels
+            return image, merged
 
-            return image, results[0]
-            
         except Exception as e:
-            print(f"Detection error: {e}")
+            print(f"Tiled detection error: {e}")
             raise e
 
+    def register_profile(self, text_queries: Union[str, List[str]], profile_id: Optional[str] = None,
+                         name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Register a label set once so detections can reference it by id
+
+        Translation, formatting, chunking and tokenization run now and are stored in
+        the shared profile store. When the text feature cache is on, the chunks are
+        also encoded and their text features stored for this model configuration.
+
+        Args:
+            text_queries: Text descriptions to search for
+            profile_id: Profile id (defaults to a digest of the queries)
+            name: Optional human-readable name
+
+        Returns:
+            Public description of the stored profile
+        """
+        queries, labels = self._prepare_text_labels(text_queries)
+        if not labels:
+            raise ValueError("No text queries provided")
+
+        chunks = self._chunk_labels(labels)
+        input_ids = [self.processor.tokenizer(label_prompt(chunk))["input_ids"] for chunk in chunks]
+
+        if not profile_id:
+            digest = hashlib.sha256(json.dumps(queries, ensure_ascii=False).encode("utf-8"))
+            profile_id = digest.hexdigest()[:16]
+        profile = self.profile_store.put(profile_id, queries, labels, chunks, input_ids, name)
+        self._activate_profile(profile)
+
+        if self._store_profile_features(profile):
+            profile = self.profile_store.get(profile_id) or profile
+        print(f"Registered profile '{profile_id}': {len(labels)} labels in {len(chunks)} chunk(s)")
+        return profile.to_dict()
+
+    def get_profile(self, profile_id: str) -> DetectorProfile:
+        """
+        Load a registered profile and make its text pipeline outputs available
+
+        Raises:
+            ValueError: If no profile with this id is registered
+        """
+        profile = self.profile_store.get(profile_id)
+        if profile is None:
+            raise ValueError(f"Unknown profile '{profile_id}'")
+        self._activate_profile(profile)
+        return profile
+
+    def _activate_profile(self, profile: DetectorProfile):
+        """Seed the chunking, token id and text feature caches from a stored profile"""
+        self._profile_chunks.put(tuple(profile.labels), profile.chunks)
+        for chunk, ids in zip(profile.chunks, profile.input_ids):
+            self._profile_tokens.put(tuple(chunk), ids)
+
+        keys = [tuple(chunk) for chunk in profile.chunks]
+        if (self.onnx_backend is not None or self.text_feature_cache.max_size <= 0
+                or self.model_key not in profile.feature_models
+                or all(key in self.text_feature_cache for key in keys)):
+            return
+
+        blobs = self.profile_store.get_features(profile.profile_id, self.model_key)
+        if not blobs or len(blobs) != len(keys):
+            return
+        for key, blob in zip(keys, blobs):
+            self.text_feature_cache.put(key, torch.load(io.BytesIO(blob), map_location=self.device, weights_only=True))
+
+    def _store_profile_features(self, profile: DetectorProfile) -> bool:
+        """Encode a profile's chunks and store their text features; returns True if stored"""
+        if self.onnx_backend is not None or self.text_feature_cache.max_size <= 0:
+            return False
+
+        keys = [tuple(chunk) for chunk in profile.chunks]
+        if not all(key in self.text_feature_cache for key in keys):
+            # One forward pass on a blank image populates the text feature cache
+            self._infer([Image.new("RGB", (64, 64))], [profile.labels], [1.0], [1.0])
+
+        blobs = []
+        for key in keys:
+            features = self.text_feature_cache.get(key)
+            if features is None:
+                return False
+            buffer = io.BytesIO()
+            torch.save(features.cpu(), buffer)
+            blobs.append(buffer.getvalue())
+
+        self.profile_store.put_features(profile.profile_id, self.model_key, blobs)
+        return True
+
+    def get_profile_stats(self) -> Dict[str, Any]:
+        """Get profile store statistics"""
+        return self.profile_store.get_stats()
+
     def generate_colors(self, labels: List[str]) -> Dict[str, np.ndarray]:
         """Generate distinct colors for different labels"""
         unique_labels = list(set(labels))
@@ -359,6 +1320,110 @@ class DynamicGroundingDINO:
         colors = {label: (random.random(), random.random(), random.random()) for label in unique_labels}
         return colors
 
+    @staticmethod
+    @functools.lru_cache(maxsize=16)
+    def _load_font(font_size: int) -> ImageFont.ImageFont:
+        """Load a bold TrueType font, falling back to Pillow's default font"""
+        for font_name in ("DejaVuSans-Bold.ttf", "Arial Bold.ttf", "arialbd.ttf"):
+            try:
+                return ImageFont.truetype(font_name, font_size)
+            except OSError:
+                continue
+        try:
+            return ImageFont.load_default(size=font_size)
+        except TypeError:
+            # Pillow < 10.1 has no sized default font
+            return ImageFont.load_default()
+
+    def render_visualization(self, image: Image.Image, results: Dict[str, Any],
+                             show_confidence: bool = True,
+                             font_size: Optional[int] = None) -> Image.Image:
+        """
+        Draw bounding boxes and labels directly onto a copy of the source image
+
+        Args:
+            image: PIL Image
+            results: Detection results from the model
+            show_confidence: Whether to show confidence scores
+            font_size: Font size for labels (defaults to a size relative to the image)
+
+        Returns:
+            PIL Image with visualized detection results
+        """
+        canvas = image.copy()
+        draw = ImageDraw.Draw(canvas)
+
+        boxes = results["boxes"]
+        scores = results["scores"]
+        labels = results["labels"]
+        if len(boxes) == 0:
+            return canvas
+
+        longest_side = max(canvas.size)
+        if font_size is None:
+            font_size = max(12, longest_side // 60)
+        line_width = max(2, longest_side // 400)
+        font = self._load_font(font_size)
+
+        # Same palette as the matplotlib renderer, scaled to 8-bit RGB
+        color_map = {
+            label: tuple(int(channel * 255) for channel in color)
+            for label, color in self.generate_colors(labels).items()
+        }
+
+        for box, score, label in zip(boxes, scores, labels):
+            box = box.tolist() if hasattr(box, "tolist") else box
+            x_min, y_min, x_max, y_max = box
+            confidence = round(score.item() if hasattr(score, "item") else float(score), 3)
+            color = color_map[label]
+
+            draw.rectangle([x_min, y_min, x_max, y_max], outline=color, width=line_width)
+
+            pretty_label = label.replace("-", " ")
+            text = f'{pretty_label}: {confidence}' if show_confidence else pretty_label
+            left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+            text_width, text_height = right - left, bottom - top
+            padding = max(2, font_size // 5)
+
+            text_y = y_min - text_height - 2 * padding
+            if text_y < 0:
+                text_y = y_min
+            draw.rectangle(
+                [x_min, text_y, x_min + text_width + 2 * padding, text_y + text_height + 2 * padding],
+                fill=color
+            )
+            draw.text((x_min + padding - left, text_y + padding - top), text, fill="white", font=font)
+
+        return canvas
+
+    @staticmethod
+    def encode_image(image: Image.Image, image_format: str = "png", quality: int = 85) -> Tuple[bytes, str]:
+        """
+        Encode a PIL Image in a single step
+
+        Args:
+            image: PIL Image
+            image_format: "png", "jpeg" or "webp"
+            quality: Quality for lossy formats (1-100)
+
+        Returns:
+            Tuple of (encoded bytes, normalized format name)
+        """
+        image_format = image_format.lower()
+        if image_format == "jpg":
+            image_format = "jpeg"
+        if image_format not in VISUALIZATION_FORMATS:
+            raise ValueError(f"Unsupported visualization format: {image_format}")
+
+        buf = io.BytesIO()
+        if image_format == "png":
+            image.save(buf, format="PNG", optimize=False, compress_level=6)
+        else:
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            image.save(buf, format=image_format.upper(), quality=quality)
+        return buf.getvalue(), image_format
+
     def create_visualization(self, image: Image.Image, results: Dict[str, Any], 
                            figsize: Tuple[int, int] = (12, 8),
                            show_confidence: bool = True, 
@@ -451,11 +1516,203 @@ class DynamicGroundingDINO:
 
         return result_image
 
+    @staticmethod
+    def _query_list(text_queries: Union[str, List[str], DetectorProfile]) -> List[str]:
+        """Original queries as a list (the registered queries for a profile)"""
+        if isinstance(text_queries, DetectorProfile):
+            return list(text_queries.queries)
+        return [text_queries] if isinstance(text_queries, str) else list(text_queries)
+
+    @classmethod
+    def _resolve_label_thresholds(cls, results: Dict[str, Any], text_queries: Union[str, List[str], DetectorProfile],
+                                  box_threshold: float,
+                                  label_thresholds: Optional[Dict[str, float]]) -> Optional[Dict[str, float]]:
+        """Map per-query thresholds onto the processed labels the detections carry (see resolve_label_thresholds)"""
+        queries = cls._query_list(text_queries)
+        return resolve_label_thresholds(
+            queries, results.get("query_labels") or queries, box_threshold, label_thresholds, LABEL_THRESHOLDS
+        )
+
+    def _refine_results(self, results: Dict[str, Any],
+                        nms_iou: Optional[float] = None,
+                        max_detections: Optional[int] = None,
+                        min_box_area: Optional[float] = None,
+                        label_thresholds: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        Apply NMS, top-k, minimum area and per-label thresholds to detection results
+
+        Unset arguments fall back to DETECTION_NMS_IOU, MAX_DETECTIONS, MIN_BOX_AREA
+        and LABEL_THRESHOLDS.
+
+        Returns:
+            New results dictionary with the surviving boxes, scores and labels
+        """
+        if not results or "boxes" not in results:
+            return results
+
+        with self._timed_stage("refine"):
+            boxes, scores, labels = refine_detections(
+                results["boxes"], results["scores"], results["labels"],
+                nms_iou=DETECTION_NMS_IOU if nms_iou is None else nms_iou,
+                max_detections=MAX_DETECTIONS if max_detections is None else max_detections,
+                min_box_area=MIN_BOX_AREA if min_box_area is None else min_box_area,
+                label_thresholds={**LABEL_THRESHOLDS, **(label_thresholds or {})}
+            )
+        return {**results, "boxes": boxes, "scores": scores, "labels": labels}
+
+    def _build_detection_response(self, image: Optional[Image.Image], results: Dict[str, Any],
+                                  text_queries: Union[str, List[str]],
+                                  box_threshold: float,
+                                  text_threshold: float,
+                                  return_visualization: bool,
+                                  visualization_format: str = "png",
+                                  visualization_quality: int = 85,
+                                  visualization_mode: Optional[str] = None,
+                                  label_thresholds: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        Format detection results into the structured API response
+
+        Args:
+            image: Image the detections refer to (only needed for visualization)
+            results: Detection results from detect_objects
+            text_queries: Original text queries
+            box_threshold: Confidence threshold for bounding boxes
+            text_threshold: Confidence threshold for text matching
+            return_visualization: Whether to return visualization image
+            visualization_format: Visualization image format ("png", "jpeg" or "webp")
+            visualization_quality: Quality for lossy visualization formats
+            visualization_mode: "inline" or "deferred" (defaults to VISUALIZATION_MODE)
+            label_thresholds: Per-query box thresholds requested by the client
+
+        Returns:
+            Dictionary containing detection results and optional visualization
+        """
+        # Check if we have valid results
+        if not results or "boxes" not in results:
+            return {
+                "success": False,
+                "error": "No valid detection results returned",
+                "num_detections": 0,
+                "detections": []
+            }
+
+        # Convert whole tensors once instead of per box
+        boxes = results["boxes"]
+        boxes = boxes.tolist() if hasattr(boxes, 'tolist') else [list(box) for box in boxes]
+        scores = results["scores"]
+        scores = scores.tolist() if hasattr(scores, 'tolist') else [float(score) for score in scores]
+        labels = results["labels"]
+
+        # Format detection results
+        detections = []
+        for i, (box, score, label) in enumerate(zip(boxes, scores, labels)):
+            try:
+                x_min, y_min, x_max, y_max = box
+                confidence = round(score, 3)
+
+                detections.append({
+                    "id": i + 1,
+                    "label": label,
+                    "confidence": confidence,
+                    "bounding_box": {
+                        "x_min": round(float(x_min), 2),
+                        "y_min": round(float(y_min), 2),
+                        "x_max": round(float(x_max), 2),
+                        "y_max": round(float(y_max), 2),
+                        "width": round(float(x_max - x_min), 2),
+                        "height": round(float(y_max - y_min), 2)
+                    }
+                })
+            except Exception as e:
+                print(f"Error processing detection {i}: {e}")
+                continue
+
+        width, height = image.size if image is not None else results["image_size"]
+        response_data = {
+            "success": True,
+            "num_detections": len(detections),
+            "detections": detections,
+            "image_size": {
+                "width": width,
+                "height": height
+            },
+            "queries": self._query_list(text_queries),
+            "thresholds": {
+                "box_threshold": box_threshold,
+                "text_threshold": text_threshold
+            }
+        }
+        if label_thresholds:
+            response_data["thresholds"]["label_thresholds"] = label_thresholds
+        if isinstance(text_queries, DetectorProfile):
+            response_data["profile_id"] = text_queries.profile_id
+
+        # Add visualization if requested
+        if return_visualization and (visualization_mode or VISUALIZATION_MODE) == "deferred":
+            # Store the detections and render on first GET instead of inlining the image
+            try:
+                with self._timed_stage("render"):
+                    response_data["visualization_id"] = self.visualization_store.add(image, results)
+                response_data["visualization_options"] = {
+                    "format": visualization_format,
+                    "quality": visualization_quality
+                }
+            except Exception as e:
+                print(f"Error storing visualization: {e}")
+        elif return_visualization:
+            try:
+                with self._timed_stage("render"):
+                    if VISUALIZATION_RENDERER == "matplotlib":
+                        viz_image = self.create_visualization(image, results)
+                    else:
+                        viz_image = self.render_visualization(image, results)
+
+                    # Encode once and convert to base64 for API response
+                    viz_bytes, viz_format = self.encode_image(
+                        viz_image, visualization_format, visualization_quality
+                    )
+                viz_base64 = base64.b64encode(viz_bytes).decode('utf-8')
+                
+                response_data["visualization"] = {
+                    "image_base64": viz_base64,
+                    "format": viz_format
+                }
+            except Exception as e:
+                print(f"Error creating visualization: {e}")
+                response_data["visualization"] = None
+
+        return response_data
+
+    def get_visualization(self, viz_id: str, image_format: str = "png",
+                          quality: int = 85) -> Optional[Tuple[bytes, str]]:
+        """
+        Render (or fetch the cached rendering of) a deferred visualization
+
+        Args:
+            viz_id: Visualization id from a deferred detection response
+            image_format: "png", "jpeg" or "webp"
+            quality: Quality for lossy formats
+
+        Returns:
+            Tuple of (encoded bytes, format), or None if the visualization is unknown or evicted
+        """
+        render_fn = self.create_visualization if VISUALIZATION_RENDERER == "matplotlib" else self.render_visualization
+        return self.visualization_store.render(viz_id, image_format, quality, render_fn, self.encode_image)
+
     def process_detection(self, image_source: Union[str, Image.Image, bytes], 
                          text_queries: Union[str, List[str]], 
                          box_threshold: float = 0.35,
                          text_threshold: float = 0.35,
-                         return_visualization: bool = True) -> Dict[str, Any]:
+                         return_visualization: bool = True,
+                         visualization_format: str = "png",
+                         visualization_quality: int = 85,
+                         visualization_mode: Optional[str] = None,
+                         tiled: bool = False,
+                         nms_iou: Optional[float] = None,
+                         max_detections: Optional[int] = None,
+                         min_box_area: Optional[float] = None,
+                         label_thresholds: Optional[Dict[str, float]] = None,
+                         profile_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Complete detection pipeline with structured output for API
 
@@ -465,11 +1722,25 @@ class DynamicGroundingDINO:
             box_threshold: Confidence threshold for bounding boxes
             text_threshold: Confidence threshold for text matching
             return_visualization: Whether to return visualization image
+            visualization_format: Visualization image format ("png", "jpeg" or "webp")
+            visualization_quality: Quality for lossy visualization formats
+            visualization_mode: "inline" or "deferred" (defaults to VISUALIZATION_MODE)
+            tiled: Run high-resolution tiled detection for small objects
+            nms_iou: IoU for per-label duplicate suppression (defaults to DETECTION_NMS_IOU, 0 disables)
+            max_detections: Maximum detections returned (defaults to MAX_DETECTIONS, 0 keeps all)
+            min_box_area: Minimum box area in square pixels (defaults to MIN_BOX_AREA)
+            label_thresholds: Box threshold per query, e.g. {"person": 0.5, "spark": 0.2};
+                inference runs once at the lowest threshold and each label is filtered at its own
+            profile_id: Registered profile used instead of text_queries (skips all text preprocessing)
 
         Returns:
             Dictionary containing detection results and optional visualization
         """
         try:
+            if profile_id:
+                text_queries = self.get_profile(profile_id)
+            label_thresholds = normalize_label_thresholds(label_thresholds) or None
+
             # Validate inputs
             if not text_queries or (isinstance(text_queries, list) and len(text_queries) == 0):
                 return {
@@ -480,82 +1751,25 @@ class DynamicGroundingDINO:
                 }
 
             # Run detection
-            image, results = self.detect_objects(
-                image_source, text_queries, box_threshold, text_threshold
+            self._start_timings()
+            search_threshold = search_box_threshold(box_threshold, label_thresholds)
+            if tiled:
+                image, results = self.detect_objects_tiled(image_source, text_queries, search_threshold, text_threshold)
+            else:
+                image, results = self.detect_objects(
+                    image_source, text_queries, search_threshold, text_threshold,
+                    load_image=return_visualization
+                )
+            results = self._refine_results(
+                results, nms_iou, max_detections, min_box_area,
+                self._resolve_label_thresholds(results, text_queries, box_threshold, label_thresholds)
             )
 
-            # Check if we have valid results
-            if not results or "boxes" not in results:
-                return {
-                    "success": False,
-                    "error": "No valid detection results returned",
-                    "num_detections": 0,
-                    "detections": []
-                }
-
-            boxes = results["boxes"]
-            scores = results["scores"]
-            labels = results["labels"]
-
-            # Format detection results
-            detections = []
-            for i, (box, score, label) in enumerate(zip(boxes, scores, labels)):
-                try:
-                    box = box.tolist() if hasattr(box, 'tolist') else box
-                    x_min, y_min, x_max, y_max = box
-                    confidence = round(score.item() if hasattr(score, 'item') else float(score), 3)
-
-                    detections.append({
-                        "id": i + 1,
-                        "label": label,
-                        "confidence": confidence,
-                        "bounding_box": {
-                            "x_min": round(float(x_min), 2),
-                            "y_min": round(float(y_min), 2),
-                            "x_max": round(float(x_max), 2),
-                            "y_max": round(float(y_max), 2),
-                            "width": round(float(x_max - x_min), 2),
-                            "height": round(float(y_max - y_min), 2)
-                        }
-                    })
-                except Exception as e:
-                    print(f"Error processing detection {i}: {e}")
-                    continue
-
-            response_data = {
-                "success": True,
-                "num_detections": len(detections),
-                "detections": detections,
-                "image_size": {
-                    "width": image.size[0],
-                    "height": image.size[1]
-                },
-                "queries": text_queries if isinstance(text_queries, list) else [text_queries],
-                "thresholds": {
-                    "box_threshold": box_threshold,
-                    "text_threshold": text_threshold
-                }
-            }
-
-            # Add visualization if requested
-            if return_visualization:
-                try:
-                    viz_image = self.create_visualization(image, results)
-                    
-                    # Convert to base64 for API response
-                    buf = io.BytesIO()
-                    viz_image.save(buf, format='PNG')
-                    buf.seek(0)
-                    viz_base64 = base64.b64encode(buf.read()).decode('utf-8')
-                    
-                    response_data["visualization"] = {
-                        "image_base64": viz_base64,
-                        "format": "png"
-                    }
-                except Exception as e:
-                    print(f"Error creating visualization: {e}")
-                    response_data["visualization"] = None
-
+            response_data = self._build_detection_response(
+                image, results, text_queries, box_threshold, text_threshold, return_visualization,
+                visualization_format, visualization_quality, visualization_mode, label_thresholds
+            )
+            response_data["timings_ms"] = self._collect_timings()
             return response_data
 
         except Exception as e:
@@ -569,6 +1783,119 @@ class DynamicGroundingDINO:
                 "detections": []
             }
 
+    def process_detection_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Batched detection pipeline with structured output for API
+
+        Each request is a dictionary with the same keys as the process_detection
+        arguments (image_source, text_queries and optionally box_threshold,
+        text_threshold, return_visualization, visualization_format,
+        visualization_quality, visualization_mode, tiled, nms_iou, max_detections,
+        min_box_area, label_thresholds, profile_id). All valid requests share a
+        single forward pass; tiled requests run on their own and invalid ones get an
+        error response without affecting the rest.
+
+        Args:
+            requests: List of detection request dictionaries
+
+        Returns:
+            List of response dictionaries in request order
+        """
+        responses: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+        valid_indices = []
+        tiled_indices = []
+
+        requests = list(requests)
+        for i, req in enumerate(requests):
+            if req.get("label_thresholds"):
+                requests[i] = req = {**req, "label_thresholds": normalize_label_thresholds(req["label_thresholds"])}
+            if req.get("profile_id"):
+                try:
+                    requests[i] = req = {**req, "text_queries": self.get_profile(req["profile_id"]),
+                                         "profile_id": None}
+                except ValueError as e:
+                    responses[i] = {
+                        "success": False,
+                        "error": str(e),
+                        "num_detections": 0,
+                        "detections": []
+                    }
+                    continue
+
+            text_queries = req.get("text_queries")
+            if not text_queries or (isinstance(text_queries, list) and len(text_queries) == 0):
+                responses[i] = {
+                    "success": False,
+                    "error": "No text queries provided",
+                    "num_detections": 0,
+                    "detections": []
+                }
+            elif req.get("tiled"):
+                # Tiled requests already run their tiles as a batch of their own
+                tiled_indices.append(i)
+            else:
+                valid_indices.append(i)
+
+        for i in tiled_indices:
+            responses[i] = self.process_detection(**requests[i])
+
+        if not valid_indices:
+            return responses
+
+        batch = [requests[i] for i in valid_indices]
+        self._start_timings()
+        try:
+            detections = self.detect_objects_batch(
+                [req["image_source"] for req in batch],
+                [req["text_queries"] for req in batch],
+                [search_box_threshold(req.get("box_threshold", 0.35), req.get("label_thresholds"))
+                 for req in batch],
+                [req.get("text_threshold", 0.35) for req in batch],
+                [req.get("return_visualization", True) for req in batch]
+            )
+        except Exception as e:
+            # Fall back to per-request processing so one bad input does not fail the whole batch
+            self._collect_timings()
+            print(f"Batched detection failed, falling back to sequential processing: {e}")
+            for i in valid_indices:
+                responses[i] = self.process_detection(**requests[i])
+            return responses
+
+        # Stage timings up to post-processing are shared by the whole batch
+        batch_timings = self._collect_timings()
+
+        for i, req, (image, results) in zip(valid_indices, batch, detections):
+            try:
+                self._start_timings()
+                results = self._refine_results(
+                    results, req.get("nms_iou"), req.get("max_detections"), req.get("min_box_area"),
+                    self._resolve_label_thresholds(
+                        results, req["text_queries"], req.get("box_threshold", 0.35), req.get("label_thresholds")
+                    )
+                )
+                responses[i] = self._build_detection_response(
+                    image, results, req["text_queries"],
+                    req.get("box_threshold", 0.35),
+                    req.get("text_threshold", 0.35),
+                    req.get("return_visualization", True),
+                    req.get("visualization_format", "png"),
+                    req.get("visualization_quality", 85),
+                    req.get("visualization_mode"),
+                    req.get("label_thresholds")
+                )
+                responses[i]["timings_ms"] = {**batch_timings, **self._collect_timings()}
+            except Exception as e:
+                self._collect_timings()
+                print(f"Process detection error: {str(e)}")
+                responses[i] = {
+                    "success": False,
+                    "error": str(e),
+                    "num_detections": 0,
+                    "detections": []
+                }
+
+        return responses
+
 
 class ModelManager:
     """
@@ -582,10 +1909,22 @@ class ModelManager:
             cls._instance = super(ModelManager, cls).__new__(cls)
         return cls._instance
 
-    def get_model(self, model_id: str = "rziga/mm_grounding_dino_large_all", device: str = "auto") -> DynamicGroundingDINO:
-        """Get or create model instance"""
+    def get_model(self, model_id: str = "rziga/mm_grounding_dino_large_all", device: str = "auto",
+                  precision: Optional[str] = None) -> DynamicGroundingDINO:
+        """
+        Get or create model instance
+
+        Args:
+            model_id: Model identifier from HuggingFace
+            device: Device to run on ("cuda", "cpu", or "auto")
+            precision: "fp32", "bf16" or "int8" (defaults to MODEL_PRECISION); only
+                used when the model is first created
+        """
         if self._model is None:
-            self._model = DynamicGroundingDINO(model_id=model_id, device=device)
+            self._model = DynamicGroundingDINO(model_id=model_id, device=device,
+                                               precision=precision or MODEL_PRECISION)
+        elif precision and precision.lower() != self._model.precision:
+            print(f"Model already loaded with precision '{self._model.precision}', ignoring '{precision}'")
         return self._model
 
     def is_model_loaded(self) -> bool:
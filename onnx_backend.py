@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import fcntl
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import torch
+from transformers.utils import ModelOutput
+
+# ONNX backend configuration
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", os.path.join("cache", "onnx"))
+ONNX_OPSET = int(os.getenv("ONNX_OPSET", "17"))
+# 0 lets ONNX Runtime pick the number of threads
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+ONNX_INTER_OP_THREADS = int(os.getenv("ONNX_INTER_OP_THREADS", "0"))
+# Largest allowed difference in box coordinates and label probabilities between the
+# exported graph and PyTorch before the ONNX backend is rejected
+ONNX_PARITY_ATOL = float(os.getenv("ONNX_PARITY_ATOL", "1e-3"))
+
+INPUT_NAMES = ["input_ids", "token_type_ids", "attention_mask", "pixel_values", "pixel_mask"]
+OUTPUT_NAMES = ["logits", "pred_boxes"]
+DYNAMIC_AXES = {
+    "input_ids": {0: "batch", 1: "text_length"},
+    "token_type_ids": {0: "batch", 1: "text_length"},
+    "attention_mask": {0: "batch", 1: "text_length"},
+    "pixel_values": {0: "batch", 2: "height", 3: "width"},
+    "pixel_mask": {0: "batch", 1: "height", 2: "width"},
+    "logits": {0: "batch"},
+    "pred_boxes": {0: "batch"}
+}
+
+
+@dataclass
+class OnnxDetectionOutput(ModelOutput):
+    """The subset of the detector outputs used by the processor's post-processing"""
+    logits: Optional[torch.Tensor] = None
+    pred_boxes: Optional[torch.Tensor] = None
+    input_ids: Optional[torch.Tensor] = None
+
+
+def _model_input(inputs: Dict[str, torch.Tensor], name: str) -> torch.Tensor:
+    """Return a named model input, defaulting token_type_ids to zeros like the model does"""
+    if name == "token_type_ids" and inputs.get(name) is None:
+        return torch.zeros_like(inputs["input_ids"])
+    return inputs[name]
+
+
+class _ExportWrapper(torch.nn.Module):
+    """Expose the detector as a positional-input, tuple-output module for torch.onnx.export"""
+
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, token_type_ids, attention_mask, pixel_values, pixel_mask):
+        outputs = self.model(input_ids=input_ids, token_type_ids=token_type_ids,
+                             attention_mask=attention_mask, pixel_values=pixel_values,
+                             pixel_mask=pixel_mask, return_dict=True)
+        return outputs.logits, outputs.pred_boxes
+
+
+class OnnxDetectionBackend:
+    """
+    ONNX Runtime inference backend for the Grounding DINO detector.
+
+    The PyTorch model is exported once (dynamic batch, text-length and image-size
+    axes) to ``cache_dir`` and reused on later startups as long as the model id,
+    opset and torch/transformers versions match. Workers starting together
+    serialize the export with a file lock. Pre- and post-processing stay with the
+    Hugging Face processor; only the forward pass runs in ONNX Runtime.
+
+    Tracing records the text attention mask and position ids for the sample prompt's
+    phrase structure, so callers should ``check_parity`` on a different prompt and
+    batch size before routing requests to the session.
+    """
+
+    def __init__(self, model_id: str, device: str = "cpu", cache_dir: str = ONNX_CACHE_DIR,
+                 opset: int = ONNX_OPSET, intra_op_threads: int = ONNX_INTRA_OP_THREADS,
+                 inter_op_threads: int = ONNX_INTER_OP_THREADS):
+        """
+        Initialize the backend
+
+        Args:
+            model_id: Model identifier, used to name the cached artifact
+            device: "cpu" or "cuda" (CUDA requires onnxruntime-gpu)
+            cache_dir: Directory for exported ONNX models
+            opset: ONNX opset version used for the export
+            intra_op_threads: Threads used inside a single operator (0 = ONNX Runtime default)
+            inter_op_threads: Threads used across independent operators (0 = ONNX Runtime default)
+        """
+        import onnxruntime as ort
+
+        self.model_id = model_id
+        self.device = device
+        self.opset = opset
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.directory = os.path.join(cache_dir, model_id.replace("/", "--"))
+        self.model_path = os.path.join(self.directory, f"model-opset{opset}.onnx")
+        self.metadata_path = self.model_path + ".json"
+        self._ort = ort
+        self.session = None
+        self.exported = False
+
+    def _expected_metadata(self) -> Dict[str, Any]:
+        import transformers
+        return {
+            "model_id": self.model_id,
+            "opset": self.opset,
+            "torch_version": torch.__version__,
+            "transformers_version": transformers.__version__
+        }
+
+    def _artifact_is_current(self) -> bool:
+        """Check that a cached export exists and was produced by the same model and library versions"""
+        try:
+            with open(self.metadata_path) as f:
+                metadata = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+        expected = self._expected_metadata()
+        return (os.path.exists(self.model_path)
+                and all(metadata.get(key) == value for key, value in expected.items()))
+
+    def prepare(self, model: torch.nn.Module, sample_inputs: Dict[str, torch.Tensor]):
+        """
+        Export the model if no current artifact is cached, then open an inference session
+
+        Args:
+            model: PyTorch detector in eval mode
+            sample_inputs: Processor outputs used to trace the export
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if not self._artifact_is_current():
+                    self._export(model, sample_inputs)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        self.session = self._create_session()
+
+    def check_parity(self, model: torch.nn.Module, inputs: Dict[str, torch.Tensor],
+                     atol: float = ONNX_PARITY_ATOL):
+        """
+        Compare the session's outputs with the PyTorch model on the same inputs
+
+        Args:
+            model: PyTorch detector in eval mode
+            inputs: Processor outputs; should differ from the trace inputs in prompt and batch size
+            atol: Largest allowed difference in label probabilities and box coordinates
+
+        Raises:
+            ValueError: If the outputs differ by more than atol
+        """
+        with torch.no_grad():
+            expected = model(**inputs, return_dict=True)
+        actual = self.run(inputs)
+
+        # Padded text positions hold -inf logits; comparing probabilities keeps them comparable
+        checks = (
+            ("label probabilities", expected.logits.float().sigmoid().cpu(), actual.logits.float().sigmoid()),
+            ("boxes", expected.pred_boxes.float().cpu(), actual.pred_boxes.float())
+        )
+        for name, reference, candidate in checks:
+            if reference.shape != candidate.shape:
+                raise ValueError(f"ONNX {name} shape {tuple(candidate.shape)} does not match "
+                                 f"PyTorch {tuple(reference.shape)}")
+            difference = (reference - candidate).abs().max().item()
+            if not difference <= atol:
+                raise ValueError(f"ONNX {name} differ from PyTorch by {difference:.2e} (tolerance {atol:.0e})")
+
+    def _export(self, model: torch.nn.Module, sample_inputs: Dict[str, torch.Tensor]):
+        """Export the model to ONNX and record the versions it was produced with"""
+        print(f"Exporting {self.model_id} to ONNX (opset {self.opset}), this runs once...")
+        started = time.time()
+
+        args = tuple(_model_input(sample_inputs, name) for name in INPUT_NAMES)
+        tmp_path = f"{self.model_path}.{os.getpid()}.tmp"
+        wrapper = _ExportWrapper(model).eval()
+        with torch.no_grad():
+            torch.onnx.export(
+                wrapper, args, tmp_path,
+                input_names=INPUT_NAMES,
+                output_names=OUTPUT_NAMES,
+                dynamic_axes=DYNAMIC_AXES,
+                opset_version=self.opset,
+                do_constant_folding=True
+            )
+        os.replace(tmp_path, self.model_path)
+
+        with open(self.metadata_path, "w") as f:
+            json.dump({**self._expected_metadata(), "created_at": time.time()}, f)
+
+        self.exported = True
+        print(f"ONNX export finished in {time.time() - started:.1f}s: {self.model_path}")
+
+    def _create_session(self):
+        """Open an ONNX Runtime session with full graph optimizations and the configured threading"""
+        ort = self._ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        if self.intra_op_threads > 0:
+            options.intra_op_num_threads = self.intra_op_threads
+        if self.inter_op_threads > 0:
+            options.inter_op_num_threads = self.inter_op_threads
+
+        providers = ["CPUExecutionProvider"]
+        if self.device == "cuda" and "CUDAExecutionProvider" in ort.get_available_providers():
+            providers.insert(0, "CUDAExecutionProvider")
+
+        session = ort.InferenceSession(self.model_path, sess_options=options, providers=providers)
+        print(f"ONNX Runtime session ready ({', '.join(session.get_providers())})")
+        return session
+
+    def run(self, inputs: Dict[str, torch.Tensor]) -> OnnxDetectionOutput:
+        """
+        Run the forward pass
+
+        Args:
+            inputs: Processor outputs (as passed to the PyTorch model)
+
+        Returns:
+            Output object with logits, pred_boxes and input_ids for post-processing
+        """
+        feed = {name: _model_input(inputs, name).detach().cpu().numpy() for name in INPUT_NAMES}
+        logits, pred_boxes = self.session.run(OUTPUT_NAMES, feed)
+        return OnnxDetectionOutput(
+            logits=torch.from_numpy(logits),
+            pred_boxes=torch.from_numpy(pred_boxes),
+            input_ids=inputs["input_ids"].cpu()
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Describe the active ONNX Runtime session"""
+        return {
+            "model_path": self.model_path,
+            "opset": self.opset,
+            "exported_this_run": self.exported,
+            "providers": self.session.get_providers() if self.session is not None else [],
+            "intra_op_threads": self.intra_op_threads,
+            "inter_op_threads": self.inter_op_threads
+        }
@@ -0,0 +1,106 @@
+import torch
+from torchvision.ops import batched_nms, box_iou
+from typing import Dict, List, Optional, Tuple
+
+
+def merge_detections(boxes: torch.Tensor, scores: torch.Tensor, labels: List[str],
+                     iou_threshold: float = 0.5,
+                     method: str = "nms") -> Tuple[torch.Tensor, torch.Tensor, List[str]]:
+    """
+    Merge overlapping detections of the same label
+
+    "nms" keeps the highest-scoring box of each overlapping group; "wbf" (weighted
+    boxes fusion) replaces it with the score-weighted average of the group's boxes.
+    Both run vectorized over all labels at once.
+
+    Args:
+        boxes: [N, 4] boxes as (x_min, y_min, x_max, y_max)
+        scores: [N] confidence scores
+        labels: N label strings
+        iou_threshold: IoU above which two boxes of the same label are merged
+        method: "nms" or "wbf"
+
+    Returns:
+        Tuple of (boxes, scores, labels) sorted by descending score
+    """
+    if len(labels) == 0:
+        return boxes, scores, list(labels)
+
+    label_index = {label: i for i, label in enumerate(dict.fromkeys(labels))}
+    label_ids = torch.tensor([label_index[label] for label in labels], device=boxes.device)
+    boxes = boxes.float()
+    scores = scores.float()
+
+    # Kept indices come back sorted by descending score
+    keep = batched_nms(boxes, scores, label_ids, iou_threshold)
+    kept_labels = [labels[i] for i in keep.tolist()]
+
+    if method != "wbf":
+        return boxes[keep], scores[keep], kept_labels
+
+    # Each box joins the highest-scoring kept box of its label that it overlaps;
+    # every suppressed box has one, since NMS suppressed it on that basis
+    overlaps = (box_iou(boxes[keep], boxes) > iou_threshold) & (label_ids[keep][:, None] == label_ids[None, :])
+    overlaps[torch.arange(len(keep), device=boxes.device), keep] = True
+    cluster = overlaps.float().argmax(dim=0)
+
+    weights = boxes.new_zeros((len(keep), len(labels)))
+    weights[cluster, torch.arange(len(labels), device=boxes.device)] = scores
+    fused = (weights @ boxes) / weights.sum(dim=1, keepdim=True)
+    return fused, scores[keep], kept_labels
+
+
+def refine_detections(boxes, scores, labels: List[str],
+                      nms_iou: Optional[float] = None,
+                      max_detections: Optional[int] = None,
+                      min_box_area: float = 0.0,
+                      label_thresholds: Optional[Dict[str, float]] = None) -> Tuple[torch.Tensor, torch.Tensor, List[str]]:
+    """
+    Tensor-level filtering of post-processed detections
+
+    Applies per-label score thresholds and a minimum box area as boolean masks,
+    suppresses duplicates with per-label NMS and keeps the top ``max_detections``
+    by score, so the response only has to be built for the survivors.
+
+    Args:
+        boxes: [N, 4] boxes (tensor or nested lists) as (x_min, y_min, x_max, y_max)
+        scores: [N] confidence scores
+        labels: N label strings
+        nms_iou: IoU above which boxes of the same label are suppressed (None or <= 0 disables NMS)
+        max_detections: Maximum number of detections to keep (None or <= 0 keeps all)
+        min_box_area: Minimum box area in square pixels
+        label_thresholds: Minimum score per label
+
+    Returns:
+        Tuple of (boxes, scores, labels) sorted by descending score
+    """
+    boxes = torch.as_tensor(boxes, dtype=torch.float32).reshape(-1, 4)
+    scores = torch.as_tensor(scores, dtype=torch.float32).reshape(-1).to(boxes.device)
+    labels = list(labels)
+    if not labels:
+        return boxes, scores, labels
+
+    keep = torch.ones(len(labels), dtype=torch.bool, device=boxes.device)
+    if label_thresholds:
+        thresholds = torch.tensor([label_thresholds.get(label, 0.0) for label in labels],
+                                  dtype=scores.dtype, device=scores.device)
+        keep &= scores >= thresholds
+    if min_box_area and min_box_area > 0:
+        widths = (boxes[:, 2] - boxes[:, 0]).clamp(min=0)
+        heights = (boxes[:, 3] - boxes[:, 1]).clamp(min=0)
+        keep &= widths * heights >= min_box_area
+
+    index = keep.nonzero(as_tuple=True)[0]
+    boxes, scores = boxes[index], scores[index]
+    labels = [labels[i] for i in index.tolist()]
+
+    if labels and nms_iou is not None and nms_iou > 0:
+        boxes, scores, labels = merge_detections(boxes, scores, labels, nms_iou, method="nms")
+    else:
+        order = torch.argsort(scores, descending=True)
+        boxes, scores = boxes[order], scores[order]
+        labels = [labels[i] for i in order.tolist()]
+
+    if max_detections is not None and max_detections > 0:
+        boxes, scores, labels = boxes[:max_detections], scores[:max_detections], labels[:max_detections]
+    return boxes, scores, labels
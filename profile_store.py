@@ -0,0 +1,236 @@
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Detector profile storage, shared by the API workers and the queue consumer
+# (must be on a volume both containers mount, see docker-compose.yml)
+PROFILE_STORE_PATH = os.getenv("PROFILE_STORE_PATH", os.path.join("cache", "profiles.db"))
+# Seconds a decoded profile is served from memory; re-registrations made by other
+# processes become visible after at most this long
+PROFILE_CACHE_SECONDS = float(os.getenv("PROFILE_CACHE_SECONDS", "30"))
+
+
+@dataclass(frozen=True)
+class DetectorProfile:
+    """
+    A registered label set with the outputs of the per-request text pipeline.
+
+    ``queries`` are the labels as registered, ``labels`` their translated and
+    formatted model labels, ``chunks`` the token-budgeted groups they run in and
+    ``input_ids`` the tokenized prompt of each chunk.
+    """
+    profile_id: str
+    queries: List[str]
+    labels: List[str]
+    chunks: List[List[str]]
+    input_ids: List[List[int]]
+    name: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+    feature_models: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Public description of the profile (without token ids)"""
+        return {
+            "profile_id": self.profile_id,
+            "name": self.name,
+            "queries": list(self.queries),
+            "labels": list(self.labels),
+            "num_chunks": len(self.chunks),
+            "num_tokens": sum(len(ids) for ids in self.input_ids),
+            "feature_models": list(self.feature_models),
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
+
+
+class ProfileStore:
+    """
+    SQLite-backed registry of detector profiles.
+
+    Profiles and their serialized text features (one blob per chunk, per model
+    configuration) live in one database so every gunicorn worker and the queue
+    consumer see the same profiles, and they survive restarts. Decoded profiles are
+    kept in memory for ``cache_seconds``; writes made by this process invalidate
+    its copy immediately.
+    """
+
+    def __init__(self, db_path: Optional[str] = PROFILE_STORE_PATH,
+                 cache_seconds: float = PROFILE_CACHE_SECONDS, max_cached: int = 1024):
+        """
+        Initialize the store
+
+        Args:
+            db_path: SQLite database path shared between processes
+            cache_seconds: Seconds a decoded profile is served from memory (0 disables)
+            max_cached: Maximum number of profiles kept in memory
+        """
+        self.db_path = db_path
+        self.cache_seconds = cache_seconds
+        self.max_cached = max_cached
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _invalidate(self, profile_id: str):
+        """Drop a profile from the memory cache (caller holds the lock)"""
+        self._cache.pop(profile_id, None)
+
+    def _connection(self):
+        """Return this process's SQLite connection, reconnecting after a fork"""
+        pid = os.getpid()
+        if self._conn is None or self._conn_pid != pid:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS profiles ("
+                "profile_id TEXT PRIMARY KEY, name TEXT, payload TEXT NOT NULL, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS profile_features ("
+                "profile_id TEXT NOT NULL, model_key TEXT NOT NULL, chunk INTEGER NOT NULL, "
+                "features BLOB NOT NULL, PRIMARY KEY (profile_id, model_key, chunk))"
+            )
+            conn.commit()
+            self._conn, self._conn_pid = conn, pid
+        return self._conn
+
+    def put(self, profile_id: str, queries: List[str], labels: List[str], chunks: List[List[str]],
+            input_ids: List[List[int]], name: Optional[str] = None) -> DetectorProfile:
+        """
+        Register or replace a profile; features stored for a previous version are dropped
+
+        Returns:
+            The stored profile
+        """
+        payload = json.dumps(
+            {"queries": queries, "labels": labels, "chunks": chunks, "input_ids": input_ids},
+            ensure_ascii=False
+        )
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT created_at FROM profiles WHERE profile_id = ?", (profile_id,)).fetchone()
+            created_at = row[0] if row is not None else now
+            conn.execute(
+                "INSERT OR REPLACE INTO profiles (profile_id, name, payload, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (profile_id, name, payload, created_at, now)
+            )
+            conn.execute("DELETE FROM profile_features WHERE profile_id = ?", (profile_id,))
+            conn.commit()
+            self._invalidate(profile_id)
+
+        return DetectorProfile(profile_id=profile_id, queries=list(queries), labels=list(labels),
+                               chunks=[list(chunk) for chunk in chunks], input_ids=input_ids,
+                               name=name, created_at=created_at, updated_at=now)
+
+    def get(self, profile_id: str) -> Optional[DetectorProfile]:
+        """Return a profile by id, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(profile_id)
+            if entry is not None and now - entry[0] < self.cache_seconds:
+                self._cache.move_to_end(profile_id)
+                return entry[1]
+
+            try:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT name, payload, created_at, updated_at FROM profiles WHERE profile_id = ?",
+                    (profile_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                feature_models = [r[0] for r in conn.execute(
+                    "SELECT DISTINCT model_key FROM profile_features WHERE profile_id = ?", (profile_id,)
+                )]
+            except sqlite3.Error as e:
+                logger.warning(f"Profile store read failed: {e}")
+                return None
+
+        payload = json.loads(row[1])
+        profile = DetectorProfile(profile_id=profile_id, queries=payload["queries"], labels=payload["labels"],
+                                  chunks=payload["chunks"], input_ids=payload["input_ids"], name=row[0],
+                                  created_at=row[2], updated_at=row[3], feature_models=feature_models)
+        if self.cache_seconds > 0:
+            with self._lock:
+                self._cache[profile_id] = (now, profile)
+                self._cache.move_to_end(profile_id)
+                while len(self._cache) > self.max_cached:
+                    self._cache.popitem(last=False)
+        return profile
+
+    def list(self) -> List[DetectorProfile]:
+        """Return all profiles, most recently updated first"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT profile_id FROM profiles ORDER BY updated_at DESC"
+            ).fetchall()
+        profiles = [self.get(row[0]) for row in rows]
+        return [profile for profile in profiles if profile is not None]
+
+    def delete(self, profile_id: str) -> bool:
+        """Delete a profile and its features; returns False if it did not exist"""
+        with self._lock:
+            conn = self._connection()
+            deleted = conn.execute("DELETE FROM profiles WHERE profile_id = ?", (profile_id,)).rowcount
+            conn.execute("DELETE FROM profile_features WHERE profile_id = ?", (profile_id,))
+            conn.commit()
+            self._invalidate(profile_id)
+        return deleted > 0
+
+    def put_features(self, profile_id: str, model_key: str, features: List[bytes]):
+        """Store serialized text features, one blob per chunk, for a model configuration"""
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO profile_features (profile_id, model_key, chunk, features) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(profile_id, model_key, i, sqlite3.Binary(blob)) for i, blob in enumerate(features)]
+                )
+                conn.commit()
+                self._invalidate(profile_id)
+            except sqlite3.Error as e:
+                logger.warning(f"Profile feature write failed: {e}")
+
+    def get_features(self, profile_id: str, model_key: str) -> Optional[List[bytes]]:
+        """Return serialized text features per chunk for a model configuration, or None"""
+        with self._lock:
+            try:
+                rows = self._connection().execute(
+                    "SELECT features FROM profile_features WHERE profile_id = ? AND model_key = ? ORDER BY chunk",
+                    (profile_id, model_key)
+                ).fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"Profile feature read failed: {e}")
+                return None
+        return [bytes(row[0]) for row in rows] or None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the number of stored profiles"""
+        with self._lock:
+            try:
+                count = self._connection().execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+            except sqlite3.Error:
+                count = None
+        return {"disk_path": self.db_path, "profiles": count, "cached": len(self._cache),
+                "cache_seconds": self.cache_seconds}
+
+
+# Shared store used by the API workers and the queue consumer
+profile_store = ProfileStore()
@@ -9,7 +9,7 @@ from typing import Any, Dict, Callable, Optional
 import base64
 from datetime import datetime
 
-from model import ModelManager
+from model import ModelManager, WARMUP_ON_STARTUP
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -55,7 +55,13 @@ class TaskManager:
 
     def submit_detection_task(self, image_data: Any, image_type: str, text_queries: Any, 
                             box_threshold: float, text_threshold: float, 
-                            return_visualization: bool, priority: int = 5) -> str:
+                            return_visualization: bool, priority: int = 5,
+                            visualization_format: str = "png", visualization_quality: int = 85,
+                            visualization_mode: Optional[str] = None, tiled: bool = False,
+                            nms_iou: Optional[float] = None, max_detections: Optional[int] = None,
+                            min_box_area: Optional[float] = None,
+                            label_thresholds: Optional[Dict[str, float]] = None,
+                            profile_id: Optional[str] = None) -> str:
         """Submit a detection task to the queue"""
         task_id = str(uuid.uuid4())
         
@@ -75,6 +81,15 @@ class TaskManager:
             "box_threshold": box_threshold,
             "text_threshold": text_threshold,
             "return_visualization": return_visualization,
+            "visualization_format": visualization_format,
+            "visualization_quality": visualization_quality,
+            "visualization_mode": visualization_mode,
+            "tiled": tiled,
+            "nms_iou": nms_iou,
+            "max_detections": max_detections,
+            "min_box_area": min_box_area,
+            "label_thresholds": label_thresholds,
+            "profile_id": profile_id,
             "priority": priority,
             "timestamp": datetime.utcnow().isoformat()
         }
@@ -253,7 +268,17 @@ class DetectionConsumer:
                 text_queries=task_data["text_queries"],
                 box_threshold=task_data["box_threshold"],
                 text_threshold=task_data["text_threshold"],
-                return_visualization=task_data["return_visualization"]
+                return_visualization=task_data["return_visualization"],
+                visualization_format=task_data.get("visualization_format", "png"),
+                visualization_quality=task_data.get("visualization_quality", 85),
+                # The visualization store lives in this container; the API cannot serve deferred ids from it
+                visualization_mode="inline",
+                tiled=task_data.get("tiled", False),
+                nms_iou=task_data.get("nms_iou"),
+                max_detections=task_data.get("max_detections"),
+                min_box_area=task_data.get("min_box_area"),
+                label_thresholds=task_data.get("label_thresholds"),
+                profile_id=task_data.get("profile_id")
             )
             
             # Update task with result
@@ -300,8 +325,16 @@ class DetectionConsumer:
         """Start consuming tasks from the queue"""
         try:
             logger.info("Loading Grounding DINO model...")
-            self.model_manager.get_model()
+            model = self.model_manager.get_model()
             logger.info("Model loaded successfully!")
+
+            # Absorb lazy initialization before taking the first task
+            if WARMUP_ON_STARTUP:
+                try:
+                    stats = model.warmup()
+                    logger.info(f"Model warmed up in {stats['total_ms'] / 1000:.1f}s")
+                except Exception as e:
+                    logger.warning(f"Model warmup failed, continuing without it: {e}")
             
             self.channel.basic_qos(prefetch_count=1)
             self.channel.basic_consume(queue=TASK_QUEUE, on_message_callback=self.callback)
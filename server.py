@@ -1,9 +1,10 @@
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException, status, BackgroundTasks
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, confloat
 from typing import List, Optional, Union, Dict, Any
 import uvicorn
+import asyncio
 import io
 import base64
 from PIL import Image
@@ -11,11 +12,20 @@ import logging
 import os
 import sys
 from datetime import datetime
+from contextlib import asynccontextmanager
 import tempfile
 import shutil
 import requests
+import hashlib
+import json
 
-from model import ModelManager, DynamicGroundingDINO
+from model import ModelManager, DynamicGroundingDINO, WARMUP_ON_STARTUP
+from translation import get_aift_breaker_stats, get_translation_backend_stats, get_translation_cache_stats
+from batch_scheduler import DetectionBatchScheduler
+from image_fetcher import image_fetcher
+from inference_executor import InferenceExecutor, InferenceQueueFullError
+from profile_store import profile_store
+from single_flight import SingleFlight
 
 # Configure logging
 logging.basicConfig(
@@ -50,6 +60,18 @@ logger.info(f"Worker process started with PID: {WORKER_ID}")
 ENABLE_QUEUE = os.getenv("ENABLE_QUEUE", "true").lower() == "true"
 RABBITMQ_HOST = os.getenv("RABBITMQ_HOST", "team06-mq")
 
+# Dynamic micro-batching configuration
+ENABLE_BATCHING = os.getenv("ENABLE_BATCHING", "true").lower() == "true"
+BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", "20"))
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "8"))
+
+# Inference executor configuration (blocking model calls run off the event loop)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "32"))
+
+# Coalesce identical concurrent detection requests into one computation
+ENABLE_COALESCING = os.getenv("ENABLE_COALESCING", "true").lower() == "true"
+
 # Import queue worker only if queue is enabled
 task_manager = None
 TaskManager = None
@@ -83,6 +105,18 @@ app.add_middleware(
 # Global model manager
 model_manager = ModelManager()
 
+# Global inference executor shared by detection and video endpoints
+inference_executor = InferenceExecutor(max_workers=INFERENCE_WORKERS, max_pending=INFERENCE_QUEUE_SIZE)
+
+# Global micro-batching scheduler (started per worker on startup)
+detection_scheduler = None
+
+# Global startup warmup task; /health reports "warming_up" until it finishes
+warmup_task = None
+
+# Global single-flight group for identical in-flight detection requests
+detection_single_flight = SingleFlight() if ENABLE_COALESCING else None
+
 # Global video action detector manager
 video_action_detector = None
 
@@ -111,10 +145,19 @@ else:
 class DetectionRequest(BaseModel):
     """Request model for URL-based detection"""
     image_url: str = Field(..., description="URL of the image to analyze")
-    text_queries: Union[str, List[str]] = Field(..., description="Text queries for object detection")
+    text_queries: Optional[Union[str, List[str]]] = Field(None, description="Text queries for object detection (or use profile_id)")
+    profile_id: Optional[str] = Field(None, description="Registered detector profile used instead of text_queries")
     box_threshold: Optional[float] = Field(0.4, ge=0.0, le=1.0, description="Confidence threshold for bounding boxes")
     text_threshold: Optional[float] = Field(0.3, ge=0.0, le=1.0, description="Confidence threshold for text matching")
     return_visualization: Optional[bool] = Field(True, description="Whether to return visualization image")
+    visualization_format: Optional[str] = Field("png", pattern="^(png|jpeg|jpg|webp)$", description="Visualization image format (png, jpeg or webp)")
+    visualization_quality: Optional[int] = Field(85, ge=1, le=100, description="Quality for jpeg/webp visualizations")
+    visualization_mode: Optional[str] = Field(None, pattern="^(inline|deferred)$", description="inline (base64 in response) or deferred (visualization_url rendered on first GET)")
+    tiled: Optional[bool] = Field(False, description="Tiled high-resolution detection for small objects (slower, bounded cost per tile)")
+    nms_iou: Optional[float] = Field(None, ge=0.0, le=1.0, description="IoU for per-label duplicate suppression (0 disables, default from server config)")
+    max_detections: Optional[int] = Field(None, ge=0, description="Maximum detections returned (0 keeps all, default from server config)")
+    min_box_area: Optional[float] = Field(None, ge=0.0, description="Minimum box area in square pixels")
+    label_thresholds: Optional[Dict[str, confloat(ge=0.0, le=1.0)]] = Field(None, description="Box threshold per query, e.g. {\"person\": 0.5, \"spark\": 0.2}; queries without an entry use box_threshold")
     async_processing: Optional[bool] = Field(False, description="Whether to process asynchronously using queue")
     priority: Optional[int] = Field(5, ge=0, le=9, description="Task priority (0-9, higher is more priority)")
 
@@ -122,10 +165,19 @@ class DetectionRequest(BaseModel):
 class AsyncDetectionRequest(BaseModel):
     """Request model for async detection operations"""
     image_url: str = Field(..., description="URL of the image to analyze")
-    text_queries: Union[str, List[str]] = Field(..., description="Text queries for object detection")
+    text_queries: Optional[Union[str, List[str]]] = Field(None, description="Text queries for object detection (or use profile_id)")
+    profile_id: Optional[str] = Field(None, description="Registered detector profile used instead of text_queries")
     box_threshold: Optional[float] = Field(0.4, ge=0.0, le=1.0, description="Confidence threshold for bounding boxes")
     text_threshold: Optional[float] = Field(0.3, ge=0.0, le=1.0, description="Confidence threshold for text matching")
     return_visualization: Optional[bool] = Field(True, description="Whether to return visualization image")
+    visualization_format: Optional[str] = Field("png", pattern="^(png|jpeg|jpg|webp)$", description="Visualization image format (png, jpeg or webp)")
+    visualization_quality: Optional[int] = Field(85, ge=1, le=100, description="Quality for jpeg/webp visualizations")
+    visualization_mode: Optional[str] = Field(None, pattern="^(inline|deferred)$", description="inline (base64 in response) or deferred (visualization_url rendered on first GET)")
+    tiled: Optional[bool] = Field(False, description="Tiled high-resolution detection for small objects (slower, bounded cost per tile)")
+    nms_iou: Optional[float] = Field(None, ge=0.0, le=1.0, description="IoU for per-label duplicate suppression (0 disables, default from server config)")
+    max_detections: Optional[int] = Field(None, ge=0, description="Maximum detections returned (0 keeps all, default from server config)")
+    min_box_area: Optional[float] = Field(None, ge=0.0, description="Minimum box area in square pixels")
+    label_thresholds: Optional[Dict[str, confloat(ge=0.0, le=1.0)]] = Field(None, description="Box threshold per query, e.g. {\"person\": 0.5, \"spark\": 0.2}; queries without an entry use box_threshold")
     priority: Optional[int] = Field(5, ge=0, le=9, description="Task priority (0-9, higher is more priority)")
 
 
@@ -175,6 +227,7 @@ class Thresholds(BaseModel):
     """Detection thresholds"""
     box_threshold: float
     text_threshold: float
+    label_thresholds: Optional[Dict[str, float]] = None
 
 
 class Visualization(BaseModel):
@@ -192,9 +245,33 @@ class DetectionResponse(BaseModel):
     queries: Optional[List[str]] = None
     thresholds: Optional[Thresholds] = None
     visualization: Optional[Visualization] = None
+    visualization_id: Optional[str] = None
+    visualization_url: Optional[str] = None
+    timings_ms: Optional[Dict[str, float]] = None
+    profile_id: Optional[str] = None
     error: Optional[str] = None
 
 
+class ProfileRequest(BaseModel):
+    """Request model for registering a detector profile"""
+    text_queries: Union[str, List[str]] = Field(..., description="Text queries making up the profile")
+    profile_id: Optional[str] = Field(None, pattern="^[A-Za-z0-9_.-]{1,64}$", description="Profile id (defaults to a digest of the queries)")
+    name: Optional[str] = Field(None, max_length=200, description="Human-readable profile name")
+
+
+class ProfileResponse(BaseModel):
+    """A registered detector profile"""
+    profile_id: str
+    name: Optional[str] = None
+    queries: List[str]
+    labels: List[str]
+    num_chunks: int
+    num_tokens: int
+    feature_models: List[str]
+    created_at: float
+    updated_at: float
+
+
 class TaskStatusResponse(BaseModel):
     """Response for task status check"""
     task_id: str
@@ -278,18 +355,47 @@ async def startup_event():
     """Initialize model on startup"""
     try:
         logger.info(f"Worker {WORKER_ID}: Loading DynamicGroundingDINO model...")
-        model_manager.get_model()
+        model = model_manager.get_model()
         logger.info(f"Worker {WORKER_ID}: Model loaded successfully!")
     except Exception as e:
         logger.error(f"Worker {WORKER_ID}: Failed to load model: {e}")
         raise e
 
+    global detection_scheduler
+    if ENABLE_BATCHING:
+        detection_scheduler = DetectionBatchScheduler(
+            model.process_detection_batch,
+            max_batch_size=MAX_BATCH_SIZE,
+            window_ms=BATCH_WINDOW_MS,
+            runner=inference_executor.run_batch
+        )
+        detection_scheduler.start()
+
+    global warmup_task
+    if WARMUP_ON_STARTUP:
+        warmup_task = asyncio.create_task(warmup_model(model))
+
+
+async def warmup_model(model: DynamicGroundingDINO):
+    """Run the model warmup on the inference threads so it is serialized with real requests"""
+    try:
+        logger.info(f"Worker {WORKER_ID}: Warming up model...")
+        stats = await inference_executor.run(model.warmup)
+        logger.info(f"Worker {WORKER_ID}: Model warmed up in {stats['total_ms'] / 1000:.1f}s")
+    except Exception as e:
+        logger.error(f"Worker {WORKER_ID}: Model warmup failed, serving without it: {e}")
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info(f"Worker {WORKER_ID}: Shutting down...")
     try:
+        if warmup_task is not None and not warmup_task.done():
+            warmup_task.cancel()
+        if detection_scheduler is not None:
+            await detection_scheduler.stop()
+        inference_executor.shutdown()
         # Cleanup model resources if needed
         if model_manager.is_model_loaded():
             logger.info(f"Worker {WORKER_ID}: Cleaning up model resources...")
@@ -366,6 +472,10 @@ curl -X GET "http://localhost:8000/task/{task_id}"'''
             <span class="method">POST</span> <strong>/detect/upload</strong> - Detect objects from uploaded image (sync{'/async' if queue_available else ''})
         </div>
         
+        <div class="endpoint">
+            <span class="method">GET</span> <strong>/visualizations/{{viz_id}}</strong> - Get detection visualization image (rendered on first request)
+        </div>
+        
         {f'''<div class="endpoint">
             <span class="method">POST</span> <strong>/detect/async</strong> - Submit async detection task
         </div>
@@ -379,6 +489,10 @@ curl -X GET "http://localhost:8000/task/{task_id}"'''
             <span class="method">GET</span> <strong>/task/{{task_id}}</strong> - Get task status and result
         </div>
         
+        <div class="endpoint">
+            <span class="method">GET</span> <strong>/task/{{task_id}}/visualization</strong> - Get task visualization image
+        </div>
+        
         <div class="endpoint">
             <span class="method">DELETE</span> <strong>/task/{{task_id}}</strong> - Cancel task
         </div>
@@ -396,6 +510,26 @@ curl -X GET "http://localhost:8000/task/{task_id}"'''
             <span class="method">GET</span> <strong>/model/info</strong> - Get model information
         </div>
         
+        <div class="endpoint">
+            <span class="method">GET</span> <strong>/inference/stats</strong> - Get inference executor statistics
+        </div>
+        
+        <div class="endpoint">
+            <span class="method">GET</span> <strong>/batching/stats</strong> - Get micro-batching statistics
+        </div>
+        
+        <div class="endpoint">
+            <span class="method">GET</span> <strong>/coalescing/stats</strong> - Get request coalescing statistics
+        </div>
+        
+        <div class="endpoint">
+            <span class="method">POST</span> <strong>/profiles</strong> - Register a detector profile (label set prepared once, referenced by profile_id in /detect)
+        </div>
+        
+        <div class="endpoint">
+            <span class="method">GET</span> <strong>/profiles</strong> - List detector profiles (also GET/DELETE /profiles/{{profile_id}})
+        </div>
+        
         <h3>📚 Documentation</h3>
         <ul>
             <li><a href="/docs">Interactive API Documentation (Swagger UI)</a></li>
@@ -414,6 +548,168 @@ curl -X GET "http://localhost:8000/task/{task_id}"'''
     return html_content
 
 
+@asynccontextmanager
+async def inference_admission():
+    """Reserve an inference slot, translating a full queue into 503 with Retry-After"""
+    try:
+        async with inference_executor.admission():
+            yield
+    except InferenceQueueFullError as e:
+        logger.warning(f"Worker {WORKER_ID}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Server is busy: {str(e)}. Please retry later.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+def attach_visualization_url(result: Dict[str, Any], path: Optional[str] = None) -> Dict[str, Any]:
+    """Replace a deferred visualization id with the URL that renders it"""
+    viz_id = result.get("visualization_id")
+    if not viz_id:
+        return result
+
+    options = result.pop("visualization_options", None) or {}
+    query = f"format={options.get('format', 'png')}&quality={options.get('quality', 85)}"
+    result["visualization_url"] = f"{path or f'/visualizations/{viz_id}'}?{query}"
+    return result
+
+
+def detection_request_key(request: Dict[str, Any]) -> str:
+    """Identity of a detection request: image source (URL or upload bytes), queries and options"""
+    image_source = request["image_source"]
+    digest = hashlib.sha256(image_source if isinstance(image_source, bytes) else image_source.encode("utf-8"))
+    options = {key: value for key, value in request.items() if key != "image_source"}
+    digest.update(json.dumps(options, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def parse_label_thresholds(raw: Optional[str]) -> Optional[Dict[str, float]]:
+    """
+    Parse the JSON per-query threshold map sent with form uploads
+
+    Raises:
+        HTTPException: 400 when the value is not an object of thresholds between 0.0 and 1.0
+    """
+    if not raw:
+        return None
+    try:
+        parsed = json.loads(raw)
+    except ValueError:
+        parsed = None
+    if (not isinstance(parsed, dict)
+            or not all(isinstance(v, (int, float)) and not isinstance(v, bool) and 0.0 <= v <= 1.0
+                       for v in parsed.values())):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="label_thresholds must be a JSON object mapping queries to thresholds between 0.0 and 1.0"
+        )
+    return {str(k): float(v) for k, v in parsed.items()} or None
+
+
+async def check_detection_queries(text_queries: Optional[Union[str, List[str]]], profile_id: Optional[str]):
+    """
+    Require either text queries or a registered profile
+
+    Raises:
+        HTTPException: 400 when neither is given, 404 when the profile is unknown
+    """
+    if profile_id:
+        if await asyncio.to_thread(profile_store.get, profile_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Profile '{profile_id}' not found"
+            )
+    elif not text_queries:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either text_queries or profile_id is required"
+        )
+
+
+async def run_detection(image_source: Union[str, bytes], text_queries: Optional[Union[str, List[str]]],
+                        box_threshold: float, text_threshold: float,
+                        return_visualization: bool, visualization_format: str = "png",
+                        visualization_quality: int = 85,
+                        visualization_mode: Optional[str] = None,
+                        tiled: bool = False,
+                        nms_iou: Optional[float] = None,
+                        max_detections: Optional[int] = None,
+                        min_box_area: Optional[float] = None,
+                        label_thresholds: Optional[Dict[str, float]] = None,
+                        profile_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run a synchronous detection off the event loop, through the micro-batching
+    scheduler when enabled
+
+    Identical requests arriving while one is in flight share its result instead
+    of running their own forward pass.
+
+    Raises:
+        HTTPException: 503 with Retry-After when the inference queue is full
+    """
+    request = {
+        "image_source": image_source,
+        "text_queries": text_queries,
+        "box_threshold": box_threshold,
+        "text_threshold": text_threshold,
+        "return_visualization": return_visualization,
+        "visualization_format": visualization_format,
+        "visualization_quality": visualization_quality,
+        "visualization_mode": visualization_mode,
+        "tiled": tiled,
+        "nms_iou": nms_iou,
+        "max_detections": max_detections,
+        "min_box_area": min_box_area,
+        "label_thresholds": label_thresholds,
+        "profile_id": profile_id
+    }
+    if detection_single_flight is None:
+        return await _run_detection(request)
+
+    key = detection_request_key(request)
+    return await detection_single_flight.do(key, lambda: _run_detection(request))
+
+
+async def _run_detection(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Admit and run one detection request (keyword arguments of process_detection)"""
+    async with inference_admission():
+        if detection_scheduler is not None:
+            result = await detection_scheduler.submit(request)
+        else:
+            model = model_manager.get_model()
+            result = await inference_executor.run(model.process_detection, **request)
+
+    return attach_visualization_url(result)
+
+
+async def run_inference(fn, *args, **kwargs):
+    """Run a blocking model call on the inference executor with bounded admission"""
+    async with inference_admission():
+        return await inference_executor.run(fn, *args, **kwargs)
+
+
+def process_video_action(video_path: str, prompt: str, person_weight: float, action_weight: float,
+                         context_weight: float, similarity_threshold: float,
+                         action_threshold: float) -> Dict[str, Any]:
+    """Create an ActionDetector with custom weights and process a video (blocking)"""
+    # Create temporary ActionDetector with custom weights
+    temp_detector = ActionDetector(
+        person_weight=person_weight,
+        action_weight=action_weight,
+        context_weight=context_weight,
+        similarity_threshold=similarity_threshold,
+        action_threshold=action_threshold
+    )
+
+    # Process video - no file saving needed
+    return temp_detector.process_video(
+        video_path=video_path,
+        prompt=prompt,
+        save_files=False
+    )
+
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
@@ -425,6 +721,13 @@ async def health_check():
         # Log video action status for debugging
         logger.info(f"Health check - Video action available: {video_action_available}, loaded: {video_action_loaded}")
         
+        if model_loaded and warmup_task is not None and not warmup_task.done():
+            return HealthResponse(
+                status="warming_up",
+                model_loaded=True,
+                message=f"API is running and model is warming up (Worker PID: {WORKER_ID})"
+            )
+
         if model_loaded:
             status_msg = f"API is running and model is loaded (Worker PID: {WORKER_ID})"
             if video_action_available and video_action_loaded:
@@ -461,13 +764,24 @@ async def detect_objects_from_url(request: DetectionRequest):
     
     - **image_url**: URL of the image to analyze
     - **text_queries**: Text descriptions of objects to detect (string or list of strings)
+    - **profile_id**: Registered detector profile used instead of text_queries
     - **box_threshold**: Confidence threshold for bounding boxes (0.0 to 1.0)
     - **text_threshold**: Confidence threshold for text matching (0.0 to 1.0)
     - **return_visualization**: Whether to return visualization image as base64
+    - **visualization_format**: Visualization image format (png, jpeg or webp)
+    - **visualization_quality**: Quality for jpeg/webp visualizations (1-100)
+    - **visualization_mode**: inline (base64 in response) or deferred (visualization_url rendered on first GET)
+    - **tiled**: Run overlapping high-resolution tiles to find small objects
+    - **nms_iou**: IoU for per-label duplicate suppression (0 disables)
+    - **max_detections**: Maximum number of detections returned (0 keeps all)
+    - **min_box_area**: Minimum box area in square pixels
+    - **label_thresholds**: Box threshold per query; one inference runs at the lowest threshold
     - **async_processing**: Whether to process asynchronously using queue (if enabled)
     - **priority**: Task priority for async processing (0-9, higher is more priority)
     """
     try:
+        await check_detection_queries(request.text_queries, request.profile_id)
+
         # Check if async processing is requested and queue is enabled
         if request.async_processing and ENABLE_QUEUE and task_manager:
             # Submit to queue
@@ -478,6 +792,15 @@ async def detect_objects_from_url(request: DetectionRequest):
                 box_threshold=request.box_threshold,
                 text_threshold=request.text_threshold,
                 return_visualization=request.return_visualization,
+                visualization_format=request.visualization_format,
+                visualization_quality=request.visualization_quality,
+                visualization_mode=request.visualization_mode,
+                tiled=request.tiled,
+                nms_iou=request.nms_iou,
+                max_detections=request.max_detections,
+                min_box_area=request.min_box_area,
+                label_thresholds=request.label_thresholds,
+                profile_id=request.profile_id,
                 priority=request.priority
             )
             
@@ -492,16 +815,22 @@ async def detect_objects_from_url(request: DetectionRequest):
         if request.async_processing and (not ENABLE_QUEUE or not task_manager):
             logger.warning("Async processing requested but queue is disabled or unavailable, processing synchronously")
         
-        # Get model instance
-        model = model_manager.get_model()
-        
         # Process detection
-        result = model.process_detection(
+        result = await run_detection(
             image_source=request.image_url,
             text_queries=request.text_queries,
             box_threshold=request.box_threshold,
             text_threshold=request.text_threshold,
-            return_visualization=request.return_visualization
+            return_visualization=request.return_visualization,
+            visualization_format=request.visualization_format,
+            visualization_quality=request.visualization_quality,
+            visualization_mode=request.visualization_mode,
+            tiled=request.tiled,
+            nms_iou=request.nms_iou,
+            max_detections=request.max_detections,
+            min_box_area=request.min_box_area,
+            label_thresholds=request.label_thresholds,
+            profile_id=request.profile_id
         )
         
         if not result["success"]:
@@ -525,10 +854,19 @@ async def detect_objects_from_url(request: DetectionRequest):
 @app.post("/detect/upload", response_model=Union[DetectionResponse, TaskSubmissionResponse])
 async def detect_objects_from_upload(
     file: UploadFile = File(..., description="Image file to analyze"),
-    text_queries: str = Form(..., description="Comma-separated text queries for object detection"),
+    text_queries: Optional[str] = Form(None, description="Comma-separated text queries for object detection (or use profile_id)"),
+    profile_id: Optional[str] = Form(None, description="Registered detector profile used instead of text_queries"),
     box_threshold: float = Form(0.4, description="Confidence threshold for bounding boxes"),
     text_threshold: float = Form(0.3, description="Confidence threshold for text matching"),
     return_visualization: bool = Form(True, description="Whether to return visualization image"),
+    visualization_format: str = Form("png", description="Visualization image format (png, jpeg or webp)"),
+    visualization_quality: int = Form(85, description="Quality for jpeg/webp visualizations (1-100)"),
+    visualization_mode: Optional[str] = Form(None, description="inline (base64 in response) or deferred (visualization_url rendered on first GET)"),
+    tiled: bool = Form(False, description="Tiled high-resolution detection for small objects"),
+    nms_iou: Optional[float] = Form(None, ge=0.0, le=1.0, description="IoU for per-label duplicate suppression (0 disables)"),
+    max_detections: Optional[int] = Form(None, ge=0, description="Maximum detections returned (0 keeps all)"),
+    min_box_area: Optional[float] = Form(None, ge=0.0, description="Minimum box area in square pixels"),
+    label_thresholds: Optional[str] = Form(None, description='JSON object of per-query box thresholds, e.g. {"person": 0.5}'),
     async_processing: bool = Form(False, description="Whether to process asynchronously using queue"),
     priority: int = Form(5, description="Task priority (0-9, higher is more priority)")
 ):
@@ -537,9 +875,18 @@ async def detect_objects_from_upload(
     
     - **file**: Image file (JPEG, PNG, etc.)
     - **text_queries**: Comma-separated text descriptions of objects to detect
+    - **profile_id**: Registered detector profile used instead of text_queries
     - **box_threshold**: Confidence threshold for bounding boxes (0.0 to 1.0)
     - **text_threshold**: Confidence threshold for text matching (0.0 to 1.0)
     - **return_visualization**: Whether to return visualization image as base64
+    - **visualization_format**: Visualization image format (png, jpeg or webp)
+    - **visualization_quality**: Quality for jpeg/webp visualizations (1-100)
+    - **visualization_mode**: inline (base64 in response) or deferred (visualization_url rendered on first GET)
+    - **tiled**: Run overlapping high-resolution tiles to find small objects
+    - **nms_iou**: IoU for per-label duplicate suppression (0 disables)
+    - **max_detections**: Maximum number of detections returned (0 keeps all)
+    - **min_box_area**: Minimum box area in square pixels
+    - **label_thresholds**: Box threshold per query; one inference runs at the lowest threshold
     - **async_processing**: Whether to process asynchronously using queue (if enabled)
     - **priority**: Task priority for async processing (0-9, higher is more priority)
     """
@@ -555,13 +902,30 @@ async def detect_objects_from_upload(
         contents = await file.read()
         
         # Parse text queries
-        queries_list = [q.strip() for q in text_queries.split(",") if q.strip()]
-        if not queries_list:
+        queries_list = [q.strip() for q in (text_queries or "").split(",") if q.strip()]
+        await check_detection_queries(queries_list, profile_id)
+        
+        # Validate visualization options
+        if visualization_format.lower() not in ("png", "jpeg", "jpg", "webp"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="visualization_format must be one of png, jpeg or webp"
+            )
+        
+        if not (1 <= visualization_quality <= 100):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="visualization_quality must be between 1 and 100"
+            )
+        
+        if visualization_mode is not None and visualization_mode not in ("inline", "deferred"):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="At least one text query is required"
+                detail="visualization_mode must be inline or deferred"
             )
         
+        thresholds_map = parse_label_thresholds(label_thresholds)
+        
         # Validate thresholds
         if not (0.0 <= box_threshold <= 1.0):
             raise HTTPException(
@@ -585,6 +949,15 @@ async def detect_objects_from_upload(
                 box_threshold=box_threshold,
                 text_threshold=text_threshold,
                 return_visualization=return_visualization,
+                visualization_format=visualization_format,
+                visualization_quality=visualization_quality,
+                visualization_mode=visualization_mode,
+                tiled=tiled,
+                nms_iou=nms_iou,
+                max_detections=max_detections,
+                min_box_area=min_box_area,
+                label_thresholds=thresholds_map,
+                profile_id=profile_id,
                 priority=priority
             )
             
@@ -599,16 +972,22 @@ async def detect_objects_from_upload(
         if async_processing and (not ENABLE_QUEUE or not task_manager):
             logger.warning("Async processing requested but queue is disabled or unavailable, processing synchronously")
         
-        # Get model instance
-        model = model_manager.get_model()
-        
         # Process detection
-        result = model.process_detection(
+        result = await run_detection(
             image_source=contents,
             text_queries=queries_list,
             box_threshold=box_threshold,
             text_threshold=text_threshold,
-            return_visualization=return_visualization
+            return_visualization=return_visualization,
+            visualization_format=visualization_format,
+            visualization_quality=visualization_quality,
+            visualization_mode=visualization_mode,
+            tiled=tiled,
+            nms_iou=nms_iou,
+            max_detections=max_detections,
+            min_box_area=min_box_area,
+            label_thresholds=thresholds_map,
+            profile_id=profile_id
         )
         
         if not result["success"]:
@@ -636,9 +1015,18 @@ async def submit_async_detection_url(request: AsyncDetectionRequest):
     
     - **image_url**: URL of the image to analyze
     - **text_queries**: Text descriptions of objects to detect
+    - **profile_id**: Registered detector profile used instead of text_queries
     - **box_threshold**: Confidence threshold for bounding boxes (0.0 to 1.0)
     - **text_threshold**: Confidence threshold for text matching (0.0 to 1.0)
     - **return_visualization**: Whether to return visualization image as base64
+    - **visualization_format**: Visualization image format (png, jpeg or webp)
+    - **visualization_quality**: Quality for jpeg/webp visualizations (1-100)
+    - **visualization_mode**: inline (base64 in response) or deferred (visualization_url rendered on first GET)
+    - **tiled**: Run overlapping high-resolution tiles to find small objects
+    - **nms_iou**: IoU for per-label duplicate suppression (0 disables)
+    - **max_detections**: Maximum number of detections returned (0 keeps all)
+    - **min_box_area**: Minimum box area in square pixels
+    - **label_thresholds**: Box threshold per query; one inference runs at the lowest threshold
     - **priority**: Task priority (0-9, higher is more priority)
     """
     if not ENABLE_QUEUE or not task_manager:
@@ -648,6 +1036,8 @@ async def submit_async_detection_url(request: AsyncDetectionRequest):
         )
     
     try:
+        await check_detection_queries(request.text_queries, request.profile_id)
+
         task_id = task_manager.submit_detection_task(
             image_data=request.image_url,
             image_type="url",
@@ -655,6 +1045,15 @@ async def submit_async_detection_url(request: AsyncDetectionRequest):
             box_threshold=request.box_threshold,
             text_threshold=request.text_threshold,
             return_visualization=request.return_visualization,
+            visualization_format=request.visualization_format,
+            visualization_quality=request.visualization_quality,
+            visualization_mode=request.visualization_mode,
+            tiled=request.tiled,
+            nms_iou=request.nms_iou,
+            max_detections=request.max_detections,
+            min_box_area=request.min_box_area,
+            label_thresholds=request.label_thresholds,
+            profile_id=request.profile_id,
             priority=request.priority
         )
         
@@ -675,10 +1074,19 @@ async def submit_async_detection_url(request: AsyncDetectionRequest):
 @app.post("/detect/async/upload", response_model=TaskSubmissionResponse)
 async def submit_async_detection_upload(
     file: UploadFile = File(..., description="Image file to analyze"),
-    text_queries: str = Form(..., description="Comma-separated text queries for object detection"),
+    text_queries: Optional[str] = Form(None, description="Comma-separated text queries for object detection (or use profile_id)"),
+    profile_id: Optional[str] = Form(None, description="Registered detector profile used instead of text_queries"),
     box_threshold: float = Form(0.4, description="Confidence threshold for bounding boxes"),
     text_threshold: float = Form(0.3, description="Confidence threshold for text matching"),
     return_visualization: bool = Form(True, description="Whether to return visualization image"),
+    visualization_format: str = Form("png", description="Visualization image format (png, jpeg or webp)"),
+    visualization_quality: int = Form(85, description="Quality for jpeg/webp visualizations (1-100)"),
+    visualization_mode: Optional[str] = Form(None, description="inline (base64 in response) or deferred (visualization_url rendered on first GET)"),
+    tiled: bool = Form(False, description="Tiled high-resolution detection for small objects"),
+    nms_iou: Optional[float] = Form(None, ge=0.0, le=1.0, description="IoU for per-label duplicate suppression (0 disables)"),
+    max_detections: Optional[int] = Form(None, ge=0, description="Maximum detections returned (0 keeps all)"),
+    min_box_area: Optional[float] = Form(None, ge=0.0, description="Minimum box area in square pixels"),
+    label_thresholds: Optional[str] = Form(None, description='JSON object of per-query box thresholds, e.g. {"person": 0.5}'),
     priority: int = Form(5, description="Task priority (0-9, higher is more priority)")
 ):
     """
@@ -686,9 +1094,18 @@ async def submit_async_detection_upload(
     
     - **file**: Image file (JPEG, PNG, etc.)
     - **text_queries**: Comma-separated text descriptions of objects to detect
+    - **profile_id**: Registered detector profile used instead of text_queries
     - **box_threshold**: Confidence threshold for bounding boxes (0.0 to 1.0)
     - **text_threshold**: Confidence threshold for text matching (0.0 to 1.0)
     - **return_visualization**: Whether to return visualization image as base64
+    - **visualization_format**: Visualization image format (png, jpeg or webp)
+    - **visualization_quality**: Quality for jpeg/webp visualizations (1-100)
+    - **visualization_mode**: inline (base64 in response) or deferred (visualization_url rendered on first GET)
+    - **tiled**: Run overlapping high-resolution tiles to find small objects
+    - **nms_iou**: IoU for per-label duplicate suppression (0 disables)
+    - **max_detections**: Maximum number of detections returned (0 keeps all)
+    - **min_box_area**: Minimum box area in square pixels
+    - **label_thresholds**: Box threshold per query; one inference runs at the lowest threshold
     - **priority**: Task priority (0-9, higher is more priority)
     """
     if not ENABLE_QUEUE or not task_manager:
@@ -709,13 +1126,30 @@ async def submit_async_detection_upload(
         contents = await file.read()
         
         # Parse text queries
-        queries_list = [q.strip() for q in text_queries.split(",") if q.strip()]
-        if not queries_list:
+        queries_list = [q.strip() for q in (text_queries or "").split(",") if q.strip()]
+        await check_detection_queries(queries_list, profile_id)
+        
+        # Validate visualization options
+        if visualization_format.lower() not in ("png", "jpeg", "jpg", "webp"):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="At least one text query is required"
+                detail="visualization_format must be one of png, jpeg or webp"
             )
         
+        if not (1 <= visualization_quality <= 100):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="visualization_quality must be between 1 and 100"
+            )
+        
+        if visualization_mode is not None and visualization_mode not in ("inline", "deferred"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="visualization_mode must be inline or deferred"
+            )
+        
+        thresholds_map = parse_label_thresholds(label_thresholds)
+        
         task_id = task_manager.submit_detection_task(
             image_data=contents,
             image_type="bytes",
@@ -723,6 +1157,15 @@ async def submit_async_detection_upload(
             box_threshold=box_threshold,
             text_threshold=text_threshold,
             return_visualization=return_visualization,
+            visualization_format=visualization_format,
+            visualization_quality=visualization_quality,
+            visualization_mode=visualization_mode,
+            tiled=tiled,
+            nms_iou=nms_iou,
+            max_detections=max_detections,
+            min_box_area=min_box_area,
+            label_thresholds=thresholds_map,
+            profile_id=profile_id,
             priority=priority
         )
         
@@ -742,6 +1185,56 @@ async def submit_async_detection_upload(
         )
 
 
+async def render_visualization_response(viz_id: str, image_format: str, quality: int) -> Response:
+    """Render a deferred visualization off the event loop and return it as an image response"""
+    if image_format.lower() not in ("png", "jpeg", "jpg", "webp"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="format must be one of png, jpeg or webp"
+        )
+    if not (1 <= quality <= 100):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="quality must be between 1 and 100"
+        )
+
+    model = model_manager.get_model()
+    rendered = await asyncio.to_thread(model.get_visualization, viz_id, image_format, quality)
+    if rendered is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Visualization not found or expired"
+        )
+
+    data, image_format = rendered
+    return Response(
+        content=data,
+        media_type=f"image/{image_format}",
+        headers={"Cache-Control": "public, max-age=86400, immutable"}
+    )
+
+
+@app.get("/visualizations/{viz_id}")
+async def get_visualization(viz_id: str, format: str = "png", quality: int = 85):
+    """
+    Get a deferred detection visualization, rendered on first request
+
+    - **viz_id**: Visualization ID from a detection response
+    - **format**: Image format (png, jpeg or webp)
+    - **quality**: Quality for jpeg/webp (1-100)
+    """
+    try:
+        return await render_visualization_response(viz_id, format, quality)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to render visualization: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to render visualization: {str(e)}"
+        )
+
+
 @app.get("/task/{task_id}", response_model=TaskStatusResponse)
 async def get_task_status(task_id: str):
     """
@@ -770,7 +1263,10 @@ async def get_task_status(task_id: str):
         
         # Add result if completed successfully
         if result["status"] == "completed" and "result" in result:
-            response_data["result"] = DetectionResponse(**result["result"])
+            task_result = attach_visualization_url(
+                dict(result["result"]), path=f"/task/{task_id}/visualization"
+            )
+            response_data["result"] = DetectionResponse(**task_result)
         
         return TaskStatusResponse(**response_data)
         
@@ -782,6 +1278,53 @@ async def get_task_status(task_id: str):
         )
 
 
+@app.get("/task/{task_id}/visualization")
+async def get_task_visualization(task_id: str, format: str = "png", quality: int = 85):
+    """
+    Get the visualization image of a completed task
+
+    Queued tasks render their visualization inline in the consumer, so the stored
+    image is returned as is; format and quality only apply to deferred ids.
+
+    - **task_id**: ID of the task
+    - **format**: Image format (png, jpeg or webp)
+    - **quality**: Quality for jpeg/webp (1-100)
+    """
+    if not ENABLE_QUEUE or not task_manager:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Queue processing is disabled or unavailable."
+        )
+    
+    try:
+        result = task_manager.get_task_result(task_id)
+        task_result = result.get("result") or {}
+        visualization = task_result.get("visualization")
+        if result["status"] == "completed" and visualization:
+            return Response(
+                content=base64.b64decode(visualization["image_base64"]),
+                media_type=f"image/{visualization['format']}"
+            )
+
+        viz_id = task_result.get("visualization_id")
+        if result["status"] != "completed" or not viz_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No visualization available for this task"
+            )
+        
+        return await render_visualization_response(viz_id, format, quality)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to render task visualization: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to render visualization: {str(e)}"
+        )
+
+
 @app.delete("/task/{task_id}")
 async def cancel_task(task_id: str):
     """
@@ -865,7 +1408,20 @@ async def get_model_info():
             model = model_manager.get_model()
             info["grounding_dino"].update({
                 "device": model.device,
-                "model_id": "onnx-community/grounding-dino-tiny-ONNX"
+                "inference_backend": model.backend,
+                "precision": model.precision,
+                "onnx_backend": model.get_onnx_backend_stats(),
+                "torch_compile": model.is_compiled,
+                "warmup": model.warmup_stats,
+                "model_id": "onnx-community/grounding-dino-tiny-ONNX",
+                "text_feature_cache": model.get_text_feature_cache_stats(),
+                "vision_feature_cache": model.get_vision_feature_cache_stats(),
+                "result_cache": model.get_result_cache_stats(),
+                "translation_cache": get_translation_cache_stats(),
+                "aift_circuit_breaker": get_aift_breaker_stats(),
+                "translation_backend": get_translation_backend_stats(),
+                "image_fetcher": image_fetcher.get_stats(),
+                "profiles": model.get_profile_stats()
             })
         
         return info
@@ -878,6 +1434,109 @@ async def get_model_info():
         )
 
 
+@app.get("/inference/stats")
+async def get_inference_stats():
+    """Get inference executor admission statistics"""
+    return {
+        "worker_pid": WORKER_ID,
+        **inference_executor.get_stats()
+    }
+
+
+@app.post("/profiles", response_model=ProfileResponse)
+async def register_profile(request: ProfileRequest):
+    """
+    Register a detector profile: a label set whose translation, formatting,
+    tokenization and text features are computed once and reused by /detect
+
+    - **text_queries**: Text descriptions of objects to detect
+    - **profile_id**: Profile id (defaults to a digest of the queries; re-registering replaces it)
+    - **name**: Human-readable profile name
+    """
+    if not request.text_queries:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one text query is required"
+        )
+
+    try:
+        model = model_manager.get_model()
+        profile = await run_inference(
+            model.register_profile, request.text_queries, request.profile_id, request.name
+        )
+        return ProfileResponse(**profile)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Profile registration failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Profile registration failed: {str(e)}"
+        )
+
+
+@app.get("/profiles", response_model=List[ProfileResponse])
+async def list_profiles():
+    """List registered detector profiles, most recently updated first"""
+    profiles = await asyncio.to_thread(profile_store.list)
+    return [ProfileResponse(**profile.to_dict()) for profile in profiles]
+
+
+@app.get("/profiles/{profile_id}", response_model=ProfileResponse)
+async def get_profile(profile_id: str):
+    """Get a registered detector profile"""
+    profile = await asyncio.to_thread(profile_store.get, profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile '{profile_id}' not found"
+        )
+    return ProfileResponse(**profile.to_dict())
+
+
+@app.delete("/profiles/{profile_id}")
+async def delete_profile(profile_id: str):
+    """Delete a registered detector profile"""
+    if not await asyncio.to_thread(profile_store.delete, profile_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile '{profile_id}' not found"
+        )
+    return {"profile_id": profile_id, "deleted": True}
+
+
+@app.get("/coalescing/stats")
+async def get_coalescing_stats():
+    """Get single-flight coalescing statistics for identical in-flight detection requests"""
+    if detection_single_flight is None:
+        return {
+            "enabled": False,
+            "worker_pid": WORKER_ID
+        }
+
+    return {
+        "enabled": True,
+        "worker_pid": WORKER_ID,
+        **detection_single_flight.get_stats()
+    }
+
+
+@app.get("/batching/stats")
+async def get_batching_stats():
+    """Get micro-batching statistics (batch sizes and queue wait percentiles)"""
+    if detection_scheduler is None:
+        return {
+            "enabled": False,
+            "worker_pid": WORKER_ID
+        }
+
+    return {
+        "enabled": True,
+        "worker_pid": WORKER_ID,
+        **detection_scheduler.get_stats()
+    }
+
+
 # ============================================================================
 # VIDEO ACTION DETECTION ENDPOINTS
 # ============================================================================
@@ -910,11 +1569,14 @@ async def detect_video_action_from_url(request: VideoActionRequest):
     try:
         # Download video from URL (direct URLs only, no YouTube support)
         logger.info(f"Downloading video from URL: {request.video_url}")
-        temp_video_path, video_info = download_video_from_url(request.video_url)
+        temp_video_path, video_info = await asyncio.to_thread(download_video_from_url, request.video_url)
         logger.info(f"� Video downloaded: {video_info.get('title', 'Unknown')}")
         
-        # Create temporary ActionDetector with custom weights
-        temp_detector = ActionDetector(
+        # Process video on the inference executor
+        results = await run_inference(
+            process_video_action,
+            video_path=temp_video_path,
+            prompt=request.prompt,
             person_weight=request.person_weight,
             action_weight=request.action_weight,
             context_weight=request.context_weight,
@@ -922,13 +1584,6 @@ async def detect_video_action_from_url(request: VideoActionRequest):
             action_threshold=request.action_threshold
         )
         
-        # Process video - no file saving needed
-        results = temp_detector.process_video(
-            video_path=temp_video_path,
-            prompt=request.prompt,
-            save_files=False
-        )
-        
         # Clean up temporary file
         os.unlink(temp_video_path)
         
@@ -960,6 +1615,11 @@ async def detect_video_action_from_url(request: VideoActionRequest):
         logger.info(f"Video action detection completed successfully. Job ID: {results['job_id']}")
         return response_data
         
+    except HTTPException:
+        # Clean up temporary file if it exists
+        if 'temp_video_path' in locals() and os.path.exists(temp_video_path):
+            os.unlink(temp_video_path)
+        raise
     except requests.RequestException as e:
         logger.error(f"Failed to download video: {e}")
         raise HTTPException(
@@ -1037,11 +1697,14 @@ async def detect_video_action_from_url(request: VideoActionRequest):
         
         # Download video from URL (direct URLs only, no YouTube support)
         logger.info(f"Downloading video from URL: {request.video_url}")
-        temp_video_path, video_info = download_video_from_url(request.video_url)
+        temp_video_path, video_info = await asyncio.to_thread(download_video_from_url, request.video_url)
         logger.info(f"� Video downloaded: {video_info.get('title', 'Unknown')}")
         
-        # Create temporary ActionDetector with custom weights
-        temp_detector = ActionDetector(
+        # Process video on the inference executor
+        results = await run_inference(
+            process_video_action,
+            video_path=temp_video_path,
+            prompt=request.prompt,
             person_weight=request.person_weight,
             action_weight=request.action_weight,
             context_weight=request.context_weight,
@@ -1049,13 +1712,6 @@ async def detect_video_action_from_url(request: VideoActionRequest):
             action_threshold=request.action_threshold
         )
         
-        # Process video - no file saving needed
-        results = temp_detector.process_video(
-            video_path=temp_video_path,
-            prompt=request.prompt,
-            save_files=False
-        )
-        
         # Clean up temporary file
         os.unlink(temp_video_path)
         
@@ -1088,6 +1744,9 @@ async def detect_video_action_from_url(request: VideoActionRequest):
         return response_data
         
     except HTTPException:
+        # Clean up temporary file if it exists
+        if 'temp_video_path' in locals() and os.path.exists(temp_video_path):
+            os.unlink(temp_video_path)
         raise
     except Exception as e:
         logger.error(f"Video action detection failed: {e}")
@@ -1191,8 +1850,11 @@ async def detect_video_action_from_upload(
                 detail=f"Failed to process uploaded file: {str(e)}"
             )
         
-        # Create temporary ActionDetector with custom weights
-        temp_detector = ActionDetector(
+        # Process video on the inference executor
+        results = await run_inference(
+            process_video_action,
+            video_path=temp_video_path,
+            prompt=prompt,
             person_weight=person_weight,
             action_weight=action_weight,
             context_weight=context_weight,
@@ -1200,13 +1862,6 @@ async def detect_video_action_from_upload(
             action_threshold=action_threshold
         )
         
-        # Process video - no file saving needed
-        results = temp_detector.process_video(
-            video_path=temp_video_path,
-            prompt=prompt,
-            save_files=False
-        )
-        
         # Clean up temporary file
         os.unlink(temp_video_path)
         
@@ -1239,6 +1894,9 @@ async def detect_video_action_from_upload(
         return response_data
         
     except HTTPException:
+        # Clean up temporary file if it exists
+        if locals().get('temp_video_path') and os.path.exists(temp_video_path):
+            os.unlink(temp_video_path)
         raise
     except Exception as e:
         logger.error(f"Video upload action detection failed: {e}")
@@ -0,0 +1,67 @@
+import asyncio
+import copy
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls into one in-flight computation.
+
+    The first caller for a key (the leader) starts the computation; callers that
+    arrive with the same key while it is still running (followers) await the same
+    task and receive a deep copy of its result, or the same exception. The key is
+    forgotten as soon as the computation finishes, so later calls start afresh.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+        # Statistics
+        self.leaders = 0
+        self.followers = 0
+        self.errors = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn once for all concurrent callers sharing key
+
+        Args:
+            key: Identity of the computation
+            fn: Zero-argument coroutine function performing the computation
+
+        Returns:
+            The computation's result (a private copy for followers)
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+            # Shield so a disconnecting leader does not cancel the work its followers wait on
+            return await asyncio.shield(task)
+
+        self.followers += 1
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        """Forget a finished computation"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics"""
+        total = self.leaders + self.followers
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "errors": self.errors,
+            "coalesced_rate": round(self.followers / total, 4) if total else 0.0
+        }
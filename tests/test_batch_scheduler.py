@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+
+from batch_scheduler import DetectionBatchScheduler
+from inference_executor import InferenceExecutor
+
+
+def run_with_scheduler(batch_fn, scenario, **kwargs):
+    async def main():
+        scheduler = DetectionBatchScheduler(batch_fn, **kwargs)
+        scheduler.start()
+        try:
+            return await scenario(scheduler)
+        finally:
+            await scheduler.stop()
+
+    return asyncio.run(main())
+
+
+def test_concurrent_requests_share_a_batch_and_keep_their_order():
+    batches = []
+
+    def batch_fn(requests):
+        batches.append(len(requests))
+        return [{"id": request["id"]} for request in requests]
+
+    async def scenario(scheduler):
+        return await asyncio.gather(*(scheduler.submit({"id": i}) for i in range(3)))
+
+    responses = run_with_scheduler(batch_fn, scenario, max_batch_size=8, window_ms=50)
+    assert responses == [{"id": 0}, {"id": 1}, {"id": 2}]
+    assert batches == [3]
+
+
+def test_batches_are_capped_at_max_batch_size():
+    batches = []
+
+    def batch_fn(requests):
+        batches.append(len(requests))
+        return requests
+
+    async def scenario(scheduler):
+        await asyncio.gather(*(scheduler.submit({"id": i}) for i in range(5)))
+        return scheduler.get_stats()
+
+    stats = run_with_scheduler(batch_fn, scenario, max_batch_size=2, window_ms=50)
+    assert batches == [2, 2, 1]
+    assert stats["total_requests"] == 5
+    assert stats["batch_size_histogram"] == {1: 1, 2: 2}
+
+
+def test_a_lone_request_runs_when_the_window_closes():
+    async def scenario(scheduler):
+        started = time.perf_counter()
+        response = await scheduler.submit({"id": 0})
+        return response, time.perf_counter() - started
+
+    response, elapsed = run_with_scheduler(lambda requests: requests, scenario, max_batch_size=8, window_ms=30)
+    assert response == {"id": 0}
+    assert 0.025 <= elapsed < 1.0
+
+
+def test_batch_errors_reach_every_caller_and_the_loop_keeps_running():
+    def batch_fn(requests):
+        if any(request.get("fail") for request in requests):
+            raise RuntimeError("model failed")
+        return requests
+
+    async def scenario(scheduler):
+        failed = await asyncio.gather(scheduler.submit({"fail": True}), scheduler.submit({"id": 1}),
+                                      return_exceptions=True)
+        recovered = await scheduler.submit({"id": 2})
+        return failed, recovered
+
+    failed, recovered = run_with_scheduler(batch_fn, scenario, max_batch_size=8, window_ms=20)
+    assert all(isinstance(result, RuntimeError) for result in failed)
+    assert recovered == {"id": 2}
+
+
+def test_submit_requires_a_running_scheduler():
+    scheduler = DetectionBatchScheduler(lambda requests: requests)
+    with pytest.raises(RuntimeError):
+        asyncio.run(scheduler.submit({"id": 0}))
+
+
+def test_batches_run_through_the_inference_executor_and_count_per_request():
+    executor = InferenceExecutor(max_workers=1, max_pending=8)
+    batches = []
+
+    def batch_fn(requests):
+        batches.append(len(requests))
+        time.sleep(0.04)
+        return requests
+
+    async def scenario(scheduler):
+        return await asyncio.gather(*(scheduler.submit({"id": i}) for i in range(4)))
+
+    try:
+        responses = run_with_scheduler(batch_fn, scenario, max_batch_size=4, window_ms=50,
+                                       runner=executor.run_batch)
+    finally:
+        executor.shutdown()
+
+    assert responses == [{"id": i} for i in range(4)]
+    assert batches == [4]
+    # One batch of four records four per-request shares of its duration
+    assert len(executor._durations) == 4
+    assert 0.005 <= executor.get_stats()["avg_job_seconds"] < 0.04
@@ -0,0 +1,123 @@
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from caches import LRUCache, ResultCache, TranslationCache
+
+
+def test_lru_cache_evicts_the_least_recently_used_entry():
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.get_stats()["misses"] == 0
+    assert cache.get("b") is None
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_lru_cache_with_no_capacity_stores_nothing():
+    cache = LRUCache(max_size=0)
+    cache.put("a", 1)
+    assert len(cache) == 0
+    assert cache.get("a", "default") == "default"
+
+
+def test_translation_cache_shares_entries_through_the_disk_tier(tmp_path):
+    db_path = str(tmp_path / "translations.db")
+    TranslationCache(db_path=db_path).put("แมว", "cat", latency=0.5)
+
+    cache = TranslationCache(db_path=db_path)
+    assert cache.get("แมว") == "cat"
+    assert cache.get("แมว") == "cat"
+    assert cache.get("หมา") is None
+
+    stats = cache.get_stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["saved_seconds"] == pytest.approx(1.0)
+
+
+def test_translation_cache_memory_tier_is_bounded():
+    cache = TranslationCache(max_size=1, db_path=None)
+    cache.put("แมว", "cat")
+    cache.put("หมา", "dog")
+    assert cache.get("แมว") is None
+    assert cache.get("หมา") == "dog"
+
+
+def test_translation_cache_threads_use_their_own_connections(tmp_path):
+    cache = TranslationCache(max_size=0, db_path=str(tmp_path / "translations.db"))
+    cache.put("แมว", "cat")
+
+    def lookup(label):
+        return cache.get(label), cache._connection()
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        translated, connection = pool.submit(lookup, "แมว").result()
+
+    assert translated == "cat"
+    assert connection is not cache._connection()
+    assert cache.get_stats()["disk_hits"] == 1
+
+
+def test_translation_cache_lookups_can_skip_the_statistics(tmp_path):
+    cache = TranslationCache(db_path=str(tmp_path / "translations.db"))
+    cache.put("แมว", "cat")
+
+    assert cache.get("แมว", record=False) == "cat"
+    assert cache.get("หมา", record=False) is None
+    assert cache.get_stats()["memory_hits"] == cache.get_stats()["misses"] == 0
+
+
+def make_result_cache(tmp_path, **kwargs):
+    return ResultCache(db_path=str(tmp_path / "results.db"), **kwargs)
+
+
+RESULT = {"boxes": [[0.0, 0.0, 10.0, 10.0]], "scores": [0.9], "labels": ["Person"], "image_size": [640, 480]}
+
+
+def test_result_keys_depend_on_every_input():
+    key = ResultCache.make_key("digest", ["Person"], 0.35, 0.25, "model")
+    assert key == ResultCache.make_key("digest", ["Person"], 0.35, 0.25, "model")
+    assert key != ResultCache.make_key("digest", ["Person"], 0.4, 0.25, "model")
+    assert key != ResultCache.make_key("digest", ["Car"], 0.35, 0.25, "model")
+    assert key != ResultCache.make_key("digest", ["Person"], 0.35, 0.25, "other")
+
+
+def test_result_cache_returns_private_copies_with_the_image_size(tmp_path):
+    cache = make_result_cache(tmp_path)
+    cache.put("key", {**RESULT, "image_size": (640, 480), "query_labels": ["Person"]})
+    cached = cache.get("key")
+    cached["labels"].append("Car")
+
+    assert cache.get("key") == RESULT
+    assert ResultCache(db_path=cache.db_path).get("key") == RESULT
+
+
+def test_result_cache_entries_expire(tmp_path):
+    cache = make_result_cache(tmp_path, ttl=0.05)
+    cache.put("key", RESULT)
+    time.sleep(0.06)
+    assert cache.get("key") is None
+    assert ResultCache(db_path=cache.db_path, ttl=0.05).get("key") is None
+
+
+def test_disabled_result_cache_stores_nothing(tmp_path):
+    cache = make_result_cache(tmp_path, ttl=0)
+    cache.put("key", RESULT)
+    assert cache.get("key") is None
+
+
+def test_result_cache_disk_tier_is_trimmed_to_max_entries(tmp_path):
+    cache = make_result_cache(tmp_path, max_entries=2)
+    for i in range(100):
+        cache.put(f"key-{i}", RESULT)
+
+    with sqlite3.connect(cache.db_path) as conn:
+        count = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+    assert count == 2
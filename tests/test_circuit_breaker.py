@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def fail():
+    raise ConnectionError("service down")
+
+
+def test_breaker_opens_after_consecutive_failures_and_rejects_calls():
+    breaker = CircuitBreaker("test", timeout=1, failure_threshold=2, reset_timeout=60)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call("translate", fail)
+    assert breaker.state == "open"
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call("translate", calls.append, 1)
+    assert calls == []
+    assert breaker.get_stats()["rejected"] == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker("test", timeout=1, failure_threshold=2, reset_timeout=60)
+    with pytest.raises(ConnectionError):
+        breaker.call("translate", fail)
+    assert breaker.call("translate", lambda: "ok") == "ok"
+    with pytest.raises(ConnectionError):
+        breaker.call("translate", fail)
+    assert breaker.state == "closed"
+
+
+def test_half_open_probe_reopens_on_failure_and_closes_on_success():
+    breaker = CircuitBreaker("test", timeout=1, failure_threshold=1, reset_timeout=0.05)
+    with pytest.raises(ConnectionError):
+        breaker.call("translate", fail)
+    time.sleep(0.06)
+    with pytest.raises(ConnectionError):
+        breaker.call("translate", fail)
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert breaker.call("translate", lambda: "ok") == "ok"
+    assert breaker.state == "closed"
+
+
+def test_only_one_probe_is_let_through_while_half_open():
+    breaker = CircuitBreaker("test", timeout=1, failure_threshold=1, reset_timeout=0)
+    with pytest.raises(ConnectionError):
+        breaker.call("translate", fail)
+
+    probe = breaker._before_call()
+    assert probe is True and breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.call("translate", lambda: "ok")
+
+
+def test_slow_calls_time_out_and_count_as_failures():
+    breaker = CircuitBreaker("test", timeout=0.05, failure_threshold=5, reset_timeout=60)
+    with pytest.raises(TimeoutError):
+        breaker.call("translate", time.sleep, 0.3)
+
+    stats = breaker.get_stats()
+    assert stats["timeouts"] == 1
+    assert stats["consecutive_failures"] == 1
+    assert sum(stats["latency_histograms"]["translate"].values()) == 1
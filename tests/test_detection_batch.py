@@ -0,0 +1,141 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+model = pytest.importorskip("model", reason="model.py needs the full inference stack")
+
+
+def make_detector():
+    """A detector with the pipeline stages around the forward pass, but no model loaded"""
+    detector = model.DynamicGroundingDINO.__new__(model.DynamicGroundingDINO)
+    detector._stage_timings = threading.local()
+    detector.model_id = "test-model"
+    detector.onnx_backend = None
+    detector.precision = "fp32"
+    detector.result_cache = model.ResultCache(db_path=None)
+    detector.vision_feature_cache = SimpleNamespace(max_bytes=0)
+    detector._load_image_source = lambda source, max_size=None: source
+    detector._prepare_text_labels = lambda queries: (list(queries), [query.title() for query in queries])
+
+    detector.infer_calls = []
+
+    def infer(images, text_labels, box_thresholds, text_thresholds, image_digests=None):
+        detector.infer_calls.append({"images": len(images), "labels": [list(labels) for labels in text_labels],
+                                     "box_thresholds": list(box_thresholds)})
+        return [{"boxes": [[0.0, 0.0, 1.0, 1.0]], "scores": [0.9], "labels": labels[:1]} for labels in text_labels]
+
+    detector._infer = infer
+    return detector
+
+
+def image(color):
+    return Image.new("RGB", (8, 8), color)
+
+
+def test_batch_runs_all_images_in_one_forward_pass_in_input_order():
+    detector = make_detector()
+    detections = detector.detect_objects_batch(
+        [image("red"), image("blue")], [["cat"], ["dog", "bird"]], [0.3, 0.4], 0.25
+    )
+
+    assert detector.infer_calls == [{"images": 2, "labels": [["Cat"], ["Dog", "Bird"]], "box_thresholds": [0.3, 0.4]}]
+    assert [results["labels"] for _, results in detections] == [["Cat"], ["Dog"]]
+    assert [results["query_labels"] for _, results in detections] == [["Cat"], ["Dog", "Bird"]]
+
+
+def test_batch_only_runs_result_cache_misses():
+    detector = make_detector()
+    detector.detect_objects_batch([image("red")], [["cat"]])
+    detections = detector.detect_objects_batch([image("red"), image("blue")], [["cat"], ["cat"]])
+
+    assert [call["images"] for call in detector.infer_calls] == [1, 1]
+    assert [results["labels"] for _, results in detections] == [["Cat"], ["Cat"]]
+
+
+def test_repeats_are_served_before_decoding_or_translating():
+    detector = make_detector()
+    decoded, translated = [], []
+    detector._load_image_source = lambda source, max_size=None: decoded.append(source) or image("red")
+    detector._prepare_text_labels = lambda queries: translated.append(queries) or (list(queries), ["Cat"])
+    detector._cached_text_labels = lambda queries: (list(queries), ["Cat"]) if translated else None
+
+    detector.detect_objects(b"encoded", ["แมว"])
+    _, results = detector.detect_objects(b"encoded", ["แมว"], load_image=False)
+    image_again, _ = detector.detect_objects(b"encoded", ["แมว"])
+
+    assert len(detector.infer_calls) == 1
+    assert decoded == [b"encoded", b"encoded"] and len(translated) == 1
+    assert results["image_size"] == [8, 8] and results["query_labels"] == ["Cat"]
+    assert image_again.size == (8, 8)
+
+
+def test_batch_validates_its_inputs():
+    detector = make_detector()
+    assert detector.detect_objects_batch([], []) == []
+    with pytest.raises(ValueError):
+        detector.detect_objects_batch([image("red")], [["cat"], ["dog"]])
+
+
+def make_pipeline():
+    """A detector whose batch pipeline records how requests are routed"""
+    detector = make_detector()
+    detector.batched, detector.sequential = [], []
+
+    def detect_objects_batch(sources, queries, box_thresholds, text_thresholds, load_images):
+        detector.batched.append(list(sources))
+        if "broken" in sources:
+            raise ValueError("cannot decode image")
+        return [(source, {"labels": list(q)}) for source, q in zip(sources, queries)]
+
+    def process_detection(**request):
+        detector.sequential.append(request["image_source"])
+        return {"success": True, "path": "sequential", "source": request["image_source"]}
+
+    def get_profile(profile_id):
+        if profile_id != "shop":
+            raise ValueError(f"Unknown profile '{profile_id}'")
+        return ["person", "forklift"]
+
+    detector.detect_objects_batch = detect_objects_batch
+    detector.process_detection = process_detection
+    detector.get_profile = get_profile
+    detector._refine_results = lambda results, *args: results
+    detector._resolve_label_thresholds = lambda *args: None
+    detector._build_detection_response = lambda image, results, queries, *args: {
+        "success": True, "path": "batched", "source": image, "labels": results["labels"]
+    }
+    return detector
+
+
+def test_batch_pipeline_routes_each_request_and_keeps_request_order():
+    detector = make_pipeline()
+    responses = detector.process_detection_batch([
+        {"image_source": "a", "text_queries": ["cat"]},
+        {"image_source": "b", "text_queries": []},
+        {"image_source": "c", "text_queries": ["dog"], "tiled": True},
+        {"image_source": "d", "profile_id": "shop"},
+        {"image_source": "e", "profile_id": "missing"},
+    ])
+
+    assert detector.batched == [["a", "d"]]
+    assert detector.sequential == ["c"]
+    assert [response["success"] for response in responses] == [True, False, True, True, False]
+    assert responses[0]["labels"] == ["cat"]
+    assert responses[1]["error"] == "No text queries provided"
+    assert responses[2]["path"] == "sequential"
+    assert responses[3]["labels"] == ["person", "forklift"]
+    assert "missing" in responses[4]["error"]
+    assert "timings_ms" in responses[0]
+
+
+def test_batch_pipeline_falls_back_to_sequential_when_the_batch_fails():
+    detector = make_pipeline()
+    responses = detector.process_detection_batch([
+        {"image_source": "a", "text_queries": ["cat"]},
+        {"image_source": "broken", "text_queries": ["dog"]},
+    ])
+
+    assert detector.sequential == ["a", "broken"]
+    assert [response["path"] for response in responses] == ["sequential", "sequential"]
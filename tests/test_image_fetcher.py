@@ -0,0 +1,87 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from image_fetcher import ImageFetcher, ImageTooLargeError
+
+BODY = b"\x89PNG fake image body"
+
+# Response headers per path
+RESPONSES = {
+    "/etag": {"ETag": '"v1"'},
+    "/fresh": {"ETag": '"v1"', "Cache-Control": "max-age=60"},
+    "/no-store": {"ETag": '"v1"', "Cache-Control": "no-store"},
+    "/plain": {},
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.hits.append(self.path)
+        headers = RESPONSES.get(self.path, {})
+        if headers.get("ETag") and self.headers.get("If-None-Match") == headers["ETag"]:
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+
+        body = BODY * 100 if self.path == "/large" else BODY
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.hits = []
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def fetch_twice(server, fetcher, path):
+    url = f"http://127.0.0.1:{server.server_port}{path}"
+    assert fetcher.fetch(url) == BODY
+    assert fetcher.fetch(url) == BODY
+    return len([hit for hit in server.hits if hit == path])
+
+
+def test_responses_with_validators_are_revalidated(server, tmp_path):
+    fetcher = ImageFetcher(cache_dir=str(tmp_path))
+    assert fetch_twice(server, fetcher, "/etag") == 2
+    assert fetcher.get_stats()["revalidated_hits"] == 1
+
+
+def test_max_age_responses_are_served_without_a_request(server, tmp_path):
+    fetcher = ImageFetcher(cache_dir=str(tmp_path))
+    assert fetch_twice(server, fetcher, "/fresh") == 1
+    assert fetcher.get_stats()["fresh_hits"] == 1
+
+
+@pytest.mark.parametrize("path", ["/no-store", "/plain"])
+def test_uncacheable_responses_are_downloaded_again(server, tmp_path, path):
+    fetcher = ImageFetcher(cache_dir=str(tmp_path))
+    assert fetch_twice(server, fetcher, path) == 2
+    assert fetcher.get_stats()["downloads"] == 2
+
+
+def test_fresh_seconds_does_not_override_missing_validators(server, tmp_path):
+    fetcher = ImageFetcher(cache_dir=str(tmp_path), fresh_seconds=60)
+    assert fetch_twice(server, fetcher, "/plain") == 2
+
+
+def test_oversized_images_are_rejected(server, tmp_path):
+    fetcher = ImageFetcher(cache_dir=str(tmp_path), max_image_bytes=len(BODY) * 10)
+    with pytest.raises(ImageTooLargeError):
+        fetcher.fetch(f"http://127.0.0.1:{server.server_port}/large")
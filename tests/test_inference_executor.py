@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+import pytest
+
+from inference_executor import InferenceExecutor, InferenceQueueFullError
+
+
+def test_submit_runs_off_the_event_loop_and_records_durations():
+    executor = InferenceExecutor(max_workers=1, max_pending=2)
+
+    async def scenario():
+        return await executor.submit(threading.current_thread)
+
+    try:
+        thread = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert thread.name.startswith("inference")
+    stats = executor.get_stats()
+    assert (stats["admitted"], stats["completed"], stats["pending"]) == (1, 1, 0)
+    assert stats["avg_job_seconds"] is not None
+
+
+def test_requests_beyond_max_pending_are_rejected_with_retry_after():
+    executor = InferenceExecutor(max_workers=1, max_pending=1)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(executor.submit(release.wait, 5))
+        await asyncio.sleep(0.02)
+        with pytest.raises(InferenceQueueFullError) as error:
+            await executor.submit(lambda: None)
+        release.set()
+        await first
+        return error.value
+
+    try:
+        error = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert error.retry_after >= 1
+    assert executor.get_stats()["rejected"] == 1
+
+
+def test_retry_after_scales_with_pending_requests_per_worker():
+    executor = InferenceExecutor(max_workers=2, max_pending=8)
+    executor._durations.extend([3.0, 3.0])
+    for _ in range(4):
+        assert executor._try_acquire()
+
+    try:
+        assert executor.estimate_retry_after() == 6
+    finally:
+        executor.shutdown()
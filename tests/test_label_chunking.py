@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pytest
+
+model = pytest.importorskip("model", reason="model.py needs the full inference stack")
+
+
+class WordTokenizer:
+    """One token per word, so label costs are easy to reason about"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, labels, add_special_tokens=False):
+        self.calls += 1
+        return {"input_ids": [[1] * len(label.split()) for label in labels]}
+
+
+def make_detector(max_text_tokens):
+    detector = model.DynamicGroundingDINO.__new__(model.DynamicGroundingDINO)
+    detector.max_text_tokens = max_text_tokens
+    detector.processor = SimpleNamespace(tokenizer=WordTokenizer())
+    detector._profile_chunks = model.LRUCache(max_size=16)
+    return detector
+
+
+def test_labels_that_fit_stay_in_one_chunk():
+    detector = make_detector(max_text_tokens=16)
+    assert detector._chunk_labels(["person", "red car"]) == [["person", "red car"]]
+
+
+def test_labels_are_split_within_the_token_budget_without_repeats():
+    # Budget is 8 - 2 ([CLS], [SEP]); each label costs its words plus the "." separator
+    detector = make_detector(max_text_tokens=8)
+    assert detector._chunk_labels(["a b", "c", "a b", "d e f", "g"]) == [["a b", "c"], ["d e f", "g"]]
+
+
+def test_single_label_is_never_tokenized():
+    detector = make_detector(max_text_tokens=2)
+    assert detector._chunk_labels(["a very long label"]) == [["a very long label"]]
+    assert detector.processor.tokenizer.calls == 0
+
+
+def test_registered_profile_chunks_are_reused():
+    detector = make_detector(max_text_tokens=8)
+    detector._profile_chunks.put(("x", "y"), [["x"], ["y"]])
+    assert detector._chunk_labels(["x", "y"]) == [["x"], ["y"]]
+    assert detector.processor.tokenizer.calls == 0
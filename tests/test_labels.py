@@ -0,0 +1,62 @@
+import pytest
+
+from labels import (clean_and_format_label, detect_script, label_prompt, normalize_label_thresholds, pack_labels,
+                    resolve_label_thresholds, search_box_threshold)
+
+
+@pytest.mark.parametrize("text, script", [
+    ("person", "en"),
+    ("", "en"),
+    ("café", "en"),
+    ("แมว", "th"),
+    ("แมว 2 ตัว", "th"),
+    ("แมว cat", None),
+    ("猫", None),
+    ("кот", None),
+])
+def test_detect_script(text, script):
+    assert detect_script(text) == script
+
+
+def test_clean_and_format_label():
+    assert clean_and_format_label("  st. bernard   dog ") == "St-Bernard-Dog"
+
+
+def test_label_thresholds_are_keyed_like_detections_and_normalization_is_idempotent():
+    thresholds = normalize_label_thresholds({" traffic  light ": "0.4", "person": 0.5})
+    assert thresholds == {"Traffic-Light": 0.4, "Person": 0.5}
+    assert normalize_label_thresholds(thresholds) == thresholds
+    assert normalize_label_thresholds(None) == {}
+
+
+def test_search_runs_at_the_lowest_requested_threshold():
+    assert search_box_threshold(0.35, None) == 0.35
+    assert search_box_threshold(0.35, {"Person": 0.2, "Car": 0.5}) == 0.2
+    assert search_box_threshold(0.35, {"Car": 0.5}) == 0.35
+
+
+def test_label_thresholds_resolve_through_original_queries_or_processed_labels():
+    thresholds = normalize_label_thresholds({"แมว": 0.2, "dog": 0.6})
+    resolved = resolve_label_thresholds(
+        ["แมว", "dog", "bird"], ["Cat", "Dog", "Bird"], 0.35, thresholds, {"Bird": 0.5}
+    )
+    assert resolved == {"Cat": 0.2, "Dog": 0.6, "Bird": 0.5}
+    assert resolve_label_thresholds(["dog"], ["Dog"], 0.35, {}) is None
+
+
+def test_labels_are_packed_greedily_within_the_token_budget():
+    chunks = pack_labels(["a b", "c", "d e f", "g"], [3, 2, 4, 2], 6)
+    assert chunks == [["a b", "c"], ["d e f", "g"]]
+
+
+def test_a_label_over_the_budget_gets_its_own_group():
+    assert pack_labels(["a", "very long label", "b"], [2, 9, 2], 6) == [["a"], ["very long label"], ["b"]]
+
+
+def test_repeated_labels_are_packed_once():
+    chunks = pack_labels(["Cat", "Dog", "Bird", "Cat", "Dog"], [3, 3, 3, 3, 3], 6)
+    assert chunks == [["Cat", "Dog"], ["Bird"]]
+
+
+def test_label_prompt_matches_the_processor_format():
+    assert label_prompt(["Traffic-Light", " Person "]) == "traffic-light. person."
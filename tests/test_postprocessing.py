@@ -0,0 +1,64 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("torchvision")
+
+from postprocessing import merge_detections, refine_detections
+
+BOXES = [[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 52, 52], [0, 0, 10, 10]]
+SCORES = [0.9, 0.8, 0.7, 0.6]
+LABELS = ["Person", "Person", "Person", "Car"]
+
+
+def test_merge_nms_suppresses_overlaps_of_the_same_label_only():
+    boxes, scores, labels = merge_detections(torch.tensor(BOXES, dtype=torch.float32),
+                                             torch.tensor(SCORES), LABELS, 0.5, method="nms")
+    assert labels == ["Person", "Person", "Car"]
+    assert scores.tolist() == pytest.approx([0.9, 0.7, 0.6])
+    assert boxes[0].tolist() == pytest.approx([0, 0, 10, 10])
+
+
+def test_merge_wbf_fuses_each_group_into_a_score_weighted_box():
+    boxes, scores, labels = merge_detections(torch.tensor(BOXES, dtype=torch.float32),
+                                             torch.tensor(SCORES), LABELS, 0.5, method="wbf")
+    assert labels == ["Person", "Person", "Car"]
+    assert scores.tolist() == pytest.approx([0.9, 0.7, 0.6])
+    offset = 0.8 / 1.7
+    assert boxes[0].tolist() == pytest.approx([offset, offset, 10 + offset, 10 + offset], abs=1e-5)
+    assert boxes[1].tolist() == pytest.approx([50, 50, 52, 52])
+    assert boxes[2].tolist() == pytest.approx([0, 0, 10, 10])
+
+
+def test_merge_of_nothing_returns_empty_results():
+    boxes, scores, labels = merge_detections(torch.zeros((0, 4)), torch.zeros(0), [])
+    assert labels == [] and len(boxes) == 0 and len(scores) == 0
+
+
+def test_refine_keeps_everything_by_default_sorted_by_score():
+    boxes, scores, labels = refine_detections(BOXES[::-1], SCORES[::-1], LABELS[::-1])
+    assert labels == ["Person", "Person", "Person", "Car"]
+    assert scores.tolist() == pytest.approx(SCORES)
+    assert boxes.shape == (4, 4)
+
+
+@pytest.mark.parametrize("nms_iou, max_detections", [(None, None), (0, 0), (-1, -1)])
+def test_refine_treats_non_positive_limits_as_disabled(nms_iou, max_detections):
+    _, _, labels = refine_detections(BOXES, SCORES, LABELS, nms_iou=nms_iou, max_detections=max_detections)
+    assert len(labels) == 4
+
+
+def test_refine_applies_nms_and_top_k_when_enabled():
+    _, scores, labels = refine_detections(BOXES, SCORES, LABELS, nms_iou=0.5, max_detections=2)
+    assert labels == ["Person", "Person"]
+    assert scores.tolist() == pytest.approx([0.9, 0.7])
+
+
+def test_refine_filters_by_label_threshold_and_box_area():
+    _, scores, labels = refine_detections(BOXES, SCORES, LABELS, min_box_area=10, label_thresholds={"Car": 0.65})
+    assert labels == ["Person", "Person"]
+    assert scores.tolist() == pytest.approx([0.9, 0.8])
+
+
+def test_refine_of_nothing_returns_empty_results():
+    boxes, scores, labels = refine_detections([], [], [])
+    assert labels == [] and boxes.shape == (0, 4) and len(scores) == 0
@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+import pytest
+
+model = pytest.importorskip("model", reason="model.py needs the full inference stack")
+
+from profile_store import ProfileStore
+
+
+class PromptTokenizer:
+    """Records the prompts it tokenizes (one id per character) and counts label tokens by words"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def __call__(self, text, add_special_tokens=True):
+        if isinstance(text, list):
+            return {"input_ids": [[1] * len(label.split()) for label in text]}
+        self.prompts.append(text)
+        return {"input_ids": [101] + [1] * len(text) + [102]}
+
+
+def test_profiles_are_tokenized_without_running_the_image_processor(tmp_path):
+    detector = model.DynamicGroundingDINO.__new__(model.DynamicGroundingDINO)
+    detector.max_text_tokens = 6
+    # No image processor: calling the full processor would fail
+    detector.processor = SimpleNamespace(tokenizer=PromptTokenizer())
+    detector.profile_store = ProfileStore(db_path=str(tmp_path / "profiles.db"))
+    detector.onnx_backend = None
+    detector.text_feature_cache = SimpleNamespace(max_size=0)
+    detector._profile_chunks = model.LRUCache(max_size=16)
+    detector._profile_tokens = model.LRUCache(max_size=16)
+    detector._prepare_text_labels = lambda queries: (list(queries), ["Red-Car", "Person", "Dog"])
+
+    profile = detector.register_profile(["red car", "person", "dog"], profile_id="street")
+
+    assert detector.processor.tokenizer.prompts == ["red-car. person.", "dog."]
+    assert profile["num_chunks"] == 2
+    assert detector._profile_tokens.get(("Dog",)) == [101, 1, 1, 1, 1, 102]
@@ -0,0 +1,76 @@
+from profile_store import ProfileStore
+
+
+def make_store(tmp_path, **kwargs):
+    return ProfileStore(db_path=str(tmp_path / "profiles.db"), **kwargs)
+
+
+def put_sample(store, profile_id="shop", name=None):
+    return store.put(profile_id, ["person", "car"], ["Person", "Car"], [["Person", "Car"]],
+                     [[2711, 1012, 2482, 1012]], name=name)
+
+
+def test_put_and_get_round_trip(tmp_path):
+    store = make_store(tmp_path)
+    stored = put_sample(store, name="Shop floor")
+
+    profile = store.get("shop")
+    assert profile == stored
+    assert profile.to_dict()["num_tokens"] == 4
+    assert store.get("missing") is None
+
+
+def test_replacing_a_profile_keeps_created_at_and_drops_features(tmp_path):
+    store = make_store(tmp_path)
+    first = put_sample(store)
+    store.put_features("shop", "model-a", [b"chunk-0"])
+    assert store.get("shop").feature_models == ["model-a"]
+
+    second = store.put("shop", ["dog"], ["Dog"], [["Dog"]], [[3899, 1012]])
+    assert second.created_at == first.created_at
+    assert store.get_features("shop", "model-a") is None
+    assert store.get("shop").labels == ["Dog"]
+
+
+def test_features_are_returned_in_chunk_order_per_model(tmp_path):
+    store = make_store(tmp_path)
+    put_sample(store)
+    store.put_features("shop", "model-a", [b"first", b"second"])
+
+    assert store.get_features("shop", "model-a") == [b"first", b"second"]
+    assert store.get_features("shop", "model-b") is None
+
+
+def test_own_writes_invalidate_the_memory_cache(tmp_path):
+    store = make_store(tmp_path, cache_seconds=3600)
+    put_sample(store)
+    assert store.get("shop").labels == ["Person", "Car"]
+
+    store.put("shop", ["dog"], ["Dog"], [["Dog"]], [[3899, 1012]])
+    assert store.get("shop").labels == ["Dog"]
+
+    assert store.delete("shop") is True
+    assert store.get("shop") is None
+    assert store.delete("shop") is False
+
+
+def test_other_processes_writes_show_up_after_cache_expiry(tmp_path):
+    writer = make_store(tmp_path)
+    cached = make_store(tmp_path, cache_seconds=3600)
+    uncached = make_store(tmp_path, cache_seconds=0)
+    put_sample(writer)
+    assert cached.get("shop").labels == ["Person", "Car"]
+
+    writer.put("shop", ["dog"], ["Dog"], [["Dog"]], [[3899, 1012]])
+    assert cached.get("shop").labels == ["Person", "Car"]
+    assert uncached.get("shop").labels == ["Dog"]
+
+
+def test_memory_cache_is_bounded(tmp_path):
+    store = make_store(tmp_path, cache_seconds=3600, max_cached=2)
+    for profile_id in ("a", "b", "c"):
+        put_sample(store, profile_id)
+        store.get(profile_id)
+
+    assert store.get_stats()["cached"] == 2
+    assert [profile.profile_id for profile in store.list()] == ["c", "b", "a"]
@@ -0,0 +1,62 @@
+import pytest
+
+from tiling import is_out_of_memory_error, run_in_batches, tile_grid
+
+
+def test_tile_grid_covers_the_image_with_overlap():
+    tiles = tile_grid(2000, 1000, 800, 160)
+    assert len(tiles) == 6
+    assert {left for left, _, _, _ in tiles} == {0, 640, 1200}
+    assert {top for _, top, _, _ in tiles} == {0, 200}
+    assert all(right - left == 800 and bottom - top == 800 for left, top, right, bottom in tiles)
+    assert max(right for _, _, right, _ in tiles) == 2000
+    assert max(bottom for _, _, _, bottom in tiles) == 1000
+
+
+def test_tile_grid_of_a_small_image_is_the_image():
+    assert tile_grid(500, 400, 800, 160) == [(0, 0, 500, 400)]
+
+
+def test_out_of_memory_errors_are_recognised():
+    assert is_out_of_memory_error(RuntimeError("CUDA out of memory. Tried to allocate 2.00 GiB"))
+    assert is_out_of_memory_error(RuntimeError("[enforce fail at alloc_cpu.cpp] DefaultCPUAllocator: can't allocate memory"))
+    assert not is_out_of_memory_error(ValueError("Post-processing failed"))
+
+
+def out_of_memory_above(limit, calls):
+    def fn(batch):
+        calls.append(len(batch))
+        if len(batch) > limit:
+            raise RuntimeError("CUDA out of memory")
+        return [item * 10 for item in batch]
+    return fn
+
+
+def test_batches_are_halved_on_out_of_memory_for_this_call_only():
+    calls, released = [], []
+    results = run_in_batches(out_of_memory_above(2, calls), list(range(5)), on_out_of_memory=lambda: released.append(1))
+
+    assert results == [0, 10, 20, 30, 40]
+    assert calls == [5, 2, 2, 1]
+    assert len(released) == 1
+
+    # The next call starts from the configured size again
+    calls.clear()
+    assert run_in_batches(out_of_memory_above(5, calls), list(range(5))) == [0, 10, 20, 30, 40]
+    assert calls == [5]
+
+
+def test_batch_size_caps_each_call():
+    calls = []
+    run_in_batches(out_of_memory_above(5, calls), list(range(5)), batch_size=2)
+    assert calls == [2, 2, 1]
+
+
+def test_other_errors_and_single_item_failures_propagate():
+    def reject(batch):
+        raise ValueError("bad input")
+
+    with pytest.raises(ValueError):
+        run_in_batches(reject, [1, 2])
+    with pytest.raises(RuntimeError):
+        run_in_batches(out_of_memory_above(0, []), [1, 2])
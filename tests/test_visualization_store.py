@@ -0,0 +1,59 @@
+import io
+import os
+
+from PIL import Image, ImageDraw
+
+from visualization_store import VisualizationStore
+
+RESULTS = {"boxes": [[2.0, 2.0, 20.0, 20.0]], "scores": [0.9], "labels": ["Person"]}
+
+
+def render(image, metadata):
+    image = image.convert("RGB")
+    draw = ImageDraw.Draw(image)
+    for box in metadata["boxes"]:
+        draw.rectangle(box, outline="red")
+    return image
+
+
+def encode(image, image_format, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format.upper(), quality=quality)
+    return buffer.getvalue(), image_format
+
+
+def test_visualizations_are_rendered_once_on_first_request(tmp_path):
+    store = VisualizationStore(str(tmp_path))
+    viz_id = store.add(Image.new("RGB", (64, 48), "white"), RESULTS)
+    calls = []
+
+    def counting_render(image, metadata):
+        calls.append(metadata["labels"])
+        return render(image, metadata)
+
+    first = store.render(viz_id, "jpg", 80, counting_render, encode)
+    second = store.render(viz_id, "jpeg", 80, counting_render, encode)
+
+    assert first == second
+    assert first[1] == "jpeg"
+    assert Image.open(io.BytesIO(first[0])).size == (64, 48)
+    assert calls == [["Person"]]
+
+
+def test_unknown_or_malformed_ids_are_not_found(tmp_path):
+    store = VisualizationStore(str(tmp_path))
+    assert store.render("0" * 32, "png", 85, render, encode) is None
+    assert store.render("../../etc/passwd", "png", 85, render, encode) is None
+
+
+def test_least_recently_used_entries_are_evicted_beyond_the_budget(tmp_path):
+    store = VisualizationStore(str(tmp_path), max_bytes=6000, rescan_every=1)
+    noise = Image.effect_noise((64, 64), 64).convert("RGB")
+    ids = []
+    for _ in range(6):
+        ids.append(store.add(noise, RESULTS))
+
+    total = sum(entry.stat().st_size for entry in os.scandir(tmp_path))
+    assert total <= 6000
+    assert store.render(ids[-1], "png", 85, render, encode) is not None
+    assert store.render(ids[0], "png", 85, render, encode) is None
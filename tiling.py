@@ -0,0 +1,62 @@
+import logging
+from typing import Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def is_out_of_memory_error(error: BaseException) -> bool:
+    """Whether an inference error was caused by running out of (GPU or CPU) memory"""
+    message = str(error).lower()
+    return any(marker in message for marker in (
+        "out of memory", "can't allocate memory", "could not create a primitive", "resource constraints"
+    ))
+
+
+def tile_grid(width: int, height: int, tile_size: int, overlap: int) -> List[Tuple[int, int, int, int]]:
+    """Return overlapping (left, top, right, bottom) tiles covering the image"""
+    def starts(length: int) -> List[int]:
+        if length <= tile_size:
+            return [0]
+        step = max(1, tile_size - overlap)
+        positions = list(range(0, length - tile_size, step))
+        positions.append(length - tile_size)
+        return positions
+
+    return [
+        (left, top, min(left + tile_size, width), min(top + tile_size, height))
+        for top in starts(height)
+        for left in starts(width)
+    ]
+
+
+def run_in_batches(fn: Callable[[Sequence], List], items: Sequence, batch_size: int = 0,
+                   on_out_of_memory: Optional[Callable[[], None]] = None) -> List:
+    """
+    Run fn over consecutive batches of items, halving the batch size on out-of-memory errors
+
+    The reduced batch size only applies to this call, so concurrent requests never
+    shrink each other's batches.
+
+    Args:
+        fn: Function mapping a batch of items to one result per item
+        items: Items to process
+        batch_size: Items per call (0 = all at once)
+        on_out_of_memory: Called before retrying, e.g. to release cached GPU memory
+
+    Returns:
+        Results for all items in input order
+    """
+    results: List = []
+    batch_size = batch_size if batch_size > 0 else len(items)
+    while len(results) < len(items):
+        batch = items[len(results):len(results) + batch_size]
+        try:
+            results.extend(fn(batch))
+        except Exception as e:
+            if len(batch) <= 1 or not is_out_of_memory_error(e):
+                raise
+            batch_size = max(1, len(batch) // 2)
+            logger.warning(f"Batch of {len(batch)} items ran out of memory, retrying with {batch_size} per call")
+            if on_out_of_memory is not None:
+                on_out_of_memory()
+    return results
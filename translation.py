@@ -0,0 +1,431 @@
+import os
+import re
+import json
+import time
+import logging
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from rapidfuzz import fuzz, process
+from langdetect import detect
+from aift import setting
+from aift.nlp import text_cleansing, text_sum
+from aift.nlp.translation import th2en
+
+from caches import TranslationCache
+from circuit_breaker import CircuitBreaker
+from labels import detect_script
+
+logger = logging.getLogger(__name__)
+
+setting.set_api_key('KIeFbAUzBG4A3Zrvo9gp1fV6bTwICIAG')
+
+TRANSLATION_DEADLINE = float(os.getenv("TRANSLATION_DEADLINE_SECONDS", "10"))
+_translation_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("TRANSLATION_WORKERS", "8")),
+    thread_name_prefix="translation"
+)
+
+aift_breaker = CircuitBreaker(
+    "aift",
+    timeout=float(os.getenv("AIFT_TIMEOUT_SECONDS", "5")),
+    failure_threshold=int(os.getenv("AIFT_FAILURE_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("AIFT_RESET_SECONDS", "30"))
+)
+
+
+def get_aift_breaker_stats() -> Dict[str, Any]:
+    """Get aift circuit breaker statistics"""
+    return aift_breaker.get_stats()
+
+
+translation_cache = TranslationCache(
+    max_size=int(os.getenv("TRANSLATION_CACHE_SIZE", "1024")),
+    db_path=os.getenv("TRANSLATION_CACHE_PATH", os.path.join("cache", "translations.db"))
+)
+
+# Curated Thai -> English labels for common detection queries
+THAI_LABEL_DICTIONARY = {
+    "คน": "person",
+    "บุคคล": "person",
+    "คนงาน": "worker",
+    "พนักงาน": "worker",
+    "ผู้ชาย": "man",
+    "ผู้หญิง": "woman",
+    "เด็ก": "child",
+    "หมอ": "doctor",
+    "แพทย์": "doctor",
+    "พยาบาล": "nurse",
+    "หมวกนิรภัย": "helmet",
+    "หมวกกันน็อค": "helmet",
+    "หมวกเซฟตี้": "safety helmet",
+    "เสื้อกั๊ก": "vest",
+    "เสื้อสะท้อนแสง": "reflective vest",
+    "เสื้อกั๊กสะท้อนแสง": "reflective vest",
+    "ถุงมือ": "gloves",
+    "แว่นตา": "glasses",
+    "แว่นตานิรภัย": "safety goggles",
+    "หน้ากาก": "mask",
+    "หน้ากากอนามัย": "face mask",
+    "รองเท้า": "shoes",
+    "รองเท้านิรภัย": "safety boots",
+    "รถยก": "forklift",
+    "รถโฟล์คลิฟท์": "forklift",
+    "โฟล์คลิฟท์": "forklift",
+    "รถยนต์": "car",
+    "รถเก๋ง": "car",
+    "รถบรรทุก": "truck",
+    "รถบัส": "bus",
+    "รถเมล์": "bus",
+    "รถจักรยานยนต์": "motorcycle",
+    "มอเตอร์ไซค์": "motorcycle",
+    "จักรยาน": "bicycle",
+    "รถเข็น": "wheelchair",
+    "เรือ": "boat",
+    "เครน": "crane",
+    "บันได": "ladder",
+    "กรวยจราจร": "traffic cone",
+    "สัญญาณไฟจราจร": "traffic light",
+    "พาเลท": "pallet",
+    "กล่อง": "box",
+    "ลัง": "crate",
+    "ขวด": "bottle",
+    "แก้ว": "cup",
+    "เก้าอี้": "chair",
+    "โต๊ะ": "table",
+    "เตียง": "bed",
+    "ประตู": "door",
+    "หน้าต่าง": "window",
+    "กระเป๋า": "bag",
+    "โทรศัพท์": "phone",
+    "โทรศัพท์มือถือ": "mobile phone",
+    "แล็ปท็อป": "laptop",
+    "คอมพิวเตอร์": "computer",
+    "เครื่องมือ": "tool",
+    "ค้อน": "hammer",
+    "ประแจ": "wrench",
+    "ไขควง": "screwdriver",
+    "สลักเกลียว": "bolt",
+    "น็อต": "nut",
+    "สกรู": "screw",
+    "มีด": "knife",
+    "ปืน": "gun",
+    "ไฟ": "fire",
+    "เปลวไฟ": "flame",
+    "ควัน": "smoke",
+    "ประกายไฟ": "spark",
+    "ถังดับเพลิง": "fire extinguisher",
+    "เข็มฉีดยา": "syringe",
+    "ต้นไม้": "tree",
+    "ดอกไม้": "flower",
+    "สุนัข": "dog",
+    "หมา": "dog",
+    "แมว": "cat",
+    "นก": "bird",
+    "วัว": "cow",
+    "ควาย": "buffalo",
+    "หมู": "pig",
+    "ไก่": "chicken",
+    "ปลา": "fish",
+    "ช้าง": "elephant",
+    "ผลไม้": "fruit",
+    "กล้วย": "banana",
+    "มะม่วง": "mango",
+    "ทุเรียน": "durian",
+    "ข้าว": "rice",
+}
+
+
+class TranslationBackend:
+    """
+    Base class for Thai-to-English label translation backends.
+
+    ``translate`` returns the English text, None when the backend has no
+    translation, and raises on errors.
+    """
+
+    name = "base"
+
+    def translate(self, text: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"name": self.name}
+
+
+class AiftTranslationBackend(TranslationBackend):
+    """Remote aift cleansing + th2en translation, guarded by the aift circuit breaker"""
+
+    name = "aift"
+
+    def translate(self, text: str) -> Optional[str]:
+        # Assuming API key is set globally or handled by setting.set_api_key
+        cleaned_text = aift_breaker.call("clean", text_cleansing.clean, text)['cleansing_text']
+        return aift_breaker.call("translate", th2en.translate, cleaned_text)['translated_text']
+
+
+class LocalTranslationBackend(TranslationBackend):
+    """
+    Offline translation from a curated label dictionary with fuzzy lookup,
+    optionally backed by a small local translation model.
+    """
+
+    name = "local"
+
+    def __init__(self, dictionary_path: Optional[str] = None, fuzzy_threshold: float = 85,
+                 model_id: Optional[str] = None):
+        """
+        Initialize the backend
+
+        Args:
+            dictionary_path: JSON file of extra {thai: english} entries merged over the built-in dictionary
+            fuzzy_threshold: Minimum rapidfuzz score (0-100) for a fuzzy dictionary match
+            model_id: HuggingFace translation model used when the dictionary has no match (None disables)
+        """
+        self.dictionary = dict(THAI_LABEL_DICTIONARY)
+        if dictionary_path and os.path.exists(dictionary_path):
+            with open(dictionary_path, encoding="utf-8") as f:
+                self.dictionary.update(json.load(f))
+            logger.info(f"Loaded translation dictionary from {dictionary_path}")
+        self.dictionary = {self._normalize(k): v for k, v in self.dictionary.items()}
+        self._keys = list(self.dictionary.keys())
+
+        self.fuzzy_threshold = fuzzy_threshold
+        self.model_id = model_id or None
+        self._pipeline = None
+        self._pipeline_lock = threading.Lock()
+
+        # Statistics
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.model_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return re.sub(r'\s+', ' ', text.strip())
+
+    def _model_translate(self, text: str) -> Optional[str]:
+        """Translate with the local model, loading it on first use"""
+        if self.model_id is None:
+            return None
+
+        with self._pipeline_lock:
+            if self._pipeline is None:
+                from transformers import pipeline
+                logger.info(f"Loading local translation model {self.model_id}...")
+                self._pipeline = pipeline("translation", model=self.model_id, device=-1)
+
+        output = self._pipeline(text, max_length=64)
+        return output[0]["translation_text"] if output else None
+
+    def translate(self, text: str) -> Optional[str]:
+        normalized = self._normalize(text)
+
+        translated = self.dictionary.get(normalized)
+        if translated is not None:
+            self.exact_hits += 1
+            return translated
+
+        match = process.extractOne(normalized, self._keys, scorer=fuzz.ratio,
+                                   score_cutoff=self.fuzzy_threshold)
+        if match is not None:
+            self.fuzzy_hits += 1
+            return self.dictionary[match[0]]
+
+        translated = self._model_translate(normalized)
+        if translated:
+            self.model_hits += 1
+            return translated
+
+        self.misses += 1
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "dictionary_size": len(self.dictionary),
+            "model_id": self.model_id,
+            "exact_hits": self.exact_hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "model_hits": self.model_hits,
+            "misses": self.misses
+        }
+
+
+class ChainedTranslationBackend(TranslationBackend):
+    """Try several backends in order and return the first translation found"""
+
+    def __init__(self, backends: List[TranslationBackend]):
+        self.backends = backends
+        self.name = ",".join(backend.name for backend in backends)
+
+    def translate(self, text: str) -> Optional[str]:
+        last_error = None
+        for backend in self.backends:
+            try:
+                translated = backend.translate(text)
+            except Exception as e:
+                last_error = e
+                continue
+            if translated:
+                return translated
+        if last_error is not None:
+            raise last_error
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "backends": [backend.get_stats() for backend in self.backends]
+        }
+
+
+def create_translation_backend(spec: str) -> TranslationBackend:
+    """
+    Create a translation backend from a comma-separated spec, e.g. "aift", "local" or "local,aift"
+    """
+    factories = {
+        "aift": AiftTranslationBackend,
+        "local": lambda: LocalTranslationBackend(
+            dictionary_path=os.getenv("LOCAL_TRANSLATION_DICT"),
+            fuzzy_threshold=float(os.getenv("LOCAL_TRANSLATION_FUZZY_THRESHOLD", "85")),
+            model_id=os.getenv("LOCAL_TRANSLATION_MODEL")
+        )
+    }
+
+    names = [name.strip().lower() for name in spec.split(",") if name.strip()]
+    unknown = [name for name in names if name not in factories]
+    if unknown or not names:
+        raise ValueError(f"Unknown translation backend(s) {unknown or spec!r}; expected one of {list(factories)}")
+
+    backends = [factories[name]() for name in names]
+    return backends[0] if len(backends) == 1 else ChainedTranslationBackend(backends)
+
+
+translation_backend = create_translation_backend(os.getenv("TRANSLATION_BACKEND", "aift"))
+
+
+def get_translation_backend_stats() -> Dict[str, Any]:
+    """Get translation backend statistics"""
+    return translation_backend.get_stats()
+
+
+def _translate_item(item: str) -> Tuple[str, bool]:
+    """
+    Detect the language of a single item and translate it to English if it is Thai.
+
+    Returns:
+        Tuple of (processed item, whether the result may be cached)
+    """
+    if len(item) > 10000:
+        try:
+            item = aift_breaker.call("summarize", text_sum.summarize, item)
+        except Exception as e:
+            # Keep the full item if summarization is unavailable
+            logger.warning(f"Summarization skipped: {e}")
+    try:
+        # Only ambiguous mixed-script input goes through langdetect
+        detected_language = detect_script(item) or detect(item)
+        if detected_language == 'th':
+            try:
+                translated_item = translation_backend.translate(item)
+                if not translated_item:
+                    return item, False # Keep original item when the backend has no translation
+                return translated_item, True
+            except Exception as e:
+                # print(f"Error during aift translation of '{item}': {e}") # Removed print
+                return item, False # Return original item on translation error
+        return item, True
+    except Exception as e:
+        # print(f"Error during language detection for '{item}': {e}") # Removed print
+        return item, False # Return original item in case of detection error
+
+
+def _cache_translation(item: str, started: float, future: Future):
+    """Store a finished translation in the cache (also used for results that miss the deadline)"""
+    try:
+        processed_item, cacheable = future.result()
+    except Exception:
+        return
+    if cacheable:
+        translation_cache.put(item, processed_item, time.perf_counter() - started)
+
+
+def process_and_translate_list(items_to_check, deadline: Optional[float] = None):
+    """
+    Detects language of items in a list and translates Thai items to English using aift.
+    Results are looked up in the shared translation cache first, so each label is only
+    detected and translated once. Cache misses are translated concurrently and bounded
+    by a per-request deadline; labels still pending at the deadline keep their original
+    text (their translations are cached when they finish).
+
+    Args:
+        items_to_check (list): A list of strings to process.
+        deadline (float, optional): Seconds to wait for translations. Defaults to TRANSLATION_DEADLINE.
+
+    Returns:
+        list: A new list with Thai items translated to English.
+    """
+    if deadline is None:
+        deadline = TRANSLATION_DEADLINE
+
+    processed_items = []
+    pending = {}
+    for item in items_to_check:
+        # Latin-script labels need no translation - skip the cache and thread pool entirely
+        if len(item) <= 10000 and detect_script(item) == 'en':
+            processed_items.append(item)
+            continue
+
+        cached_item = translation_cache.get(item)
+        processed_items.append(cached_item)
+        if cached_item is None and item not in pending:
+            started = time.perf_counter()
+            future = _translation_executor.submit(_translate_item, item)
+            future.add_done_callback(functools.partial(_cache_translation, item, started))
+            pending[item] = future
+
+    if pending:
+        wait(pending.values(), timeout=deadline)
+
+    for i, item in enumerate(items_to_check):
+        if processed_items[i] is not None:
+            continue
+        future = pending[item]
+        if future.done() and future.exception() is None:
+            processed_items[i] = future.result()[0]
+        else:
+            processed_items[i] = item # Keep original item if translation timed out or failed
+
+    return processed_items
+
+
+def lookup_cached_translations(items_to_check) -> Optional[List[str]]:
+    """
+    Resolve a list of items without calling the translation backend.
+
+    Latin-script items pass through and the rest come from the translation cache. The
+    lookup is speculative (callers fall back to process_and_translate_list), so it is
+    not counted in the cache statistics.
+
+    Returns:
+        list: The processed items, or None if any item still needs translating.
+    """
+    processed_items = []
+    for item in items_to_check:
+        if len(item) <= 10000 and detect_script(item) == 'en':
+            processed_items.append(item)
+            continue
+        cached_item = translation_cache.get(item, record=False)
+        if cached_item is None:
+            return None
+        processed_items.append(cached_item)
+    return processed_items
+
+
+def get_translation_cache_stats() -> Dict[str, Any]:
+    """Get translation cache statistics"""
+    return translation_cache.get_stats()
@@ -0,0 +1,162 @@
+import io
+import os
+import re
+import json
+import uuid
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+
+class VisualizationStore:
+    """
+    Disk-backed store for deferred visualizations.
+
+    Detections are stored together with a JPEG copy of the image they refer to,
+    and the annotated image is rendered on first request. Rendered images are kept
+    next to their source; the directory is shared by all workers on the host and is
+    bounded by ``max_bytes`` with least-recently-used eviction. Each process keeps a
+    running estimate of the directory size and only rescans it when the estimate
+    exceeds the budget or every ``rescan_every`` writes (other workers write too).
+    """
+
+    _ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+    SOURCE_QUALITY = 90
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024, rescan_every: int = 100):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.rescan_every = rescan_every
+        self._lock = threading.Lock()
+        self._estimated_bytes: Optional[int] = None
+        self._writes_since_scan = 0
+
+    def _path(self, viz_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{viz_id}{suffix}")
+
+    def add(self, image: Image.Image, results: Dict[str, Any]) -> str:
+        """Store an image and its detections for later rendering; returns the visualization id"""
+        os.makedirs(self.directory, exist_ok=True)
+        viz_id = uuid.uuid4().hex
+
+        metadata = {
+            "width": image.width,
+            "height": image.height,
+            "boxes": [box.tolist() if hasattr(box, "tolist") else list(box) for box in results["boxes"]],
+            "scores": [float(score) for score in results["scores"]],
+            "labels": list(results["labels"])
+        }
+        buffer = io.BytesIO()
+        image.convert("RGB").save(buffer, format="JPEG", quality=self.SOURCE_QUALITY)
+        source = buffer.getvalue()
+        with open(self._path(viz_id, ".jpg"), "wb") as f:
+            f.write(source)
+        # Metadata is written last so readers never see a half-written entry
+        encoded_metadata = json.dumps(metadata).encode("utf-8")
+        with open(self._path(viz_id, ".json"), "wb") as f:
+            f.write(encoded_metadata)
+
+        self._track_write(len(source) + len(encoded_metadata))
+        return viz_id
+
+    def render(self, viz_id: str, image_format: str, quality: int,
+               render_fn, encode_fn) -> Optional[Tuple[bytes, str]]:
+        """
+        Return the rendered visualization, rendering and caching it on first access
+
+        Args:
+            viz_id: Visualization id from add
+            image_format: Requested image format
+            quality: Quality for lossy formats
+            render_fn: Function (image, results) -> annotated PIL Image
+            encode_fn: Function (image, format, quality) -> (bytes, format)
+
+        Returns:
+            Tuple of (encoded bytes, format), or None if the id is unknown or evicted
+        """
+        if not self._ID_PATTERN.match(viz_id):
+            return None
+
+        metadata_path = self._path(viz_id, ".json")
+        if not os.path.exists(metadata_path):
+            return None
+
+        image_format = "jpeg" if image_format.lower() == "jpg" else image_format.lower()
+        rendered_path = self._path(viz_id, f".{quality}.{image_format}")
+        try:
+            with open(rendered_path, "rb") as f:
+                data = f.read()
+            os.utime(rendered_path)
+            os.utime(metadata_path)
+            return data, image_format
+        except FileNotFoundError:
+            pass
+
+        try:
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+            with open(self._path(viz_id, ".jpg"), "rb") as f:
+                image = Image.open(io.BytesIO(f.read()))
+                image.load()
+        except (FileNotFoundError, ValueError, OSError):
+            # Evicted between the existence check and the read
+            return None
+
+        data, image_format = encode_fn(render_fn(image, metadata), image_format, quality)
+
+        tmp_path = f"{rendered_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, rendered_path)
+        os.utime(metadata_path)
+
+        self._track_write(len(data))
+        return data, image_format
+
+    def _track_write(self, size: int):
+        """Account for written bytes and evict when the running estimate exceeds the budget"""
+        with self._lock:
+            self._writes_since_scan += 1
+            if self._estimated_bytes is not None:
+                self._estimated_bytes += size
+            needs_scan = (self._estimated_bytes is None
+                          or self._estimated_bytes > self.max_bytes
+                          or self._writes_since_scan >= self.rescan_every)
+        if needs_scan:
+            self._evict()
+
+    def _evict(self):
+        """Rescan the directory and delete least recently used entries until it fits in max_bytes"""
+        with self._lock:
+            self._writes_since_scan = 0
+            entries: Dict[str, List[Any]] = {}
+            total = 0
+            try:
+                with os.scandir(self.directory) as it:
+                    for entry in it:
+                        viz_id = entry.name.split(".", 1)[0]
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        info = entries.setdefault(viz_id, [0.0, 0, []])
+                        info[0] = max(info[0], stat.st_mtime)
+                        info[1] += stat.st_size
+                        info[2].append(entry.path)
+                        total += stat.st_size
+            except FileNotFoundError:
+                self._estimated_bytes = 0
+                return
+
+            if total > self.max_bytes:
+                for viz_id, (_, size, paths) in sorted(entries.items(), key=lambda item: item[1][0]):
+                    for path in paths:
+                        try:
+                            os.remove(path)
+                        except FileNotFoundError:
+                            pass
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+            self._estimated_bytes = total